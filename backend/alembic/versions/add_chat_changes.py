@@ -0,0 +1,51 @@
+"""Add the chat change feed
+
+Revision ID: add_chat_changes
+Revises: add_conversation_participants
+Create Date: 2026-10-17
+
+Append-only per-user log behind GET /chat/sync, numbered per user from
+chat_change_cursors. Starts empty: clients load
+conversations in full once, then poll from the cursor /chat/sync returns.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_chat_changes'
+down_revision: Union[str, None] = 'add_conversation_participants'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chat_changes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('service_request_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_chat_changes_user_id_seq', 'chat_changes', ['user_id', 'seq'], unique=True)
+    op.create_table(
+        'chat_change_cursors',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_seq', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('chat_change_cursors')
+    op.drop_index('ix_chat_changes_user_id_seq', table_name='chat_changes')
+    op.drop_table('chat_changes')
@@ -0,0 +1,39 @@
+"""Add client message ids for idempotent batch sends
+
+Revision ID: add_chat_client_message_ids
+Revises: add_chat_changes
+Create Date: 2026-10-17
+
+POST /chat/messages/batch stores the id the client generated for each
+message; the unique index turns a replayed offline queue into no-ops. Older
+rows have no client id, and NULLs never conflict.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_chat_client_message_ids'
+down_revision: Union[str, None] = 'add_chat_changes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_messages', sa.Column('client_message_id', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ux_chat_messages_sender_id_client_message_id',
+        'chat_messages',
+        ['sender_id', 'client_message_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_chat_messages_sender_id_client_message_id', table_name='chat_messages')
+    with op.batch_alter_table('chat_messages') as batch_op:
+        batch_op.drop_column('client_message_id')
@@ -0,0 +1,60 @@
+"""Add indexes for the chat inbox query
+
+Revision ID: add_chat_inbox_indexes
+Revises: add_hot_query_indexes
+Create Date: 2026-10-17
+
+The inbox finds a user's conversations by owner, by assigned provider and,
+for providers, by the conversations they have posted in. Built CONCURRENTLY
+on PostgreSQL, like add_hot_query_indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_chat_inbox_indexes'
+down_revision: Union[str, None] = 'add_hot_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - keep in sync with the models' __table_args__
+INBOX_INDEXES = [
+    ("ix_service_requests_user_id", "service_requests", ["user_id"]),
+    ("ix_service_requests_assigned_provider_id", "service_requests", ["assigned_provider_id"]),
+    ("ix_chat_messages_sender_id_service_request_id", "chat_messages", ["sender_id", "service_request_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for name, table, columns in INBOX_INDEXES:
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name, table, columns,
+                    unique=False,
+                    if_not_exists=True,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for name, table, _columns in reversed(INBOX_INDEXES):
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.drop_index(
+                    name, table_name=table,
+                    if_exists=True,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,73 @@
+"""Add full-text search over chat messages
+
+Revision ID: add_chat_message_search
+Revises: add_chat_read_states
+Create Date: 2026-10-17
+
+PostgreSQL gets a GIN index over to_tsvector('simple', message), built
+CONCURRENTLY. SQLite gets an FTS5 external-content table plus the triggers
+that keep it in sync, and the table is rebuilt from existing messages.
+Keep in sync with app/models/chat_search.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa  # noqa: F401
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_chat_message_search'
+down_revision: Union[str, None] = 'add_chat_read_states'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5("
+    "message, service_request_id, content='chat_messages', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(rowid, message, service_request_id) VALUES (new.id, new.message, new.service_request_id); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message, service_request_id) VALUES ('delete', old.id, old.message, old.service_request_id); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF message, service_request_id ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message, service_request_id) VALUES ('delete', old.id, old.message, old.service_request_id); "
+    "INSERT INTO chat_messages_fts(rowid, message, service_request_id) VALUES (new.id, new.message, new.service_request_id); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS chat_messages_fts_update",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_insert",
+    "DROP TABLE IF EXISTS chat_messages_fts",
+]
+
+
+def _sqlite_has_fts5(bind) -> bool:
+    return bool(bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_message_search "
+                "ON chat_messages USING gin (to_tsvector('simple'::regconfig, message))"
+            )
+    elif bind.dialect.name == 'sqlite' and _sqlite_has_fts5(bind):
+        for statement in SQLITE_FTS_CREATE:
+            op.execute(statement)
+        op.execute("INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chat_messages_message_search")
+    elif bind.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            op.execute(statement)
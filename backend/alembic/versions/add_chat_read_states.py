@@ -0,0 +1,115 @@
+"""Add chat read watermarks
+
+Revision ID: add_chat_read_states
+Revises: add_chat_inbox_indexes
+Create Date: 2026-10-17
+
+Replaces per-message read tracking with one row per (user, conversation)
+holding the highest message id read / delivered. Existing is_read and
+delivery_status flags are folded into watermarks for the request owner and
+the assigned provider.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_chat_read_states'
+down_revision: Union[str, None] = 'add_chat_inbox_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESSAGES_INDEX = 'ix_chat_messages_service_request_id_id'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chat_read_states',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('service_request_id', sa.Integer(), sa.ForeignKey('service_requests.id'), nullable=False),
+        sa.Column('last_read_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_delivered_message_id', sa.Integer(), nullable=True),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'service_request_id'),
+    )
+    op.create_index(
+        'ix_chat_read_states_service_request_id', 'chat_read_states', ['service_request_id'], unique=False
+    )
+
+    messages = sa.table(
+        'chat_messages',
+        sa.column('id', sa.Integer),
+        sa.column('service_request_id', sa.Integer),
+        sa.column('sender_id', sa.Integer),
+        sa.column('is_read', sa.Boolean),
+        sa.column('delivery_status', sa.String),
+    )
+    requests = sa.table(
+        'service_requests',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('assigned_provider_id', sa.Integer),
+    )
+    read_states = sa.table(
+        'chat_read_states',
+        sa.column('user_id', sa.Integer),
+        sa.column('service_request_id', sa.Integer),
+        sa.column('last_read_message_id', sa.Integer),
+        sa.column('last_delivered_message_id', sa.Integer),
+    )
+    is_read = messages.c.is_read == sa.true()
+    is_delivered = sa.or_(is_read, messages.c.delivery_status.in_(['delivered', 'read']))
+    last_read = sa.func.max(sa.case((is_read, messages.c.id)))
+    last_delivered = sa.func.max(sa.case((is_delivered, messages.c.id)))
+
+    # A message's reader is whichever participant did not send it
+    for reader, extra in (
+        (requests.c.user_id, sa.true()),
+        (requests.c.assigned_provider_id, requests.c.assigned_provider_id != requests.c.user_id),
+    ):
+        backfill = (
+            sa.select(reader, messages.c.service_request_id, last_read, last_delivered)
+            .select_from(messages.join(requests, requests.c.id == messages.c.service_request_id))
+            .where(reader.isnot(None), messages.c.sender_id != reader, extra)
+            .group_by(reader, messages.c.service_request_id)
+            .having(last_delivered.isnot(None))
+        )
+        op.execute(
+            read_states.insert().from_select(
+                ['user_id', 'service_request_id', 'last_read_message_id', 'last_delivered_message_id'],
+                backfill,
+            )
+        )
+
+    # chat_messages takes writes all the time: build its index without
+    # blocking them. The autocommit block commits the table and backfill above
+    # first, so they stay one transaction.
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                MESSAGES_INDEX, 'chat_messages', ['service_request_id', 'id'],
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+    else:
+        op.create_index(MESSAGES_INDEX, 'chat_messages', ['service_request_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                MESSAGES_INDEX, table_name='chat_messages',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index(MESSAGES_INDEX, table_name='chat_messages')
+    op.drop_index('ix_chat_read_states_service_request_id', table_name='chat_read_states')
+    op.drop_table('chat_read_states')
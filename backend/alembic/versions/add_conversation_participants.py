@@ -0,0 +1,96 @@
+"""Add conversation participants
+
+Revision ID: add_conversation_participants
+Revises: add_chat_message_search
+Create Date: 2026-10-17
+
+One row per user allowed into a service request's chat: the owner, the
+assigned provider and anyone else who has posted. Backfilled from
+service_requests and chat_messages.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_conversation_participants'
+down_revision: Union[str, None] = 'add_chat_message_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'conversation_participants',
+        sa.Column(
+            'service_request_id', sa.Integer(),
+            sa.ForeignKey('service_requests.id', ondelete='CASCADE'), nullable=False,
+        ),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('service_request_id', 'user_id'),
+    )
+    op.create_index(
+        'ix_conversation_participants_user_id', 'conversation_participants', ['user_id'], unique=False
+    )
+
+    requests = sa.table(
+        'service_requests',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('assigned_provider_id', sa.Integer),
+        sa.column('created_at', sa.DateTime),
+    )
+    messages = sa.table(
+        'chat_messages',
+        sa.column('service_request_id', sa.Integer),
+        sa.column('sender_id', sa.Integer),
+        sa.column('created_at', sa.DateTime),
+    )
+    participants = sa.table(
+        'conversation_participants',
+        sa.column('service_request_id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('role', sa.String),
+        sa.column('joined_at', sa.DateTime),
+    )
+    columns = ['service_request_id', 'user_id', 'role', 'joined_at']
+
+    op.execute(participants.insert().from_select(
+        columns,
+        sa.select(requests.c.id, requests.c.user_id, sa.literal('owner'), requests.c.created_at),
+    ))
+    op.execute(participants.insert().from_select(
+        columns,
+        sa.select(
+            requests.c.id, requests.c.assigned_provider_id, sa.literal('provider'), requests.c.created_at
+        ).where(
+            requests.c.assigned_provider_id.isnot(None),
+            requests.c.assigned_provider_id != requests.c.user_id,
+        ),
+    ))
+    already_in = sa.exists().where(
+        participants.c.service_request_id == messages.c.service_request_id,
+        participants.c.user_id == messages.c.sender_id,
+    )
+    op.execute(participants.insert().from_select(
+        columns,
+        sa.select(
+            messages.c.service_request_id,
+            messages.c.sender_id,
+            sa.literal('responder'),
+            sa.func.min(messages.c.created_at),
+        )
+        .where(~already_in)
+        .group_by(messages.c.service_request_id, messages.c.sender_id),
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_participants_user_id', table_name='conversation_participants')
+    op.drop_table('conversation_participants')
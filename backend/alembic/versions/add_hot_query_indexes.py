@@ -0,0 +1,66 @@
+"""Add composite indexes for hot query shapes
+
+Revision ID: add_hot_query_indexes
+Revises: merge_provider_profile_heads
+Create Date: 2026-10-17
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY so the
+tables stay writable while they build. CONCURRENTLY cannot run inside a
+transaction, hence the autocommit blocks.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa  # noqa: F401
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_hot_query_indexes'
+down_revision: Union[str, None] = 'merge_provider_profile_heads'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - keep in sync with the models' __table_args__
+HOT_QUERY_INDEXES = [
+    ("ix_chat_messages_service_request_id_created_at", "chat_messages", ["service_request_id", "created_at"]),
+    ("ix_service_requests_status_is_urgent_created_at", "service_requests", ["status", "is_urgent", "created_at"]),
+    ("ix_weight_records_pet_id_date", "weight_records", ["pet_id", "date"]),
+    ("ix_location_history_pet_id_timestamp", "location_history", ["pet_id", "timestamp"]),
+    ("ix_vaccinations_pet_id_next_due_date", "vaccinations", ["pet_id", "next_due_date"]),
+    ("ix_pets_user_id", "pets", ["user_id"]),
+    ("ix_tasks_user_id", "tasks", ["user_id"]),
+    ("ix_fcm_tokens_user_id_is_active", "fcm_tokens", ["user_id", "is_active"]),
+    ("ix_provider_reviews_provider_id_created_at", "provider_reviews", ["provider_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for name, table, columns in HOT_QUERY_INDEXES:
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name, table, columns,
+                    unique=False,
+                    if_not_exists=True,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    for name, table, _columns in reversed(HOT_QUERY_INDEXES):
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.drop_index(
+                    name, table_name=table,
+                    if_exists=True,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.drop_index(name, table_name=table, if_exists=True)
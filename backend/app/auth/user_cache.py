@@ -0,0 +1,152 @@
+"""
+Authenticated-user identity cache.
+
+get_current_user resolves the JWT subject to a UserORM on every request. This
+cache keeps a detached, column-only snapshot of recently seen users (bounded
+LRU with a TTL) so steady-state traffic can skip that lookup. A hit is merged
+into the request's session with ``load=False``: no SQL is issued, but the
+instance is attached, so routes can still modify it and lazy-load
+relationships (provider profile, pets, ...) fresh from the database.
+
+Entries are dropped after any commit that inserts, updates or deletes a
+UserORM row, so writes through /users or the provider routes are visible on
+the very next request handled by this process. Other worker processes can
+serve the old row for up to AUTH_USER_CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.auth.utils import get_user_by_username
+from app.models import UserORM
+from config import AUTH_USER_CACHE_MAX_SIZE, AUTH_USER_CACHE_TTL_SECONDS
+
+
+class UserIdentityCache:
+    """Bounded TTL/LRU map of token subject (username) -> detached UserORM"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, username: str) -> Optional[UserORM]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+            snapshot, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return snapshot
+
+    def put(self, user: UserORM):
+        if not self.enabled:
+            return
+        snapshot = _detached_snapshot(user)
+        with self._lock:
+            self._entries[user.username] = (
+                snapshot,
+                time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str):
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _detached_snapshot(user: UserORM) -> UserORM:
+    """Column-only copy of ``user`` that can be merged with load=False"""
+    mapper = inspect(UserORM)
+    snapshot = UserORM(
+        **{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs}
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def get_user_by_username_cached(db: Session, username: str) -> Optional[UserORM]:
+    """get_user_by_username, answered from the cache when possible"""
+    snapshot = user_cache.get(username)
+    if snapshot is not None:
+        return db.merge(snapshot, load=False)
+    user = get_user_by_username(db, username=username)
+    if user is not None:
+        user_cache.put(user)
+    return user
+
+
+user_cache = UserIdentityCache(
+    max_size=AUTH_USER_CACHE_MAX_SIZE,
+    ttl_seconds=AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+_PENDING_KEY = "user_cache_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, UserORM):
+            continue
+        history = inspect(obj).attrs.username.history
+        changed.update(name for name in history.deleted if name)
+        if obj.username:
+            changed.add(obj.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for username in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -3,7 +3,8 @@ from urllib.parse import parse_qs
 from fastapi import HTTPException, Depends, status, WebSocket
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from app.auth.utils import oauth2_scheme, get_user_by_username
+from app.auth.utils import oauth2_scheme
+from app.auth.user_cache import get_user_by_username_cached
 from config import ALGORITHM, SECRET_KEY
 from .db import get_db
 from typing import Optional
@@ -27,7 +28,7 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_username(db, username=username)
+    user = get_user_by_username_cached(db, username=username)
     if user is None:
         raise credentials_exception
     return user
@@ -66,11 +67,11 @@ async def get_current_user_websocket(
         db_generator = get_db()
         db = next(db_generator)
         try:
-            return get_user_by_username(db, username=username)
+            return get_user_by_username_cached(db, username=username)
         finally:
             db.close()
 
-    return get_user_by_username(db, username=username)
+    return get_user_by_username_cached(db, username=username)
 
 
 def require_provider(user: UserORM = Depends(get_current_user)) -> UserORM:
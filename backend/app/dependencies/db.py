@@ -1,4 +1,4 @@
-from database import SessionLocal
+from database import AsyncSessionLocal, SessionLocal
 
 
 def get_db():
@@ -8,3 +8,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_session_factory():
+    """Session factory dependency for long-lived handlers such as WebSockets.
+
+    ``get_db`` keeps one session, and its pooled connection, for the whole
+    handler; a socket instead opens a session per unit of work and closes it
+    before waiting on the client again.
+    """
+    return SessionLocal
+
+
+async def get_async_db():
+    """Async database dependency for ``async def`` routes.
+
+    Queries await the driver instead of blocking the event loop, so one worker
+    can overlap DB waits across many in-flight requests.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
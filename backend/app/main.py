@@ -11,6 +11,7 @@ from app.routers import (
     enhanced_provider_profiles,
     enhanced_provider_reviews,
     image_upload,
+    internal,
     location,
     marketplace_posts,
     medical_record,
@@ -25,6 +26,7 @@ from app.routers import (
     weight_goal,
     weight_record,
 )
+from app.utils.query_counter import QueryCounterMiddleware
 from config import CORS_ORIGINS
 
 logger = logging.getLogger(__name__)
@@ -99,6 +101,7 @@ app.add_middleware(
     expose_headers=["*"],
     max_age=600,
 )
+app.add_middleware(QueryCounterMiddleware)
 
 
 app.include_router(user.router)
@@ -134,14 +137,22 @@ app.include_router(chat.router)
 
 try:
     from app.websocket.chat_router import router as websocket_chat_router
+    from app.websocket.connection_manager import manager as websocket_manager
+    from app.websocket.message_writer import message_writer
 
     app.include_router(websocket_chat_router)
+    # Other workers' chat events arrive through the backplane
+    app.add_event_handler("startup", websocket_manager.start)
+    # Queued messages are written (and broadcast) before the backplane closes
+    app.add_event_handler("shutdown", message_writer.stop)
+    app.add_event_handler("shutdown", websocket_manager.stop)
 except Exception as exc:
     logger.warning("WebSocket chat router not available: %s", exc)
 
 app.include_router(marketplace_posts.router)
 app.include_router(enhanced_provider_profiles.router)
 app.include_router(enhanced_provider_reviews.router)
+app.include_router(internal.router)
 
 
 uploads_path = Path("uploads").absolute()
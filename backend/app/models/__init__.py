@@ -16,6 +16,10 @@ from .service_request import ServiceRequestORM
 from .service_request_response import ServiceRequestResponseORM
 from .marketplace_post import MarketplacePostORM
 from .chat_message import ChatMessageORM
+from .chat_read_state import ChatReadStateORM
+from .chat_change import ChatChangeCursorORM, ChatChangeORM
+from .conversation_participant import ConversationParticipantORM
+from .chat_search import message_search_vector
 from .ai_conversation import AIConversationORM, AIConversationMessageORM
 from .fcm_token import FCMTokenORM
 from .service_request_pets import service_request_pets
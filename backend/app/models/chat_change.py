@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+from datetime import datetime
+
+class ChatChangeORM(Base):
+    """One entry in a user's chat change feed.
+
+    Every new message and every read / delivered watermark move is fanned out
+    to each participant of the conversation, so a polling client catches up
+    with a single (user_id, seq) range scan. ``seq`` is the sync cursor: it
+    counts the user's changes, and is taken from their ChatChangeCursorORM
+    row, which stays locked until the change commits. A user's changes
+    therefore become visible in ``seq`` order, unlike autoincrement ids,
+    which concurrent transactions can commit out of order.
+
+    The ids are plain integers rather than foreign keys: the feed is an
+    append-only log and must not block deleting what it refers to.
+    """
+    __tablename__ = "chat_changes"
+    __table_args__ = (
+        Index("ix_chat_changes_user_id_seq", "user_id", "seq", unique=True),
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    service_request_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)  # message, read, delivered
+    # Sender of the message, or the participant whose watermark moved
+    actor_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # The new message, or the message the watermark moved up to
+    message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ChatChange(id={self.id}, user_id={self.user_id}, seq={self.seq}, kind='{self.kind}', message_id={self.message_id})>"
+
+
+class ChatChangeCursorORM(Base):
+    """Seq of the newest change in a user's chat change feed"""
+    __tablename__ = "chat_change_cursors"
+    
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<ChatChangeCursor(user_id={self.user_id}, last_seq={self.last_seq})>"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 from datetime import datetime, timezone
@@ -12,6 +12,14 @@ if TYPE_CHECKING:
 class ChatMessageORM(Base):
     """Chat message entity for user-provider communication"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_service_request_id_created_at", "service_request_id", "created_at"),
+        Index("ix_chat_messages_sender_id_service_request_id", "sender_id", "service_request_id"),
+        # Unread counts are id ranges above a read watermark
+        Index("ix_chat_messages_service_request_id_id", "service_request_id", "id"),
+        # Replays of an offline queue are recognised by the id the client chose
+        Index("ux_chat_messages_sender_id_client_message_id", "sender_id", "client_message_id", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     service_request_id: Mapped[int] = mapped_column(Integer, ForeignKey("service_requests.id"), nullable=False)
@@ -21,6 +29,7 @@ class ChatMessageORM(Base):
     message: Mapped[str] = mapped_column(Text, nullable=False)
     message_type: Mapped[str] = mapped_column(String, default="text")  # text, image, file, system
     message_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # Store attachments and other metadata
+    client_message_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # Idempotency key from batch submissions
     
     # Message metadata
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
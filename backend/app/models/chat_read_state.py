@@ -0,0 +1,29 @@
+from __future__ import annotations
+from typing import Optional
+from sqlalchemy import Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+from datetime import datetime
+
+class ChatReadStateORM(Base):
+    """How far one user has read / received one conversation.
+
+    Message ids only grow, so "read up to message X" marks every earlier
+    message at once and unread counts become an id range count.
+    """
+    __tablename__ = "chat_read_states"
+    __table_args__ = (
+        Index("ix_chat_read_states_service_request_id", "service_request_id"),
+    )
+    
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    service_request_id: Mapped[int] = mapped_column(Integer, ForeignKey("service_requests.id"), primary_key=True)
+    
+    # Watermarks: highest message id read / delivered for this user
+    last_read_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_delivered_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    read_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<ChatReadState(user_id={self.user_id}, service_request_id={self.service_request_id}, last_read_message_id={self.last_read_message_id})>"
@@ -0,0 +1,81 @@
+"""
+Full-text search index over chat messages.
+
+Neither backend can describe its index with plain table metadata:
+
+* SQLite uses an FTS5 external-content table kept in sync by triggers, created
+  right after chat_messages (only when the SQLite build ships FTS5). It also
+  indexes service_request_id, so a search can be narrowed to the user's
+  conversations inside FTS5 instead of after matching every message.
+* PostgreSQL uses a GIN index over to_tsvector('simple', message); queries must
+  use ``message_search_vector`` so the planner matches the index expression.
+
+Both are maintained by the database on every insert, update and delete, so
+every write path (REST, WebSocket, batch) is indexed without extra calls.
+"""
+from sqlalchemy import DDL, Index, event, func, text
+
+from .chat_message import ChatMessageORM
+
+# 'simple' does no stemming or stop words, so it works for any language
+SEARCH_CONFIG = text("'simple'::regconfig")
+FTS_TABLE = "chat_messages_fts"
+
+message_search_vector = func.to_tsvector(
+    SEARCH_CONFIG, ChatMessageORM.__table__.c.message
+)
+
+Index(
+    "ix_chat_messages_message_search",
+    message_search_vector,
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+SQLITE_FTS_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "message, service_request_id, content='chat_messages', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, message, service_request_id) VALUES (new.id, new.message, new.service_request_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, service_request_id) VALUES ('delete', old.id, old.message, old.service_request_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF message, service_request_id ON chat_messages BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, service_request_id) VALUES ('delete', old.id, old.message, old.service_request_id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, message, service_request_id) VALUES (new.id, new.message, new.service_request_id); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS chat_messages_fts_update",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def sqlite_has_fts5(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    return bool(
+        connection.exec_driver_sql(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).scalar()
+    )
+
+
+def _if_fts5(ddl, target, bind, **kw):
+    return sqlite_has_fts5(bind)
+
+
+for _statement in SQLITE_FTS_CREATE:
+    event.listen(
+        ChatMessageORM.__table__,
+        "after_create",
+        DDL(_statement).execute_if(callable_=_if_fts5),
+    )
+# The external-content index would otherwise outlive (and misdescribe) a
+# recreated chat_messages table
+for _statement in SQLITE_FTS_DROP:
+    event.listen(
+        ChatMessageORM.__table__,
+        "before_drop",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from .base import Base
+from datetime import datetime
+
+class ConversationParticipantORM(Base):
+    """A user who may read and write one service request's conversation.
+
+    Rows are kept in step with the request (owner, assigned provider) and with
+    the messages sent (responders) by app/services/conversation_participants.py,
+    so access checks are a primary-key lookup.
+    """
+    __tablename__ = "conversation_participants"
+    __table_args__ = (
+        Index("ix_conversation_participants_user_id", "user_id"),
+    )
+    
+    service_request_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("service_requests.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    role: Mapped[str] = mapped_column(String, nullable=False)  # owner, provider, responder
+    joined_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    service_request = relationship("ServiceRequestORM", back_populates="participants")
+    
+    def __repr__(self):
+        return f"<ConversationParticipant(service_request_id={self.service_request_id}, user_id={self.user_id}, role='{self.role}')>"
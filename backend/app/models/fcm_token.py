@@ -2,7 +2,7 @@
 FCM Token Management Service
 Handles storing and retrieving FCM tokens for users
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 from datetime import datetime
@@ -10,6 +10,7 @@ from datetime import datetime
 class FCMTokenORM(Base):
     """FCM Token storage model"""
     __tablename__ = "fcm_tokens"
+    __table_args__ = (Index("ix_fcm_tokens_user_id_is_active", "user_id", "is_active"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,5 +1,5 @@
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from .base import Base
@@ -12,6 +12,9 @@ class LocationHistoryORM(Base):
     """GPS location history for pets"""
 
     __tablename__ = "location_history"
+    __table_args__ = (
+        Index("ix_location_history_pet_id_timestamp", "pet_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     pet_id: Mapped[int] = mapped_column(Integer, ForeignKey("pets.id"), nullable=False)
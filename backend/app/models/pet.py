@@ -31,7 +31,7 @@ class PetORM(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("users.id"), nullable=False
+        Integer, ForeignKey("users.id"), nullable=False, index=True
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
     breed_type: Mapped[str] = mapped_column(String, nullable=False)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 from datetime import datetime
@@ -12,6 +12,9 @@ if TYPE_CHECKING:
 class ProviderReviewORM(Base):
     """Provider review and rating system"""
     __tablename__ = "provider_reviews"
+    __table_args__ = (
+        Index("ix_provider_reviews_provider_id_created_at", "provider_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     provider_id: Mapped[int] = mapped_column(ForeignKey("provider_profiles.id"), nullable=False)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Optional, TYPE_CHECKING, List
-from sqlalchemy import Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 from datetime import datetime
@@ -10,10 +10,16 @@ if TYPE_CHECKING:
     from .user import UserORM
     from .chat_message import ChatMessageORM
     from .service_request_response import ServiceRequestResponseORM
+    from .conversation_participant import ConversationParticipantORM
 
 class ServiceRequestORM(Base):
     """Service request entity - users post requests for services"""
     __tablename__ = "service_requests"
+    __table_args__ = (
+        Index("ix_service_requests_status_is_urgent_created_at", "status", "is_urgent", "created_at"),
+        Index("ix_service_requests_user_id", "user_id"),
+        Index("ix_service_requests_assigned_provider_id", "assigned_provider_id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -38,7 +44,10 @@ class ServiceRequestORM(Base):
     special_requirements: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Provider assignment
-    assigned_provider_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
+    # active_history: the participant sync needs the replaced provider id
+    assigned_provider_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=True, active_history=True
+    )
     
     # Status and metadata
     status: Mapped[str] = mapped_column(String, default="open")  # open, in_progress, completed, closed
@@ -68,6 +77,9 @@ class ServiceRequestORM(Base):
     responses: Mapped[List["ServiceRequestResponseORM"]] = relationship(
         "ServiceRequestResponseORM", back_populates="service_request", cascade="all, delete-orphan"
     )
+    participants: Mapped[List["ConversationParticipantORM"]] = relationship(
+        "ConversationParticipantORM", back_populates="service_request", cascade="all, delete-orphan"
+    )
     
     def __repr__(self):
         return f"<ServiceRequest(id={self.id}, title='{self.title}', service_type='{self.service_type}')>"
\ No newline at end of file
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Boolean, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 from .base import Base
 
 class VaccinationORM(Base):
     __tablename__ = "vaccinations"
+    __table_args__ = (
+        Index("ix_vaccinations_pet_id_next_due_date", "pet_id", "next_due_date"),
+    )
+    # created_at / updated_at are set by the database; fetch them with
+    # RETURNING on write instead of a SELECT on first access
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False)
@@ -21,7 +27,8 @@ class VaccinationORM(Base):
     is_completed = Column(Boolean, default=True)
     reminder_sent = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # An explicit NULL on insert, so RETURNING covers this column too
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
     
     # Relationship
     pet = relationship("PetORM", back_populates="vaccinations")
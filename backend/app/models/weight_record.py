@@ -6,6 +6,7 @@ from sqlalchemy import (
     DateTime,
     Text,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
@@ -20,6 +21,7 @@ class WeightRecordORM(Base):
     """Weight record entity for tracking pet weight over time"""
 
     __tablename__ = "weight_records"
+    __table_args__ = (Index("ix_weight_records_pet_id_date", "pet_id", "date"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     pet_id: Mapped[int] = mapped_column(Integer, ForeignKey("pets.id"), nullable=False)
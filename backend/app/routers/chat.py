@@ -1,18 +1,53 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from app.models import ChatMessageORM, ServiceRequestORM, UserORM, FCMTokenORM
-from app.schemas import ChatMessageCreate, ChatMessageRead, ChatConversation
-from app.dependencies.db import get_db
+from app.schemas import (
+    ChatConversation,
+    ChatInbox,
+    ChatInboxEntry,
+    ChatMessageBatch,
+    ChatMessageBatchRead,
+    ChatMessageBatchResult,
+    ChatMessageCreate,
+    ChatMessageRead,
+    ChatSearchResults,
+    ChatSync,
+)
+from app.dependencies.db import get_async_db, get_db
 from app.dependencies.auth import get_current_user
 from app.services.firebase_admin_service import firebase_admin_service
+from app.services.chat_read_state import (
+    advance_watermarks,
+    apply_watermarks,
+    conversation_watermarks,
+    count_unread,
+    unread_message_filters,
+)
+from app.services.chat_hot_buffer import hot_messages
+from app.services.chat_sync import get_changes, latest_cursor
+from app.services.chat_search import (
+    InvalidSearchCursor,
+    search_messages as search_chat_messages,
+)
+from app.services.conversation_participants import (
+    is_participant,
+    is_participant_async,
+    participant_conversation_ids,
+)
+from app.utils.file_upload import FileTooLargeError, stream_upload_to_path
+from app.websocket.connection_manager import manager
+from config import UPLOAD_DIR
+import base64
 import json
 import os
 import uuid
 import re
 from datetime import datetime
-from pathlib import Path
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = logging.getLogger(__name__)
@@ -29,6 +64,7 @@ ALLOWED_FILE_TYPES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+CHAT_UPLOAD_DIR = UPLOAD_DIR / "chat"
 MAX_FILES_PER_MESSAGE = 5
 MAX_MESSAGE_LENGTH = 2000
 RATE_LIMIT_MESSAGES_PER_MINUTE = 30
@@ -101,7 +137,7 @@ async def send_message_with_files(
     message: str = Form(...),
     message_type: str = Form("text"),
     files: List[UploadFile] = File(default=[]),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Send a message with file attachments"""
@@ -112,20 +148,12 @@ async def send_message_with_files(
         raise HTTPException(status_code=400, detail="Invalid service_request_id")
 
     # Verify the service request exists and user has access
-    service_request = (
-        db.query(ServiceRequestORM)
-        .filter(ServiceRequestORM.id == service_request_id_int)
-        .first()
-    )
+    service_request = await db.get(ServiceRequestORM, service_request_id_int)
 
     if not service_request:
         raise HTTPException(status_code=404, detail="Service request not found")
 
-    # Industry standard access control: Owner OR Assigned Provider
-    is_owner = service_request.user_id == current_user.id
-    is_assigned_provider = service_request.assigned_provider_id == current_user.id
-
-    if not (is_owner or is_assigned_provider):
+    if not await is_participant_async(db, current_user.id, service_request_id_int):
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Validate inputs
@@ -140,16 +168,19 @@ async def send_message_with_files(
 
     # Process file uploads
     attachments_info = []
-    if files:
-        # Validate file count
-        if len(files) > MAX_FILES_PER_MESSAGE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Too many files. Maximum {MAX_FILES_PER_MESSAGE} files allowed.",
-            )
+    stored_paths = []
+    try:
+        if files:
+            # Validate file count
+            if len(files) > MAX_FILES_PER_MESSAGE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Too many files. Maximum {MAX_FILES_PER_MESSAGE} files allowed.",
+                )
 
-        for file in files:
-            if file.filename:
+            for file in files:
+                if not file.filename:
+                    continue
                 # Validate file
                 if not validate_file(file):
                     raise HTTPException(
@@ -157,30 +188,22 @@ async def send_message_with_files(
                         detail=f"Invalid file type or extension: {file.filename}",
                     )
 
-                # Read file content to check size
-                content = await file.read()
-                if len(content) > MAX_FILE_SIZE:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"File too large: {file.filename}. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
-                    )
-
-                # Reset file pointer
-                await file.seek(0)
-
                 # Sanitize filename
                 safe_filename = sanitize_filename(file.filename)
                 file_extension = os.path.splitext(safe_filename)[1]
                 unique_filename = f"{uuid.uuid4()}{file_extension}"
 
-                # Create uploads directory if it doesn't exist
-                upload_dir = Path("uploads/chat")
-                upload_dir.mkdir(parents=True, exist_ok=True)
-
-                # Save file
-                file_path = upload_dir / unique_filename
-                with open(file_path, "wb") as buffer:
-                    buffer.write(content)
+                # Stream to disk, rejecting the file as soon as it passes the limit
+                try:
+                    stored = await stream_upload_to_path(
+                        file, CHAT_UPLOAD_DIR / unique_filename, MAX_FILE_SIZE
+                    )
+                except FileTooLargeError:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File too large: {file.filename}. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
+                    )
+                stored_paths.append(stored.path)
 
                 public_backend_url = os.getenv("PUBLIC_BACKEND_URL", "").rstrip("/")
                 attachment_url = f"/uploads/chat/{unique_filename}"
@@ -194,7 +217,8 @@ async def send_message_with_files(
                         "file_name": safe_filename,
                         "file_url": attachment_url,
                         "file_type": file.content_type or "application/octet-stream",
-                        "file_size": len(content),
+                        "file_size": stored.size,
+                        "sha256": stored.sha256,
                         "created_at": datetime.now().isoformat(),
                     }
                 )
@@ -205,71 +229,46 @@ async def send_message_with_files(
                     service_request_id_int,
                 )
 
-    # Create the message with proper metadata
-    db_message = ChatMessageORM(
-        service_request_id=service_request_id_int,
-        sender_id=current_user.id,
-        message=sanitized_message,
-        message_type="image" if files else message_type,
-        message_metadata={
-            "attachments": attachments_info,
-            "original_message": sanitized_message,
-        }
-        if attachments_info
-        else None,
-    )
-
-    db.add(db_message)
-
-    # Update response count on service request
-    if current_user.is_provider and service_request.user_id != current_user.id:
-        service_request.responses_count += 1
-
-    db.commit()
-    db.refresh(db_message)
+        # Create the message with proper metadata
+        db_message = ChatMessageORM(
+            service_request_id=service_request_id_int,
+            sender_id=current_user.id,
+            message=sanitized_message,
+            message_type="image" if files else message_type,
+            message_metadata={
+                "attachments": attachments_info,
+                "original_message": sanitized_message,
+            }
+            if attachments_info
+            else None,
+        )
 
-    logger.info("Created chat message with files %s", db_message.id)
-    return ChatMessageRead.model_validate(db_message)
+        db.add(db_message)
 
+        # Update response count on service request
+        if current_user.is_provider and service_request.user_id != current_user.id:
+            service_request.responses_count += 1
 
-@router.post("/messages", response_model=ChatMessageRead)
-async def send_message(
-    message: ChatMessageCreate,
-    db: Session = Depends(get_db),
-    current_user: UserORM = Depends(get_current_user),
-):
-    """Send a message in a service request conversation"""
-    # Verify the service request exists and user has access
-    service_request = (
-        db.query(ServiceRequestORM)
-        .filter(ServiceRequestORM.id == message.service_request_id)
-        .first()
-    )
+        await db.commit()
+    except Exception:
+        # Don't leave the attachments of a message that was not stored behind
+        for path in stored_paths:
+            path.unlink(missing_ok=True)
+        raise
 
-    if not service_request:
-        raise HTTPException(status_code=404, detail="Service request not found")
+    # Relationships cannot lazy-load under AsyncSession, so load the sender
+    # that ChatMessageRead serializes explicitly.
+    await db.refresh(db_message, ["sender"])
 
-    # Industry standard access control: Owner OR Assigned Provider OR Provider who has sent messages
-    is_owner = service_request.user_id == current_user.id
-    is_assigned_provider = service_request.assigned_provider_id == current_user.id
-
-    # For providers, also check if they've sent messages in this conversation
-    has_sent_messages = False
-    if current_user.is_provider and not is_assigned_provider:
-        message_count = (
-            db.query(ChatMessageORM)
-            .filter(
-                ChatMessageORM.service_request_id == message.service_request_id,
-                ChatMessageORM.sender_id == current_user.id,
-            )
-            .count()
-        )
-        has_sent_messages = message_count > 0
+    logger.info("Created chat message with files %s", db_message.id)
+    serialized = ChatMessageRead.model_validate(db_message)
+    hot_messages.append(db_message.service_request_id, serialized)
+    await manager.publish_messages(db_message.service_request_id, [serialized])
+    return serialized
 
-    if not (is_owner or is_assigned_provider or has_sent_messages):
-        raise HTTPException(status_code=403, detail="Access denied")
 
-    # Prepare message metadata
+def _message_metadata(message: ChatMessageCreate) -> Optional[dict]:
+    """Attachments and reply context of a message to create, if it has any"""
     message_metadata = {}
 
     # Handle attachments if present
@@ -295,13 +294,34 @@ async def send_message(
             "message_type": message.reply_to.message_type,
         }
 
+    return message_metadata if message_metadata else None
+
+
+@router.post("/messages", response_model=ChatMessageRead)
+async def send_message(
+    message: ChatMessageCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Send a message in a service request conversation"""
+    # Verify the service request exists and user has access
+    service_request = await db.get(ServiceRequestORM, message.service_request_id)
+
+    if not service_request:
+        raise HTTPException(status_code=404, detail="Service request not found")
+
+    # Owner, assigned provider, or a provider who has already replied
+    if not await is_participant_async(db, current_user.id, message.service_request_id):
+        raise HTTPException(status_code=403, detail="Access denied")
+
     # Create the message
     db_message = ChatMessageORM(
         service_request_id=message.service_request_id,
         sender_id=current_user.id,
         message=message.message,
         message_type=message.message_type,
-        message_metadata=message_metadata if message_metadata else None,
+        message_metadata=_message_metadata(message),
     )
 
     db.add(db_message)
@@ -310,18 +330,194 @@ async def send_message(
     if current_user.is_provider and service_request.user_id != current_user.id:
         service_request.responses_count += 1
 
-    db.commit()
-    db.refresh(db_message)
+    await db.commit()
+    await db.refresh(db_message, ["sender"])
 
     logger.info("Created chat message %s", db_message.id)
 
-    # Send push notification to the other user
-    await send_push_notification_for_message(
-        db_message, service_request, current_user, db
-    )
+    # Notify the other user once the response is sent; the Firebase calls
+    # block, so they run in the threadpool rather than on the event loop
+    try:
+        recipient_id, fcm_tokens = await db.run_sync(
+            _push_recipient_tokens, service_request, current_user
+        )
+    except Exception:
+        logger.exception("Error resolving chat push notification recipients")
+        fcm_tokens = []
+    if fcm_tokens:
+        background_tasks.add_task(
+            _deliver_push_notification,
+            recipient_id,
+            fcm_tokens,
+            service_request.id,
+            current_user.username,
+            db_message.message,
+        )
 
     # Convert to response model with proper serialization
-    return ChatMessageRead.model_validate(db_message)
+    serialized = ChatMessageRead.model_validate(db_message)
+    hot_messages.append(db_message.service_request_id, serialized)
+    await manager.publish_messages(db_message.service_request_id, [serialized])
+    return serialized
+
+
+@router.post("/messages/batch", response_model=ChatMessageBatchRead)
+async def send_message_batch(
+    batch: ChatMessageBatch,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Send messages queued while the client was offline, in one transaction
+
+    Each message carries a client-generated ``client_message_id``. One that
+    is already stored (an earlier attempt whose response was lost) comes back
+    with ``duplicate`` set instead of being written again. The new messages
+    are inserted with a single INSERT ... RETURNING; each conversation then
+    gets one WebSocket frame and at most one push notification, sent after
+    the response.
+    """
+    sender_id = current_user.id
+    sender_username = current_user.username
+    conversation_ids = list(dict.fromkeys(item.service_request_id for item in batch.messages))
+    service_requests = {
+        service_request.id: service_request
+        for service_request in await db.scalars(
+            select(ServiceRequestORM).where(ServiceRequestORM.id.in_(conversation_ids))
+        )
+    }
+    for service_request_id in conversation_ids:
+        if service_request_id not in service_requests:
+            raise HTTPException(status_code=404, detail="Service request not found")
+        if not await is_participant_async(db, sender_id, service_request_id):
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    client_ids = list(dict.fromkeys(item.client_message_id for item in batch.messages))
+    stored_ids = set(
+        await db.scalars(
+            select(ChatMessageORM.client_message_id).where(
+                ChatMessageORM.sender_id == sender_id,
+                ChatMessageORM.client_message_id.in_(client_ids),
+            )
+        )
+    )
+
+    new_messages = []
+    seen = set(stored_ids)
+    for item in batch.messages:
+        if item.client_message_id in seen:
+            continue
+        seen.add(item.client_message_id)
+        new_messages.append(
+            ChatMessageORM(
+                service_request_id=item.service_request_id,
+                sender_id=sender_id,
+                message=item.message,
+                message_type=item.message_type,
+                message_metadata=_message_metadata(item),
+                client_message_id=item.client_message_id,
+            )
+        )
+        service_request = service_requests[item.service_request_id]
+        if current_user.is_provider and service_request.user_id != sender_id:
+            service_request.responses_count += 1
+
+    if new_messages:
+        db.add_all(new_messages)
+        try:
+            # The flush writes all of them as one multi-row INSERT ... RETURNING
+            await db.commit()
+        except IntegrityError:
+            # A concurrent replay of the same queue won; retrying returns
+            # its messages as duplicates
+            await db.rollback()
+            raise HTTPException(
+                status_code=409, detail="Messages are already being submitted"
+            )
+
+    stored = {
+        message.client_message_id: ChatMessageRead.model_validate(message)
+        for message in await db.scalars(
+            select(ChatMessageORM)
+            .options(joinedload(ChatMessageORM.sender))
+            .where(
+                ChatMessageORM.sender_id == sender_id,
+                ChatMessageORM.client_message_id.in_(client_ids),
+            )
+        )
+    }
+
+    results = []
+    created_by_conversation = {}
+    returned = set()
+    for item in batch.messages:
+        message = stored[item.client_message_id]
+        duplicate = item.client_message_id in stored_ids or item.client_message_id in returned
+        returned.add(item.client_message_id)
+        if not duplicate:
+            created_by_conversation.setdefault(message.service_request_id, []).append(message)
+        results.append(
+            ChatMessageBatchResult(
+                client_message_id=item.client_message_id,
+                message=message,
+                duplicate=duplicate,
+            )
+        )
+
+    for service_request_id, messages in created_by_conversation.items():
+        for message in messages:
+            hot_messages.append(service_request_id, message)
+        await manager.broadcast_message(
+            {
+                "type": "new_messages",
+                "service_request_id": service_request_id,
+                "messages": [message.model_dump(mode="json") for message in messages],
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+            service_request_id,
+            exclude_user_id=sender_id,
+        )
+        try:
+            recipient_id, fcm_tokens = await db.run_sync(
+                _push_recipient_tokens, service_requests[service_request_id], current_user
+            )
+        except Exception:
+            logger.exception("Error resolving chat push notification recipients")
+            continue
+        if fcm_tokens:
+            preview = messages[-1].message
+            if len(messages) > 1:
+                preview = f"{len(messages)} new messages: {preview}"
+            background_tasks.add_task(
+                _deliver_push_notification,
+                recipient_id,
+                fcm_tokens,
+                service_request_id,
+                sender_username,
+                preview,
+            )
+
+    logger.info(
+        "Stored %s of %s batched chat messages from user %s",
+        sum(len(messages) for messages in created_by_conversation.values()),
+        len(batch.messages),
+        sender_id,
+    )
+    return ChatMessageBatchRead(results=results)
+
+
+def _require_participant(db: Session, current_user: UserORM, service_request_id: int):
+    """403 unless the user takes part in the conversation, 404 if there is none"""
+    if is_participant(db, current_user.id, service_request_id):
+        return
+    if db.get(ServiceRequestORM, service_request_id) is None:
+        raise HTTPException(status_code=404, detail="Service request not found")
+    logger.warning(
+        "Denied chat access for user %s on service request %s",
+        current_user.id,
+        service_request_id,
+    )
+    raise HTTPException(status_code=403, detail="Access denied")
 
 
 def _get_conversation_data(
@@ -330,71 +526,125 @@ def _get_conversation_data(
     current_user: UserORM,
     limit: int = 50,
     offset: int = 0,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    include_total: bool = False,
 ) -> ChatConversation:
-    """Helper function to get conversation data without FastAPI dependencies"""
-    # Verify the service request exists and user has access
-    service_request = (
-        db.query(ServiceRequestORM)
-        .filter(ServiceRequestORM.id == service_request_id)
-        .first()
-    )
+    """Helper function to get conversation data without FastAPI dependencies
+
+    Pages newest-first by default. ``before_id`` / ``after_id`` are keyset
+    cursors over (created_at, id): they return the page just older / newer
+    than that message, and ``has_more`` reports whether another page exists in
+    the same direction. ``offset`` paging is kept for older clients.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either before_id or after_id, not both"
+        )
+    if (before_id is not None or after_id is not None) and offset:
+        raise HTTPException(
+            status_code=400, detail="Cursor pagination cannot be combined with offset"
+        )
 
-    if not service_request:
-        raise HTTPException(status_code=404, detail="Service request not found")
+    _require_participant(db, current_user, service_request_id)
 
-    # Industry standard access control: Owner OR Assigned Provider OR Provider who has sent messages
-    is_owner = service_request.user_id == current_user.id
-    is_assigned_provider = service_request.assigned_provider_id == current_user.id
-
-    # For providers, also check if they've sent messages in this conversation
-    has_sent_messages = False
-    if current_user.is_provider and not is_assigned_provider:
-        message_count = (
-            db.query(ChatMessageORM)
-            .filter(
-                ChatMessageORM.service_request_id == service_request_id,
-                ChatMessageORM.sender_id == current_user.id,
-            )
-            .count()
+    # Counting a long conversation costs a scan of all its index entries, so
+    # the total is only computed for callers that ask for it.
+    total_messages = None
+    if include_total:
+        total_messages = (
+            db.query(func.count(ChatMessageORM.id))
+            .filter(ChatMessageORM.service_request_id == service_request_id)
+            .scalar()
         )
-        has_sent_messages = message_count > 0
 
-    if not (is_owner or is_assigned_provider or has_sent_messages):
-        logger.warning(
-            "Denied chat access for user %s on service request %s",
-            current_user.id,
-            service_request_id,
+    # The newest page of a busy conversation is usually in the hot buffer
+    newest_page = before_id is None and after_id is None and not offset
+    buffered = hot_messages.newest_page(service_request_id, limit) if newest_page else None
+    if buffered is not None:
+        serialized_messages, has_more = buffered
+        messages = serialized_messages
+    else:
+        messages, serialized_messages, has_more = _read_conversation_page(
+            service_request_id, db, limit, offset, before_id, after_id
         )
-        raise HTTPException(status_code=403, detail="Access denied")
 
-    # Get total message count for pagination info
-    total_messages = (
-        db.query(ChatMessageORM)
-        .filter(ChatMessageORM.service_request_id == service_request_id)
-        .count()
+    # Mark the page as read for the current user by moving their watermark
+    watermarks = conversation_watermarks(db, service_request_id)
+    last_read, last_delivered = watermarks.get(current_user.id, (None, None))
+    unread_count = sum(
+        1
+        for message in messages
+        if message.sender_id != current_user.id and message.id > (last_read or 0)
     )
+    newest_id = max((message.id for message in messages), default=None)
+    if newest_id is not None and newest_id > (last_read or 0):
+        advance_watermarks(db, current_user.id, service_request_id, read_up_to=newest_id)
+        db.commit()
+        watermarks[current_user.id] = (newest_id, max(newest_id, last_delivered or 0))
+    apply_watermarks(serialized_messages, watermarks)
 
-    # Get messages for this service request with pagination
-    messages = (
-        db.query(ChatMessageORM)
-        .filter(ChatMessageORM.service_request_id == service_request_id)
-        .order_by(ChatMessageORM.created_at.desc())  # Get newest messages first
-        .offset(offset)
-        .limit(limit)
-        .all()
+    conversation = ChatConversation(
+        service_request_id=service_request_id,
+        messages=serialized_messages,
+        unread_count=unread_count,
+        total_messages=total_messages,
+        has_more=has_more,
+        current_offset=offset if before_id is None and after_id is None else None,
+        limit=limit,
+        oldest_message_id=messages[0].id if messages else None,
+        newest_message_id=messages[-1].id if messages else None,
     )
 
-    # Reverse to show oldest first in the UI
-    messages = list(reversed(messages))
+    return conversation
+
+
+def _read_conversation_page(
+    service_request_id: int,
+    db: Session,
+    limit: int,
+    offset: int,
+    before_id: Optional[int],
+    after_id: Optional[int],
+):
+    """One page of messages, oldest first: the rows, their serialized form and
+    whether another page exists
 
-    # Mark messages as read for the current user
-    unread_count = 0
-    for message in messages:
-        if message.sender_id != current_user.id and not message.is_read:
-            message.is_read = True
-            unread_count += 1
+    The newest page is handed to the hot buffer for the next reader.
+    """
+    newest_page = before_id is None and after_id is None and not offset
+    seed_token = hot_messages.begin_seed(service_request_id) if newest_page else None
 
-    db.commit()
+    # Fetch one row past the page to learn whether another page exists
+    query = db.query(ChatMessageORM).filter(
+        ChatMessageORM.service_request_id == service_request_id
+    )
+    position = tuple_(ChatMessageORM.created_at, ChatMessageORM.id)
+    if after_id is not None:
+        page = (
+            query.filter(position > _cursor_position(service_request_id, after_id))
+            .order_by(ChatMessageORM.created_at.asc(), ChatMessageORM.id.asc())
+            .limit(limit + 1)
+            .all()
+        )
+        has_more = len(page) > limit
+        messages = page[:limit]
+    else:
+        if before_id is not None:
+            query = query.filter(
+                position < _cursor_position(service_request_id, before_id)
+            )
+        page = (
+            query.order_by(
+                ChatMessageORM.created_at.desc(), ChatMessageORM.id.desc()
+            )  # Get newest messages first
+            .offset(offset)
+            .limit(limit + 1)
+            .all()
+        )
+        has_more = len(page) > limit
+        # Reverse to show oldest first in the UI
+        messages = list(reversed(page[:limit]))
 
     # Convert messages to proper response format
     serialized_messages = []
@@ -406,18 +656,26 @@ def _get_conversation_data(
             logger.exception("Failed to serialize chat message %s", msg.id)
             # Skip this message and continue
             continue
-
-    conversation = ChatConversation(
-        service_request_id=service_request_id,
-        messages=serialized_messages,
-        unread_count=unread_count,
-        total_messages=total_messages,
-        has_more=offset + len(messages) < total_messages,
-        current_offset=offset,
-        limit=limit,
+    if len(serialized_messages) == len(messages):
+        hot_messages.seed(service_request_id, seed_token, serialized_messages, has_more)
+    return messages, serialized_messages, has_more
+
+
+def _cursor_position(service_request_id: int, message_id: int):
+    """(created_at, id) of a cursor message, as a row value for keyset filters
+
+    The anchor is resolved inside the page query, so a cursor costs no extra
+    round trip. A cursor from another conversation matches nothing.
+    """
+    anchor_created_at = (
+        select(ChatMessageORM.created_at)
+        .where(
+            ChatMessageORM.id == message_id,
+            ChatMessageORM.service_request_id == service_request_id,
+        )
+        .scalar_subquery()
     )
-
-    return conversation
+    return tuple_(anchor_created_at, message_id)
 
 
 @router.get("/conversations/{service_request_id}", response_model=ChatConversation)
@@ -425,74 +683,211 @@ def get_conversation(
     service_request_id: int,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, ge=1),
+    after_id: Optional[int] = Query(None, ge=1),
+    include_total: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: UserORM = Depends(get_current_user),
 ):
-    """Get conversation for a service request with pagination"""
-    return _get_conversation_data(service_request_id, db, current_user, limit, offset)
+    """Get conversation for a service request with pagination
+
+    Pass the returned ``oldest_message_id`` as ``before_id`` to load older
+    history, or ``newest_message_id`` as ``after_id`` to catch up on newer
+    messages.
+    """
+    return _get_conversation_data(
+        service_request_id,
+        db,
+        current_user,
+        limit,
+        offset,
+        before_id=before_id,
+        after_id=after_id,
+        include_total=include_total,
+    )
 
 
-@router.get("/my-conversations", response_model=List[ChatConversation])
-def get_my_conversations(
-    db: Session = Depends(get_db), current_user: UserORM = Depends(get_current_user)
-):
-    """Get all conversations for the current user"""
-    conversations = []
-
-    if current_user.is_provider:
-        # For providers, get conversations where they are assigned OR have sent messages
-        # First, get service requests where they are assigned
-        assigned_requests = (
-            db.query(ServiceRequestORM.id)
-            .filter(ServiceRequestORM.assigned_provider_id == current_user.id)
-            .all()
+def _encode_inbox_cursor(last_activity_at: datetime, service_request_id: int) -> str:
+    raw = f"{last_activity_at.isoformat()}|{service_request_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_inbox_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_activity_at, service_request_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(last_activity_at), int(service_request_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _participant_filter(current_user: UserORM):
+    """WHERE clause on ServiceRequestORM matching the user's conversations"""
+    return ServiceRequestORM.id.in_(participant_conversation_ids(current_user.id))
+
+
+def _get_inbox_data(
+    db: Session,
+    current_user: UserORM,
+    limit: Optional[int] = 50,
+    cursor: Optional[str] = None,
+) -> ChatInbox:
+    """One row per conversation, newest activity first, in a single query
+
+    The latest message and the unread count are correlated subqueries per
+    conversation, resolved from the chat_messages indexes and the read
+    watermark, and the latest message is joined back with its sender. A
+    conversation without messages reports its creation time as activity.
+    """
+    participant = _participant_filter(current_user)
+
+    last_message_id = (
+        select(ChatMessageORM.id)
+        .where(ChatMessageORM.service_request_id == ServiceRequestORM.id)
+        .order_by(ChatMessageORM.created_at.desc(), ChatMessageORM.id.desc())
+        .limit(1)
+        .correlate(ServiceRequestORM)
+        .scalar_subquery()
+    )
+    unread_count = (
+        select(func.count(ChatMessageORM.id))
+        .where(*unread_message_filters(current_user.id, ServiceRequestORM.id))
+        .correlate(ServiceRequestORM)
+        .scalar_subquery()
+    )
+    conversations = (
+        select(
+            ServiceRequestORM.id.label("service_request_id"),
+            ServiceRequestORM.created_at.label("opened_at"),
+            last_message_id.label("last_message_id"),
+            unread_count.label("unread_count"),
         )
-        assigned_ids = [req_id[0] for req_id in assigned_requests]
+        .where(participant)
+        .subquery()
+    )
 
-        # Then, get service requests where they've sent messages (but aren't assigned)
-        message_requests = (
-            db.query(ChatMessageORM.service_request_id)
-            .filter(ChatMessageORM.sender_id == current_user.id)
-            .distinct()
-            .all()
+    last_activity_at = func.coalesce(
+        ChatMessageORM.created_at, conversations.c.opened_at
+    )
+    statement = (
+        select(
+            conversations.c.service_request_id,
+            conversations.c.unread_count,
+            last_activity_at.label("last_activity_at"),
+            ChatMessageORM,
         )
-        message_ids = [req_id[0] for req_id in message_requests]
+        .outerjoin(
+            ChatMessageORM, ChatMessageORM.id == conversations.c.last_message_id
+        )
+        .options(joinedload(ChatMessageORM.sender))
+        .order_by(last_activity_at.desc(), conversations.c.service_request_id.desc())
+    )
+    if cursor:
+        statement = statement.where(
+            tuple_(last_activity_at, conversations.c.service_request_id)
+            < tuple_(*_decode_inbox_cursor(cursor))
+        )
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+
+    rows = db.execute(statement).all()
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if limit is not None else rows
+
+    entries = [
+        ChatInboxEntry(
+            service_request_id=row.service_request_id,
+            last_message=ChatMessageRead.model_validate(row.ChatMessageORM)
+            if row.ChatMessageORM is not None
+            else None,
+            last_activity_at=row.last_activity_at,
+            unread_count=row.unread_count,
+        )
+        for row in rows
+    ]
+    next_cursor = None
+    if has_more:
+        next_cursor = _encode_inbox_cursor(
+            rows[-1].last_activity_at, rows[-1].service_request_id
+        )
+    return ChatInbox(conversations=entries, has_more=has_more, next_cursor=next_cursor)
 
-        # Combine both lists and remove duplicates
-        service_request_ids = list(set(assigned_ids + message_ids))
 
-    else:
-        # For regular users, get their service requests (regardless of messages)
-        service_request_ids = (
-            db.query(ServiceRequestORM.id)
-            .filter(ServiceRequestORM.user_id == current_user.id)
-            .all()
+@router.get("/inbox", response_model=ChatInbox)
+def get_inbox(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Conversations of the current user, most recent activity first"""
+    return _get_inbox_data(db, current_user, limit, cursor)
+
+
+@router.get("/search", response_model=ChatSearchResults)
+def search_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Full-text search over the messages of the current user's conversations"""
+    try:
+        return search_chat_messages(
+            db, _participant_filter(current_user), q, limit, cursor
         )
-        service_request_ids = [req_id[0] for req_id in service_request_ids]
+    except InvalidSearchCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # Create conversations for each service request
-    for request_id in service_request_ids:
-        try:
-            conversation = _get_conversation_data(request_id, db, current_user)
-            conversations.append(conversation)
-        except HTTPException as e:
-            # Skip conversations user doesn't have access to
-            if e.status_code == 403:
-                continue
-            raise e
 
-    # Sort conversations by last message time (most recent first)
-    def get_last_message_time(conversation):
-        if not conversation.messages:
-            # Return a very old datetime for conversations with no messages
-            from datetime import datetime
-            return datetime(1970, 1, 1)
-        # Get the most recent message (last in the list since messages are sorted by created_at desc)
-        return conversation.messages[-1].created_at
+@router.get("/sync", response_model=ChatSync)
+def sync_changes(
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(200, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """New messages and read / delivered changes since the ``since`` cursor.
+
+    Without ``since`` no changes are returned, only the current cursor: load
+    conversations normally, then poll from there. Poll again with the
+    returned cursor (and If-None-Match) until ``has_more`` is false.
+    """
+    if since is None:
+        sync = ChatSync(
+            changes=[], cursor=latest_cursor(db, current_user.id), has_more=False
+        )
+    else:
+        sync = get_changes(db, current_user.id, since, limit)
 
-    conversations.sort(key=get_last_message_time, reverse=True)
+    etag = f'"sync-{current_user.id}-{since}-{sync.cursor}-{limit}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return sync
 
-    return conversations
+
+@router.get("/my-conversations", response_model=List[ChatConversation])
+def get_my_conversations(
+    db: Session = Depends(get_db), current_user: UserORM = Depends(get_current_user)
+):
+    """Get all conversations for the current user, each with its newest page
+
+    Like opening each conversation, this marks the pages read and costs a
+    page read per conversation. List views that only need the latest message
+    and unread count should use /chat/inbox.
+    """
+    inbox = _get_inbox_data(db, current_user, limit=None)
+    return [
+        _get_conversation_data(
+            entry.service_request_id, db, current_user, include_total=True
+        )
+        for entry in inbox.conversations
+    ]
 
 
 @router.put("/messages/{message_id}/delivered")
@@ -507,27 +902,15 @@ def mark_message_delivered(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Check if user has access to this message
-    service_request = (
-        db.query(ServiceRequestORM)
-        .filter(ServiceRequestORM.id == message.service_request_id)
-        .first()
-    )
-
-    if not service_request:
-        raise HTTPException(status_code=404, detail="Service request not found")
-
-    # Industry standard access control: Owner OR Assigned Provider
-    is_owner = service_request.user_id == current_user.id
-    is_assigned_provider = service_request.assigned_provider_id == current_user.id
+    _require_participant(db, current_user, message.service_request_id)
 
-    if not (is_owner or is_assigned_provider):
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    # Only mark as delivered if not already read
-    if message.delivery_status != "read":
-        message.delivery_status = "delivered"
-        message.delivered_at = datetime.utcnow()
+    if message.sender_id != current_user.id:
+        advance_watermarks(
+            db,
+            current_user.id,
+            message.service_request_id,
+            delivered_up_to=message.id,
+        )
         db.commit()
 
     return {"message": "Message marked as delivered"}
@@ -545,30 +928,45 @@ def mark_message_read(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Check if user has access to this message
-    service_request = (
-        db.query(ServiceRequestORM)
-        .filter(ServiceRequestORM.id == message.service_request_id)
-        .first()
-    )
+    _require_participant(db, current_user, message.service_request_id)
 
-    if not service_request:
-        raise HTTPException(status_code=404, detail="Service request not found")
+    if message.sender_id != current_user.id:
+        advance_watermarks(
+            db, current_user.id, message.service_request_id, read_up_to=message.id
+        )
+        db.commit()
 
-    # Industry standard access control: Owner OR Assigned Provider
-    is_owner = service_request.user_id == current_user.id
-    is_assigned_provider = service_request.assigned_provider_id == current_user.id
+    return {"message": "Message marked as read"}
 
-    if not (is_owner or is_assigned_provider):
-        raise HTTPException(status_code=403, detail="Access denied")
 
-    # Update read status
-    message.is_read = True
-    message.delivery_status = "read"
-    message.read_at = datetime.utcnow()
-    db.commit()
+@router.put("/conversations/{service_request_id}/read")
+def mark_conversation_read(
+    service_request_id: int,
+    up_to: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Mark every message up to ``up_to`` (default: the latest) as read"""
+    _require_participant(db, current_user, service_request_id)
 
-    return {"message": "Message marked as read"}
+    latest_id = db.scalar(
+        select(func.max(ChatMessageORM.id)).where(
+            ChatMessageORM.service_request_id == service_request_id
+        )
+    )
+    # Clamp so a client cannot pre-mark messages that do not exist yet
+    read_up_to = min(up_to or latest_id or 0, latest_id or 0)
+    if read_up_to:
+        advance_watermarks(
+            db, current_user.id, service_request_id, read_up_to=read_up_to
+        )
+        db.commit()
+
+    return {
+        "service_request_id": service_request_id,
+        "read_up_to": read_up_to or None,
+        "unread_count": count_unread(db, current_user.id, service_request_id),
+    }
 
 
 async def send_push_notification_for_message(
@@ -579,57 +977,74 @@ async def send_push_notification_for_message(
 ):
     """Send push notification for a new chat message"""
     try:
-        # Determine the recipient (the other user in the conversation)
-        recipient_id = None
-        if service_request.user_id == sender.id:
-            # Sender is the owner, notify the assigned provider
-            recipient_id = service_request.assigned_provider_id
-        elif service_request.assigned_provider_id == sender.id:
-            # Sender is the provider, notify the owner
-            recipient_id = service_request.user_id
-
-        if not recipient_id:
-            logger.debug(
-                "Skipping push notification because no recipient was resolved for service request %s",
-                service_request.id,
-            )
-            return
+        recipient_id, fcm_tokens = _push_recipient_tokens(db, service_request, sender)
+        _deliver_push_notification(
+            recipient_id, fcm_tokens, service_request.id, sender.username, message.message
+        )
+    except Exception as e:
+        logger.exception("Error sending chat push notification")
 
-        # Get recipient's FCM tokens
-        fcm_tokens = (
-            db.query(FCMTokenORM)
-            .filter(
-                FCMTokenORM.user_id == recipient_id, FCMTokenORM.is_active == "true"
-            )
-            .all()
+
+def _push_recipient_tokens(
+    db: Session, service_request: ServiceRequestORM, sender: UserORM
+):
+    """(recipient id, their active FCM tokens) for a message from ``sender``"""
+    # Determine the recipient (the other user in the conversation)
+    recipient_id = None
+    if service_request.user_id == sender.id:
+        # Sender is the owner, notify the assigned provider
+        recipient_id = service_request.assigned_provider_id
+    elif service_request.assigned_provider_id == sender.id:
+        # Sender is the provider, notify the owner
+        recipient_id = service_request.user_id
+
+    if not recipient_id:
+        logger.debug(
+            "Skipping push notification because no recipient was resolved for service request %s",
+            service_request.id,
         )
+        return None, []
 
-        if not fcm_tokens:
-            logger.debug("No active FCM tokens found for user %s", recipient_id)
-            return
+    # Get recipient's FCM tokens
+    fcm_tokens = (
+        db.query(FCMTokenORM)
+        .filter(
+            FCMTokenORM.user_id == recipient_id, FCMTokenORM.is_active == "true"
+        )
+        .all()
+    )
 
-        # Prepare message preview
-        message_preview = message.message
-        if len(message_preview) > 100:
-            message_preview = message_preview[:100] + "..."
+    if not fcm_tokens:
+        logger.debug("No active FCM tokens found for user %s", recipient_id)
+    return recipient_id, [fcm_token.token for fcm_token in fcm_tokens]
 
-        # Send notification to each token
-        for fcm_token in fcm_tokens:
-            success = firebase_admin_service.send_chat_notification(
-                fcm_token=fcm_token.token,
-                service_request_id=service_request.id,
-                sender_username=sender.username,
-                message_preview=message_preview,
-                notification_type="new_message",
-            )
 
-            if success:
-                logger.info("Sent chat push notification to user %s", recipient_id)
-            else:
-                logger.warning(
-                    "Failed to send chat push notification to user %s",
-                    recipient_id,
-                )
+def _deliver_push_notification(
+    recipient_id: Optional[int],
+    fcm_tokens: List[str],
+    service_request_id: int,
+    sender_username: str,
+    message_preview: str,
+):
+    """Send the notification to each of the recipient's devices; needs no session"""
+    # Prepare message preview
+    if len(message_preview) > 100:
+        message_preview = message_preview[:100] + "..."
+
+    # Send notification to each token
+    for fcm_token in fcm_tokens:
+        success = firebase_admin_service.send_chat_notification(
+            fcm_token=fcm_token,
+            service_request_id=service_request_id,
+            sender_username=sender_username,
+            message_preview=message_preview,
+            notification_type="new_message",
+        )
 
-    except Exception as e:
-        logger.exception("Error sending chat push notification")
+        if success:
+            logger.info("Sent chat push notification to user %s", recipient_id)
+        else:
+            logger.warning(
+                "Failed to send chat push notification to user %s",
+                recipient_id,
+            )
@@ -3,10 +3,12 @@ import uuid
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies.auth import get_current_user
-from app.dependencies.db import get_db
+from app.dependencies.db import get_async_db
 from app.models import PetORM, TaskORM, UserORM, json_to_list, list_to_json
 from app.utils.file_upload import save_upload_file
 from config import IMAGES_DIR
@@ -38,14 +40,12 @@ def _relative_upload_path(filename: str) -> str:
 async def upload_pet_image(
     pet_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Upload a pet image."""
-    pet = (
-        db.query(PetORM)
-        .filter(PetORM.id == pet_id, PetORM.user_id == current_user.id)
-        .first()
+    pet = await db.scalar(
+        select(PetORM).where(PetORM.id == pet_id, PetORM.user_id == current_user.id)
     )
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found")
@@ -57,10 +57,10 @@ async def upload_pet_image(
     filename = f"pet_{pet_id}_{uuid.uuid4()}{file_extension}"
     file_path = IMAGES_DIR / filename
 
-    save_upload_file(file, str(file_path))
+    await run_in_threadpool(save_upload_file, file, str(file_path))
 
     pet.photo_uri = _relative_upload_path(filename)
-    db.commit()
+    await db.commit()
 
     return {"message": "Image uploaded successfully", "file_path": pet.photo_uri}
 
@@ -69,14 +69,12 @@ async def upload_pet_image(
 async def upload_task_attachment(
     task_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Upload a task attachment."""
-    task = (
-        db.query(TaskORM)
-        .filter(TaskORM.id == task_id, TaskORM.user_id == current_user.id)
-        .first()
+    task = await db.scalar(
+        select(TaskORM).where(TaskORM.id == task_id, TaskORM.user_id == current_user.id)
     )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -88,12 +86,12 @@ async def upload_task_attachment(
     filename = f"task_{task_id}_{uuid.uuid4()}{file_extension}"
     file_path = IMAGES_DIR / filename
 
-    save_upload_file(file, str(file_path))
+    await run_in_threadpool(save_upload_file, file, str(file_path))
 
     current_attachments = json_to_list(task.attachments)
     current_attachments.append(_relative_upload_path(filename))
     task.attachments = list_to_json(current_attachments)
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Attachment uploaded successfully",
@@ -105,7 +103,7 @@ async def upload_task_attachment(
 @router.post("/profile-image/")
 async def upload_profile_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Upload a user profile image."""
@@ -118,18 +116,20 @@ async def upload_profile_image(
         filename = f"user_{current_user.id}_{uuid.uuid4()}{file_extension}"
         file_path = IMAGES_DIR / filename
 
-        save_upload_file(file, str(file_path))
+        await run_in_threadpool(save_upload_file, file, str(file_path))
 
-        current_user.profile_image = _relative_upload_path(filename)
-        db.commit()
-        db.refresh(current_user)
+        # current_user belongs to the auth dependency's session; update the
+        # row through this request's async session instead.
+        user = await db.get(UserORM, current_user.id)
+        user.profile_image = _relative_upload_path(filename)
+        await db.commit()
 
         return {
             "message": "Profile image uploaded successfully",
-            "profile_image": current_user.profile_image,
+            "profile_image": user.profile_image,
         }
     except Exception:
-        db.rollback()
+        await db.rollback()
         logger.exception("Failed to upload profile image for user %s", current_user.id)
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -137,11 +137,9 @@ async def upload_profile_image(
 @router.post("/chat-attachment")
 async def upload_chat_attachment(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Upload a chat attachment image."""
-    del db
     _validate_image_upload(file)
 
     try:
@@ -151,7 +149,7 @@ async def upload_chat_attachment(
         filename = f"chat_{current_user.id}_{uuid.uuid4()}{file_extension}"
         file_path = IMAGES_DIR / filename
 
-        save_upload_file(file, str(file_path))
+        await run_in_threadpool(save_upload_file, file, str(file_path))
         file_url = _relative_upload_path(filename)
 
         return {
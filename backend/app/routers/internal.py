@@ -0,0 +1,113 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.auth.user_cache import user_cache
+from app.services.chat_hot_buffer import hot_messages
+from app.services.conversation_participants import membership_cache
+from app.services.message_routes import message_routes
+from app.utils.pool_metrics import pool_metrics_snapshot
+from app.websocket.chat_router import typing_tracker
+from app.websocket.connection_manager import manager
+from app.websocket.message_writer import message_writer
+from config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    ENVIRONMENT,
+    INTERNAL_METRICS_TOKEN,
+)
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+def require_internal_access(x_internal_token: Optional[str] = Header(None)):
+    """Gate /internal/* behind INTERNAL_METRICS_TOKEN (or non-production)"""
+    if INTERNAL_METRICS_TOKEN:
+        if not secrets.compare_digest(x_internal_token or "", INTERNAL_METRICS_TOKEN):
+            raise HTTPException(status_code=403, detail="Invalid internal token")
+        return
+    if ENVIRONMENT == "production" or os.getenv("RAILWAY_ENVIRONMENT"):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/db-pool", dependencies=[Depends(require_internal_access)])
+def get_db_pool_metrics():
+    """Live connection pool usage and checkout wait-time histograms"""
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+        },
+        "pools": pool_metrics_snapshot(),
+    }
+
+
+@router.get("/auth-cache", dependencies=[Depends(require_internal_access)])
+def get_auth_cache_metrics():
+    """Hit/miss counters and occupancy of the authenticated-user cache"""
+    return user_cache.stats()
+
+
+@router.get("/chat-membership-cache", dependencies=[Depends(require_internal_access)])
+def get_chat_membership_cache_metrics():
+    """Hit/miss counters and occupancy of the conversation membership cache"""
+    return membership_cache.stats()
+
+
+@router.get("/chat-hot-buffer", dependencies=[Depends(require_internal_access)])
+def get_chat_hot_buffer_metrics():
+    """Hit rate, occupancy and evictions of the hot conversation message buffer"""
+    return hot_messages.stats()
+
+
+@router.get("/chat-ws-send-queues", dependencies=[Depends(require_internal_access)])
+def get_chat_ws_send_queue_metrics():
+    """Outbound queue depth, drops and send latency of this node's chat sockets"""
+    return manager.send_queue_stats()
+
+
+@router.get("/chat-backplane", dependencies=[Depends(require_internal_access)])
+def get_chat_backplane_metrics():
+    """Which backplane carries chat events between workers, and its counters"""
+    return manager.backplane.stats()
+
+
+@router.get("/chat-message-writer", dependencies=[Depends(require_internal_access)])
+def get_chat_message_writer_metrics():
+    """Queue length and group-commit batch sizes of WebSocket message writes"""
+    return message_writer.stats()
+
+
+@router.get("/chat-typing", dependencies=[Depends(require_internal_access)])
+def get_chat_typing_metrics():
+    """Typing frames received against start/stop transitions fanned out"""
+    return typing_tracker.stats()
+
+
+@router.get("/chat-message-status", dependencies=[Depends(require_internal_access)])
+def get_chat_message_status_metrics():
+    """Message route cache hit rate and status events per broadcast frame"""
+    return {
+        "routes": message_routes.stats(),
+        "batches": manager.status_batcher.stats(),
+    }
+
+
+@router.get("/chat-replay", dependencies=[Depends(require_internal_access)])
+def get_chat_replay_metrics():
+    """Replay log size and how reconnecting sockets were resumed"""
+    return manager.replay_log.stats()
+
+
+@router.get("/chat-presence", dependencies=[Depends(require_internal_access)])
+def get_chat_presence_metrics():
+    """Sockets tracked by heartbeat and how many were closed as stale"""
+    return manager.presence.stats()
@@ -9,6 +9,7 @@ from app.models import (
 from app.schemas import LocationHistoryRead, LocationHistoryUpdate
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/gps", tags=["gps"])
 
@@ -47,8 +48,7 @@ def update_pet_location(
     pet.lastKnownLongitude = location.longitude
     pet.lastLocationUpdate = location.timestamp
 
-    db.commit()
-    db.refresh(db_location)
+    commit_fresh(db, db_location)
 
     return LocationHistoryRead.model_validate(db_location)
 
@@ -15,6 +15,7 @@ from app.schemas.medical_record import (
 )
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 from datetime import date
 
 router = APIRouter(prefix="/medical-records", tags=["medical-records"])
@@ -96,8 +97,7 @@ def create_medical_record(
         is_completed=record.is_completed,
     )
     db.add(db_record)
-    db.commit()
-    db.refresh(db_record)
+    commit_fresh(db, db_record)
     return MedicalRecordRead.model_validate(db_record)
 
 
@@ -132,8 +132,7 @@ def update_medical_record(
     db_record.notes = record.notes
     db_record.is_completed = record.is_completed
 
-    db.commit()
-    db.refresh(db_record)
+    commit_fresh(db, db_record)
     return MedicalRecordRead.model_validate(db_record)
 
 
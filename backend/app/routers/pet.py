@@ -13,6 +13,7 @@ from app.models.weight_record import WeightRecordORM
 from app.schemas.pet import PetCreate, PetRead, PetUpdate
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/pets", tags=["pets"])
 
@@ -91,8 +92,7 @@ def create_pet(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating pet: {str(e)}")
     db.add(db_pet)
-    db.commit()
-    db.refresh(db_pet)
+    commit_fresh(db, db_pet)
     return PetRead.model_validate(db_pet)
 
 
@@ -137,8 +137,7 @@ def update_pet(
             )
         )
 
-    db.commit()
-    db.refresh(db_pet)
+    commit_fresh(db, db_pet)
 
     return PetRead.model_validate(db_pet)
 
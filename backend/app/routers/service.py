@@ -6,6 +6,7 @@ from app.schemas import ServiceCreate, ServiceRead, ServiceUpdate
 from app.schemas.service_type import ServiceTypeRead as ServiceTypeSchema
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/service_booking", tags=["service_booking"])
 
@@ -97,8 +98,7 @@ def create_service(
     db_service = ServiceORM(user_id=current_user.id, **service.model_dump())
 
     db.add(db_service)
-    db.commit()
-    db.refresh(db_service)
+    commit_fresh(db, db_service)
 
     return ServiceRead.model_validate(db_service)
 
@@ -126,8 +126,7 @@ def update_service(
     for field, value in service_update.model_dump(exclude_unset=True).items():
         setattr(db_service, field, value)
 
-    db.commit()
-    db.refresh(db_service)
+    commit_fresh(db, db_service)
 
     return ServiceRead.model_validate(db_service)
 
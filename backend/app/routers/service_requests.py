@@ -15,6 +15,7 @@ from app.schemas import (
     ServiceRequestSummary,
 )
 from app.services.service_matching import ServiceMatchingService
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/service-requests", tags=["service-requests"])
 logger = logging.getLogger(__name__)
@@ -66,8 +67,7 @@ def create_service_request(
     db_request = ServiceRequestORM(user_id=current_user.id, **request.dict())
 
     db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
+    commit_fresh(db, db_request)
 
     return db_request
 
@@ -284,8 +284,7 @@ def assign_provider(
     request.assigned_provider_id = provider_id
     request.status = "in_progress"
 
-    db.commit()
-    db.refresh(request)
+    commit_fresh(db, request)
 
     logger.info("Assigned provider to service request %s", request_id)
 
@@ -315,8 +314,7 @@ def update_service_request(
     for field, value in request_update.dict(exclude_unset=True).items():
         setattr(request, field, value)
 
-    db.commit()
-    db.refresh(request)
+    commit_fresh(db, request)
 
     return request
 
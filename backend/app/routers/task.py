@@ -8,6 +8,7 @@ from app.models import (
 from app.schemas import TaskCreate, TaskRead, TaskUpdate
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/task", tags=["task"])
 
@@ -43,8 +44,7 @@ def create_task(
         is_completed=task.is_completed or False,
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    commit_fresh(db, db_task)
     return TaskRead.model_validate(db_task)
 
 
@@ -105,8 +105,7 @@ def update_task(
     if task.is_completed is not None:
         db_task.is_completed = task.is_completed
 
-    db.commit()
-    db.refresh(db_task)
+    commit_fresh(db, db_task)
     return TaskRead.model_validate(db_task)
 
 
@@ -16,6 +16,7 @@ from app.schemas.vaccination import (
 )
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
+from app.utils.db_writes import commit_fresh
 from datetime import date, timedelta
 
 router = APIRouter(prefix="/vaccinations", tags=["vaccinations"])
@@ -93,8 +94,7 @@ def create_vaccination(
         reminder_sent=vaccination.reminder_sent,
     )
     db.add(db_vaccination)
-    db.commit()
-    db.refresh(db_vaccination)
+    commit_fresh(db, db_vaccination)
     return VaccinationResponse.model_validate(db_vaccination)
 
 
@@ -130,8 +130,7 @@ def update_vaccination(
     db_vaccination.is_completed = vaccination.is_completed
     db_vaccination.reminder_sent = vaccination.reminder_sent
 
-    db.commit()
-    db.refresh(db_vaccination)
+    commit_fresh(db, db_vaccination)
     return VaccinationResponse.model_validate(db_vaccination)
 
 
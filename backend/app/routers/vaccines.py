@@ -14,6 +14,7 @@ from ..schemas.vaccination import (
     VaccinationListResponse,
 )
 from ..auth import get_current_user
+from ..utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/vaccines", tags=["vaccines"])
 logger = logging.getLogger(__name__)
@@ -174,8 +175,7 @@ async def create_vaccination(
         )
 
         db.add(vaccination)
-        db.commit()
-        db.refresh(vaccination)
+        commit_fresh(db, vaccination)
 
         logger.info(f"Created vaccination {vaccination.id} for pet {pet_id}")
         return VaccinationResponse.from_orm(vaccination)
@@ -217,8 +217,7 @@ async def update_vaccination(
 
         vaccination.updated_at = datetime.utcnow()
 
-        db.commit()
-        db.refresh(vaccination)
+        commit_fresh(db, vaccination)
 
         logger.info(f"Updated vaccination {vaccination_id}")
         return VaccinationResponse.model_validate(vaccination)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.dependencies.db import get_db
+from app.dependencies.db import get_async_db
 from app.models.weight_goal import WeightGoalORM
 from app.models.pet import PetORM
 from app.schemas.weight_goal import (
@@ -14,13 +15,14 @@ from app.schemas.weight_goal import (
 )
 from app.dependencies.auth import get_current_user
 from app.models.user import UserORM
+from app.utils.db_writes import commit_fresh
 
 router = APIRouter(prefix="/api/weight-goals", tags=["Weight Goals"])
 
 
 @router.get("/", response_model=List[WeightGoalWithPet])
 async def get_all_weight_goals(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
     limit: Optional[int] = 100,
     offset: Optional[int] = 0,
@@ -28,7 +30,9 @@ async def get_all_weight_goals(
     """Get all weight goals for the current user's pets"""
     try:
         # Get all pets owned by the current user
-        user_pets = db.query(PetORM).filter(PetORM.user_id == current_user.id).all()
+        user_pets = (
+            await db.scalars(select(PetORM).where(PetORM.user_id == current_user.id))
+        ).all()
         pet_ids = [pet.id for pet in user_pets]
 
         if not pet_ids:
@@ -36,13 +40,14 @@ async def get_all_weight_goals(
 
         # Get weight goals for user's pets
         weight_goals = (
-            db.query(WeightGoalORM)
-            .filter(WeightGoalORM.pet_id.in_(pet_ids))
-            .order_by(WeightGoalORM.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
-        )
+            await db.scalars(
+                select(WeightGoalORM)
+                .where(WeightGoalORM.pet_id.in_(pet_ids))
+                .order_by(WeightGoalORM.created_at.desc())
+                .limit(limit)
+                .offset(offset)
+            )
+        ).all()
 
         # Convert to response format with pet information
         result = []
@@ -77,16 +82,14 @@ async def get_all_weight_goals(
 @router.get("/pet/{pet_id}/", response_model=List[WeightGoalResponse])
 async def get_weight_goals_by_pet(
     pet_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Get weight goals for a specific pet"""
     try:
         # Verify the pet belongs to the current user
-        pet = (
-            db.query(PetORM)
-            .filter(PetORM.id == pet_id, PetORM.user_id == current_user.id)
-            .first()
+        pet = await db.scalar(
+            select(PetORM).where(PetORM.id == pet_id, PetORM.user_id == current_user.id)
         )
 
         if not pet:
@@ -97,11 +100,12 @@ async def get_weight_goals_by_pet(
 
         # Get weight goals for the pet
         weight_goals = (
-            db.query(WeightGoalORM)
-            .filter(WeightGoalORM.pet_id == pet_id)
-            .order_by(WeightGoalORM.created_at.desc())
-            .all()
-        )
+            await db.scalars(
+                select(WeightGoalORM)
+                .where(WeightGoalORM.pet_id == pet_id)
+                .order_by(WeightGoalORM.created_at.desc())
+            )
+        ).all()
 
         return weight_goals
     except HTTPException:
@@ -118,16 +122,16 @@ async def get_weight_goals_by_pet(
 )
 async def create_weight_goal(
     weight_goal: WeightGoalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Create a new weight goal"""
     try:
         # Verify the pet belongs to the current user
-        pet = (
-            db.query(PetORM)
-            .filter(PetORM.id == weight_goal.pet_id, PetORM.user_id == current_user.id)
-            .first()
+        pet = await db.scalar(
+            select(PetORM).where(
+                PetORM.id == weight_goal.pet_id, PetORM.user_id == current_user.id
+            )
         )
 
         if not pet:
@@ -148,14 +152,13 @@ async def create_weight_goal(
         )
 
         db.add(db_weight_goal)
-        db.commit()
-        db.refresh(db_weight_goal)
+        await db.run_sync(commit_fresh, db_weight_goal)
 
         return db_weight_goal
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create weight goal: {str(e)}",
@@ -166,15 +169,13 @@ async def create_weight_goal(
 async def update_weight_goal(
     goal_id: int,
     weight_goal_update: WeightGoalUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Update an existing weight goal"""
     try:
         # Get the weight goal and verify ownership
-        db_weight_goal = (
-            db.query(WeightGoalORM).filter(WeightGoalORM.id == goal_id).first()
-        )
+        db_weight_goal = await db.get(WeightGoalORM, goal_id)
 
         if not db_weight_goal:
             raise HTTPException(
@@ -182,12 +183,10 @@ async def update_weight_goal(
             )
 
         # Verify the pet belongs to the current user
-        pet = (
-            db.query(PetORM)
-            .filter(
+        pet = await db.scalar(
+            select(PetORM).where(
                 PetORM.id == db_weight_goal.pet_id, PetORM.user_id == current_user.id
             )
-            .first()
         )
 
         if not pet:
@@ -201,12 +200,10 @@ async def update_weight_goal(
         
         # If pet_id is being updated, verify the new pet belongs to the current user
         if 'pet_id' in update_data:
-            new_pet = (
-                db.query(PetORM)
-                .filter(
+            new_pet = await db.scalar(
+                select(PetORM).where(
                     PetORM.id == update_data['pet_id'], PetORM.user_id == current_user.id
                 )
-                .first()
             )
             if not new_pet:
                 raise HTTPException(
@@ -218,14 +215,13 @@ async def update_weight_goal(
             setattr(db_weight_goal, field, value)
 
         db_weight_goal.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_weight_goal)
+        await db.run_sync(commit_fresh, db_weight_goal)
 
         return db_weight_goal
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update weight goal: {str(e)}",
@@ -235,15 +231,13 @@ async def update_weight_goal(
 @router.delete("/{goal_id}/", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_weight_goal(
     goal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Delete a weight goal"""
     try:
         # Get the weight goal and verify ownership
-        db_weight_goal = (
-            db.query(WeightGoalORM).filter(WeightGoalORM.id == goal_id).first()
-        )
+        db_weight_goal = await db.get(WeightGoalORM, goal_id)
 
         if not db_weight_goal:
             raise HTTPException(
@@ -251,12 +245,10 @@ async def delete_weight_goal(
             )
 
         # Verify the pet belongs to the current user
-        pet = (
-            db.query(PetORM)
-            .filter(
+        pet = await db.scalar(
+            select(PetORM).where(
                 PetORM.id == db_weight_goal.pet_id, PetORM.user_id == current_user.id
             )
-            .first()
         )
 
         if not pet:
@@ -266,14 +258,14 @@ async def delete_weight_goal(
             )
 
         # Delete the weight goal
-        db.delete(db_weight_goal)
-        db.commit()
+        await db.delete(db_weight_goal)
+        await db.commit()
 
         return None
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete weight goal: {str(e)}",
@@ -3,11 +3,12 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .pet import PetORM
 from app.dependencies.auth import get_current_user
-from app.dependencies.db import get_db
+from app.dependencies.db import get_async_db
 from app.models.user import UserORM
 from app.models.weight_record import WeightRecordORM
 from app.schemas.weight_record import (
@@ -16,6 +17,7 @@ from app.schemas.weight_record import (
     WeightRecordUpdate,
     WeightRecordWithPet,
 )
+from app.utils.db_writes import commit_fresh
 
 logger = logging.getLogger(__name__)
 
@@ -24,27 +26,30 @@ router = APIRouter(prefix="/api/weight-records", tags=["Weight Records"])
 
 @router.get("/", response_model=List[WeightRecordWithPet])
 async def get_all_weight_records(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
     limit: Optional[int] = 100,
     offset: Optional[int] = 0,
 ):
     """Get all weight records for the current user's pets."""
     try:
-        user_pets = db.query(PetORM).filter(PetORM.user_id == current_user.id).all()
+        user_pets = (
+            await db.scalars(select(PetORM).where(PetORM.user_id == current_user.id))
+        ).all()
         pet_ids = [pet.id for pet in user_pets]
 
         if not pet_ids:
             return []
 
         weight_records = (
-            db.query(WeightRecordORM)
-            .filter(WeightRecordORM.pet_id.in_(pet_ids))
-            .order_by(WeightRecordORM.date.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
-        )
+            await db.scalars(
+                select(WeightRecordORM)
+                .where(WeightRecordORM.pet_id.in_(pet_ids))
+                .order_by(WeightRecordORM.date.desc())
+                .limit(limit)
+                .offset(offset)
+            )
+        ).all()
 
         result = []
         for record in weight_records:
@@ -78,17 +83,15 @@ async def get_all_weight_records(
 @router.get("/pet/{pet_id}/", response_model=List[WeightRecordResponse])
 async def get_weight_records_by_pet(
     pet_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
     limit: Optional[int] = 100,
     offset: Optional[int] = 0,
 ):
     """Get weight records for a specific pet."""
     try:
-        pet = (
-            db.query(PetORM)
-            .filter(PetORM.id == pet_id, PetORM.user_id == current_user.id)
-            .first()
+        pet = await db.scalar(
+            select(PetORM).where(PetORM.id == pet_id, PetORM.user_id == current_user.id)
         )
 
         if not pet:
@@ -98,13 +101,14 @@ async def get_weight_records_by_pet(
             )
 
         return (
-            db.query(WeightRecordORM)
-            .filter(WeightRecordORM.pet_id == pet_id)
-            .order_by(WeightRecordORM.date.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
-        )
+            await db.scalars(
+                select(WeightRecordORM)
+                .where(WeightRecordORM.pet_id == pet_id)
+                .order_by(WeightRecordORM.date.desc())
+                .limit(limit)
+                .offset(offset)
+            )
+        ).all()
     except HTTPException:
         raise
     except Exception:
@@ -124,15 +128,13 @@ async def get_weight_records_by_date_range(
     pet_id: int,
     start_date: datetime,
     end_date: datetime,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Get weight records for a specific pet within a date range."""
     try:
-        pet = (
-            db.query(PetORM)
-            .filter(PetORM.id == pet_id, PetORM.user_id == current_user.id)
-            .first()
+        pet = await db.scalar(
+            select(PetORM).where(PetORM.id == pet_id, PetORM.user_id == current_user.id)
         )
 
         if not pet:
@@ -142,15 +144,16 @@ async def get_weight_records_by_date_range(
             )
 
         return (
-            db.query(WeightRecordORM)
-            .filter(
-                WeightRecordORM.pet_id == pet_id,
-                WeightRecordORM.date >= start_date,
-                WeightRecordORM.date <= end_date,
+            await db.scalars(
+                select(WeightRecordORM)
+                .where(
+                    WeightRecordORM.pet_id == pet_id,
+                    WeightRecordORM.date >= start_date,
+                    WeightRecordORM.date <= end_date,
+                )
+                .order_by(WeightRecordORM.date.asc())
             )
-            .order_by(WeightRecordORM.date.asc())
-            .all()
-        )
+        ).all()
     except HTTPException:
         raise
     except Exception:
@@ -170,18 +173,16 @@ async def get_weight_records_by_date_range(
 )
 async def create_weight_record(
     weight_record: WeightRecordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Create a new weight record."""
     try:
-        pet = (
-            db.query(PetORM)
-            .filter(
+        pet = await db.scalar(
+            select(PetORM).where(
                 PetORM.id == weight_record.pet_id,
                 PetORM.user_id == current_user.id,
             )
-            .first()
         )
 
         if not pet:
@@ -200,13 +201,12 @@ async def create_weight_record(
         )
 
         db.add(db_weight_record)
-        db.commit()
-        db.refresh(db_weight_record)
+        await db.run_sync(commit_fresh, db_weight_record)
         return db_weight_record
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         logger.exception(
             "Failed to create weight record for pet %s and user %s",
             weight_record.pet_id,
@@ -222,14 +222,12 @@ async def create_weight_record(
 async def update_weight_record(
     record_id: int,
     weight_record_update: WeightRecordUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Update an existing weight record."""
     try:
-        db_weight_record = (
-            db.query(WeightRecordORM).filter(WeightRecordORM.id == record_id).first()
-        )
+        db_weight_record = await db.get(WeightRecordORM, record_id)
 
         if not db_weight_record:
             raise HTTPException(
@@ -237,13 +235,11 @@ async def update_weight_record(
                 detail="Weight record not found",
             )
 
-        pet = (
-            db.query(PetORM)
-            .filter(
+        pet = await db.scalar(
+            select(PetORM).where(
                 PetORM.id == db_weight_record.pet_id,
                 PetORM.user_id == current_user.id,
             )
-            .first()
         )
 
         if not pet:
@@ -257,13 +253,12 @@ async def update_weight_record(
           setattr(db_weight_record, field, value)
 
         db_weight_record.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_weight_record)
+        await db.run_sync(commit_fresh, db_weight_record)
         return db_weight_record
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         logger.exception(
             "Failed to update weight record %s for user %s",
             record_id,
@@ -278,14 +273,12 @@ async def update_weight_record(
 @router.delete("/{record_id}/", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_weight_record(
     record_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserORM = Depends(get_current_user),
 ):
     """Delete a weight record."""
     try:
-        db_weight_record = (
-            db.query(WeightRecordORM).filter(WeightRecordORM.id == record_id).first()
-        )
+        db_weight_record = await db.get(WeightRecordORM, record_id)
 
         if not db_weight_record:
             raise HTTPException(
@@ -293,13 +286,11 @@ async def delete_weight_record(
                 detail="Weight record not found",
             )
 
-        pet = (
-            db.query(PetORM)
-            .filter(
+        pet = await db.scalar(
+            select(PetORM).where(
                 PetORM.id == db_weight_record.pet_id,
                 PetORM.user_id == current_user.id,
             )
-            .first()
         )
 
         if not pet:
@@ -308,13 +299,13 @@ async def delete_weight_record(
                 detail="Access denied to this weight record",
             )
 
-        db.delete(db_weight_record)
-        db.commit()
+        await db.delete(db_weight_record)
+        await db.commit()
         return None
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         logger.exception(
             "Failed to delete weight record %s for user %s",
             record_id,
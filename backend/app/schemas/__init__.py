@@ -8,5 +8,5 @@ from .weight_goal import WeightGoalBase, WeightGoalCreate, WeightGoalUpdate, Wei
 from .references import Vaccine, AgeRestriction
 from .provider import UserUpdateProvider
 from .service_request import ServiceRequestCreate, ServiceRequestRead, ServiceRequestUpdate, ServiceRequestSummary
-from .chat_message import ChatMessageCreate, ChatMessageRead, ChatMessageUpdate, ChatConversation
+from .chat_message import ChatMessageCreate, ChatMessageRead, ChatMessageUpdate, ChatMessageBatch, ChatMessageBatchItem, ChatMessageBatchRead, ChatMessageBatchResult, ChatConversation, ChatInboxEntry, ChatInbox, ChatSearchHit, ChatSearchResults, ChatChange, ChatSync
 from .provider_review import ProviderReviewCreate, ProviderReviewRead
@@ -27,6 +27,13 @@ class ChatMessageCreate(ChatMessageBase):
     attachments: Optional[List[MediaAttachment]] = Field(None, description="File attachments")
     reply_to: Optional[ReplyToMessage] = Field(None, description="Reply context if this is a reply")
 
+class ChatMessageBatchItem(ChatMessageCreate):
+    """A message from a client's offline queue"""
+    client_message_id: str = Field(..., min_length=1, max_length=64, description="Client-generated id; resending it is a no-op")
+
+class ChatMessageBatch(BaseModel):
+    messages: List[ChatMessageBatchItem] = Field(..., min_length=1, max_length=100)
+
 class ChatMessageUpdate(BaseModel):
     message: Optional[str] = Field(None, min_length=1, max_length=2000)
     is_read: Optional[bool] = None
@@ -41,6 +48,7 @@ class ChatMessageRead(ChatMessageBase):
     created_at: datetime
     message_metadata: Optional[dict] = None
     attachments: Optional[List[MediaAttachment]] = None
+    client_message_id: Optional[str] = None
     
     # Delivery status tracking
     delivery_status: Optional[str] = "sent"
@@ -64,6 +72,65 @@ class ChatConversation(BaseModel):
     has_more: Optional[bool] = None
     current_offset: Optional[int] = None
     limit: Optional[int] = None
+    # Keyset cursors: pass as before_id / after_id to page older / newer
+    oldest_message_id: Optional[int] = None
+    newest_message_id: Optional[int] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ChatInboxEntry(BaseModel):
+    """One conversation in the inbox: latest message and unread count"""
+    service_request_id: int
+    last_message: Optional[ChatMessageRead] = None
+    last_activity_at: datetime
+    unread_count: int
+
+class ChatInbox(BaseModel):
+    """Page of conversations ordered by most recent activity"""
+    conversations: list[ChatInboxEntry]
+    has_more: bool
+    # Pass as cursor to fetch the next (older) page
+    next_cursor: Optional[str] = None
+
+class ChatSearchHit(BaseModel):
+    """Message matching a search, with highlighted excerpt"""
+    message: ChatMessageRead
+    # HTML-escaped excerpt; matched terms are wrapped in <mark></mark>
+    snippet: str
+    # Lower is a better match
+    score: float
+
+class ChatSearchResults(BaseModel):
+    hits: list[ChatSearchHit]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class ChatChange(BaseModel):
+    """A new message, or a participant's read / delivered watermark moving"""
+    seq: int
+    type: str  # message, read, delivered
+    service_request_id: int
+    # Sender of the message, or the participant who read / received
+    actor_id: int
+    # The new message's id, or the id the watermark moved up to
+    message_id: int
+    # Set for "message" changes
+    message: Optional[ChatMessageRead] = None
+
+class ChatSync(BaseModel):
+    """Changes across all of the caller's conversations since a cursor"""
+    changes: list[ChatChange]
+    # Pass as since on the next poll
+    cursor: int
+    has_more: bool
+
+class ChatMessageBatchResult(BaseModel):
+    client_message_id: str
+    message: ChatMessageRead
+    # Stored by an earlier attempt; nothing was written this time
+    duplicate: bool
+
+class ChatMessageBatchRead(BaseModel):
+    """Outcome of each submitted message, in request order"""
+    results: list[ChatMessageBatchResult]
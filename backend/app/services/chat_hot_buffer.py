@@ -0,0 +1,233 @@
+"""
+In-memory buffer of the newest messages of recently active conversations.
+
+Opening a conversation asks for its newest page, and busy conversations are
+opened far more often than they are written to. Each buffered conversation
+keeps up to ``capacity`` serialized messages; the newest page is answered from
+it without reading chat_messages. Buffers are filled by the first read that
+misses and kept current by the REST and WebSocket send paths, which append the
+message they have just serialized. Conversations are evicted least recently
+used first once the buffers together exceed ``max_bytes``.
+
+Read state is not buffered: the page's is_read / delivery_status flags are
+still applied from the watermarks on every read.
+
+The buffer is per process, like the WebSocket connection manager. Messages
+sent through other workers arrive over the chat backplane, which the
+connection manager appends from; appending is idempotent, so a message that
+reaches a buffer both directly and through the backplane is kept once. A
+worker whose backplane listener is down misses them until the entry expires.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.schemas import ChatMessageRead
+from config import (
+    CHAT_HOT_BUFFER_MAX_BYTES,
+    CHAT_HOT_BUFFER_MESSAGES,
+    CHAT_HOT_BUFFER_TTL_SECONDS,
+)
+
+# Reads in flight are tracked until they seed; a read that fails never does,
+# so the table is trimmed past this size
+MAX_PENDING_SEEDS = 4096
+
+
+def _position(message: ChatMessageRead):
+    return (message.created_at, message.id)
+
+
+@dataclass
+class _Entry:
+    messages: List[ChatMessageRead] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+    # Whether older messages exist than the oldest one buffered
+    has_older: bool = False
+    expires_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes)
+
+
+class HotMessageBuffer:
+    """Bounded per-conversation ring buffers of serialized chat messages"""
+
+    def __init__(self, capacity: int, max_bytes: int, ttl_seconds: float):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._pending: Dict[int, object] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.appends = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0 and self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def _drop(self, service_request_id: int):
+        entry = self._entries.pop(service_request_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _live_entry(self, service_request_id: int) -> Optional[_Entry]:
+        entry = self._entries.get(service_request_id)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._drop(service_request_id)
+            return None
+        return entry
+
+    def _trim(self, entry: _Entry):
+        excess = len(entry.messages) - self.capacity
+        if excess > 0:
+            self._bytes -= sum(entry.sizes[:excess])
+            del entry.messages[:excess]
+            del entry.sizes[:excess]
+            entry.has_older = True
+
+    def _enforce_max_bytes(self):
+        while self._bytes > self.max_bytes and self._entries:
+            service_request_id = next(iter(self._entries))
+            self._drop(service_request_id)
+            self.evictions += 1
+
+    def newest_page(
+        self, service_request_id: int, limit: int
+    ) -> Optional[Tuple[List[ChatMessageRead], bool]]:
+        """The newest ``limit`` messages, oldest first, and whether more exist.
+
+        None when the buffer cannot answer; the caller then reads the
+        database and hands the page to ``seed``. The messages are copies the
+        caller may modify.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._live_entry(service_request_id)
+            if entry is None or (len(entry.messages) < limit and entry.has_older):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(service_request_id)
+            self.hits += 1
+            page = entry.messages[-limit:] if limit else []
+            has_more = len(entry.messages) > limit or entry.has_older
+            return [message.model_copy() for message in page], has_more
+
+    def begin_seed(self, service_request_id: int) -> Optional[object]:
+        """Token to pass to ``seed``, taken before reading the page.
+
+        A message appended while the page is being read invalidates the
+        token, so a page that may have missed it is not installed.
+        """
+        if not self.enabled:
+            return None
+        token = object()
+        with self._lock:
+            self._pending.pop(service_request_id, None)
+            self._pending[service_request_id] = token
+            while len(self._pending) > MAX_PENDING_SEEDS:
+                del self._pending[next(iter(self._pending))]
+        return token
+
+    def seed(
+        self,
+        service_request_id: int,
+        token: Optional[object],
+        messages: List[ChatMessageRead],
+        has_more: bool,
+    ):
+        """Install the newest page, oldest first, as read from the database"""
+        if token is None:
+            return
+        with self._lock:
+            if self._pending.get(service_request_id) is not token:
+                return
+            del self._pending[service_request_id]
+            self._drop(service_request_id)
+            entry = _Entry(
+                messages=[message.model_copy() for message in messages],
+                sizes=[len(message.model_dump_json()) for message in messages],
+                has_older=has_more,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._bytes += entry.size
+            self._trim(entry)
+            self._entries[service_request_id] = entry
+            self._enforce_max_bytes()
+
+    def holds(self, service_request_id: int) -> bool:
+        """Whether the conversation is buffered, so appending to it has an effect"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self._live_entry(service_request_id) is not None
+
+    def append(self, service_request_id: int, message: ChatMessageRead):
+        """Record a message just written; only conversations already buffered keep it"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending.pop(service_request_id, None)
+            entry = self._live_entry(service_request_id)
+            if entry is None:
+                return
+            positions = [_position(buffered) for buffered in entry.messages]
+            index = bisect.bisect_right(positions, _position(message))
+            if index and entry.messages[index - 1].id == message.id:
+                # Already buffered
+                return
+            if index == 0 and entry.has_older:
+                # Older than the buffered window; it belongs to a later page
+                return
+            size = len(message.model_dump_json())
+            entry.messages.insert(index, message.model_copy())
+            entry.sizes.insert(index, size)
+            self._bytes += size
+            self.appends += 1
+            self._trim(entry)
+            self._enforce_max_bytes()
+
+    def invalidate(self, service_request_id: int):
+        with self._lock:
+            self._pending.pop(service_request_id, None)
+            self._drop(service_request_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.appends = self.evictions = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "conversations": len(self._entries),
+                "messages": sum(len(entry.messages) for entry in self._entries.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "appends": self.appends,
+                "evictions": self.evictions,
+            }
+
+
+hot_messages = HotMessageBuffer(
+    capacity=CHAT_HOT_BUFFER_MESSAGES,
+    max_bytes=CHAT_HOT_BUFFER_MAX_BYTES,
+    ttl_seconds=CHAT_HOT_BUFFER_TTL_SECONDS,
+)
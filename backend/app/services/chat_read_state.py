@@ -0,0 +1,145 @@
+"""
+Read / delivered watermarks for chat conversations.
+
+Each (user, conversation) pair keeps the highest message id the user has read
+and received. Advancing a watermark is one upsert no matter how many messages
+it covers, and "unread" is the id range above the read watermark.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import ChatMessageORM, ChatReadStateORM
+from app.schemas import ChatMessageRead
+from app.services.chat_sync import DELIVERED, READ, record_watermark_change
+
+# user_id -> (last_read_message_id, last_delivered_message_id)
+Watermarks = Dict[int, Tuple[Optional[int], Optional[int]]]
+
+
+def advance_watermarks(
+    db: Session,
+    user_id: int,
+    service_request_id: int,
+    read_up_to: Optional[int] = None,
+    delivered_up_to: Optional[int] = None,
+):
+    """Move the user's watermarks forward (never back) in a single upsert.
+
+    Reading a message implies it was delivered. A move is also published to
+    the participants' change feeds; an ack that moves nothing is not. The
+    caller commits.
+    """
+    if read_up_to is not None:
+        delivered_up_to = max(delivered_up_to or 0, read_up_to)
+    if delivered_up_to is None:
+        return
+
+    now = datetime.utcnow()
+    table = ChatReadStateORM.__table__
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(table).values(
+        user_id=user_id,
+        service_request_id=service_request_id,
+        last_read_message_id=read_up_to,
+        read_at=now if read_up_to is not None else None,
+        last_delivered_message_id=delivered_up_to,
+        delivered_at=now,
+    )
+
+    updates = {}
+    moved = []
+    watermarks = [("last_delivered_message_id", "delivered_at")]
+    if read_up_to is not None:
+        watermarks.append(("last_read_message_id", "read_at"))
+    for watermark, timestamp in watermarks:
+        current = table.c[watermark]
+        incoming = statement.excluded[watermark]
+        # Every SET expression sees the pre-update row, so both branches
+        # test the same condition
+        advanced = or_(current.is_(None), incoming > current)
+        moved.append(advanced)
+        updates[watermark] = case((advanced, incoming), else_=current)
+        updates[timestamp] = case(
+            (advanced, statement.excluded[timestamp]), else_=table.c[timestamp]
+        )
+
+    # A repeated or older ack updates nothing and returns no row. Otherwise
+    # a timestamp equal to ``now`` tells which watermark moved.
+    state = db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.service_request_id],
+            set_=updates,
+            where=or_(*moved),
+        ).returning(table.c.read_at, table.c.delivered_at)
+    ).first()
+    if state is None:
+        return
+    if read_up_to is not None and state.read_at == now:
+        record_watermark_change(db, user_id, service_request_id, READ, read_up_to)
+    elif state.delivered_at == now:
+        record_watermark_change(db, user_id, service_request_id, DELIVERED, delivered_up_to)
+
+
+def unread_message_filters(user_id: int, service_request_id) -> list:
+    """WHERE clauses selecting the user's unread messages in a conversation.
+
+    ``service_request_id`` may be a column, so the filters can be correlated
+    into a per-conversation subquery.
+    """
+    last_read = (
+        select(ChatReadStateORM.last_read_message_id)
+        .where(
+            ChatReadStateORM.user_id == user_id,
+            ChatReadStateORM.service_request_id == service_request_id,
+        )
+        .correlate_except(ChatReadStateORM)
+        .scalar_subquery()
+    )
+    return [
+        ChatMessageORM.service_request_id == service_request_id,
+        ChatMessageORM.sender_id != user_id,
+        ChatMessageORM.id > func.coalesce(last_read, 0),
+    ]
+
+
+def count_unread(db: Session, user_id: int, service_request_id: int) -> int:
+    return db.scalar(
+        select(func.count(ChatMessageORM.id)).where(
+            *unread_message_filters(user_id, service_request_id)
+        )
+    )
+
+
+def conversation_watermarks(db: Session, service_request_id: int) -> Watermarks:
+    """Watermarks of everyone who has read or received the conversation"""
+    states = (
+        db.query(ChatReadStateORM)
+        .filter(ChatReadStateORM.service_request_id == service_request_id)
+        .all()
+    )
+    return {
+        state.user_id: (state.last_read_message_id, state.last_delivered_message_id)
+        for state in states
+    }
+
+
+def apply_watermarks(messages: Iterable[ChatMessageRead], watermarks: Watermarks):
+    """Fill in is_read / delivery_status from the other participants' watermarks"""
+    for message in messages:
+        for user_id, (last_read, last_delivered) in watermarks.items():
+            if user_id == message.sender_id:
+                continue
+            if last_read is not None and last_read >= message.id:
+                message.is_read = True
+                message.delivery_status = "read"
+                break
+            if (
+                last_delivered is not None
+                and last_delivered >= message.id
+                and message.delivery_status != "read"
+            ):
+                message.delivery_status = "delivered"
@@ -0,0 +1,216 @@
+"""
+Full-text search over chat messages.
+
+Queries the FTS5 table on SQLite and the GIN-indexed tsvector on PostgreSQL
+(see app/models/chat_search.py). Results are ordered best match first and
+paged with an opaque (score, id) cursor. Scores depend on corpus statistics,
+so a page boundary can shift slightly if messages arrive between requests.
+
+Ranking is the expensive part (every match is scored). On SQLite the match is
+narrowed to the user's conversations inside FTS5, which keeps the match set
+small. Otherwise only the newest CHAT_SEARCH_CANDIDATES matches are ranked;
+both indexes return matches in id order, which makes finding that window
+cheap, but an old message containing only very common words can fall outside
+it.
+"""
+import base64
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, select, table, column
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import ChatMessageORM, ServiceRequestORM
+from app.models.chat_search import (
+    FTS_TABLE,
+    SEARCH_CONFIG,
+    message_search_vector,
+    sqlite_has_fts5,
+)
+from app.schemas import ChatMessageRead, ChatSearchHit, ChatSearchResults
+from config import CHAT_SEARCH_CANDIDATES
+
+MAX_QUERY_TERMS = 8
+SNIPPET_WORDS = 16
+# Above this many conversations the FTS5 filter stops paying for itself and
+# scope is left to the join alone
+MAX_FTS_CONVERSATIONS = 500
+
+# Control characters cannot occur in sanitized messages, so they mark the
+# highlighted terms safely until the snippet has been HTML-escaped
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+_fts_table = table(FTS_TABLE, column("rowid"))
+_fts = literal_column(FTS_TABLE)
+
+
+class InvalidSearchCursor(ValueError):
+    pass
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of the user's query; punctuation and operators are dropped"""
+    return re.findall(r"\w+", query, flags=re.UNICODE)[:MAX_QUERY_TERMS]
+
+
+def _encode_cursor(score: float, message_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}|{message_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, message_id = raw.rsplit("|", 1)
+        return float(score), int(message_id)
+    except ValueError:
+        raise InvalidSearchCursor(cursor)
+
+
+def _sqlite_match(terms: List[str], conversation_ids: Optional[List[int]]):
+    # Every term must match; the last one as a prefix, for search-as-you-type
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    match = f"message : ({' '.join(quoted)})"
+    if conversation_ids is not None:
+        ids = " OR ".join(str(conversation_id) for conversation_id in conversation_ids)
+        match += f" AND service_request_id : ({ids})"
+    # The conversation column is a filter, not a relevance signal
+    score = func.bm25(_fts, 1.0, 0.0)
+    snippet = func.snippet(_fts, 0, _MARK_START, _MARK_END, "…", SNIPPET_WORDS)
+    return _fts.op("MATCH")(match), score, snippet, _fts_table
+
+
+def _postgres_match(terms: List[str]):
+    tsquery = func.to_tsquery(SEARCH_CONFIG, " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+    # ts_rank grows with relevance; negate it so lower is better on both backends
+    score = -func.ts_rank(message_search_vector, tsquery)
+    snippet = func.ts_headline(
+        SEARCH_CONFIG,
+        ChatMessageORM.message,
+        tsquery,
+        f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5",
+    )
+    return message_search_vector.op("@@")(tsquery), score, snippet, None
+
+
+def _like_match(terms: List[str]):
+    # Fallback for SQLite builds without FTS5: correct but a full scan
+    matches = and_(*[ChatMessageORM.message.ilike(f"%{term}%") for term in terms])
+    return matches, literal_column("0.0"), ChatMessageORM.message, None
+
+
+def _candidate_floor(match, participant_filter, fts_join, candidates: int):
+    """Lowest message id among the newest ``candidates`` matches"""
+    id_column = ChatMessageORM.id
+    newest = select(ChatMessageORM.id.label("message_id")).join(
+        ServiceRequestORM, ServiceRequestORM.id == ChatMessageORM.service_request_id
+    )
+    if fts_join is not None:
+        newest = newest.join(fts_join, fts_join.c.rowid == ChatMessageORM.id)
+        # FTS5 streams matches in rowid order, so no sort is needed
+        id_column = fts_join.c.rowid
+    newest = (
+        newest.where(match, participant_filter)
+        .order_by(id_column.desc())
+        .limit(candidates)
+        .correlate(None)
+        .subquery()
+    )
+    return select(func.min(newest.c.message_id)).scalar_subquery()
+
+
+def _render_snippet(snippet: str) -> str:
+    return (
+        html.escape(snippet)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+def search_messages(
+    db: Session,
+    participant_filter,
+    query: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> ChatSearchResults:
+    """Messages matching ``query`` in conversations selected by ``participant_filter``"""
+    after = _decode_cursor(cursor) if cursor else None
+    terms = search_terms(query)
+    if not terms:
+        return ChatSearchResults(hits=[], has_more=False)
+
+    # Whether the match itself is limited to the user's conversations; the
+    # match set is then small enough to rank without a candidate window
+    scoped_in_index = False
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        match, score, snippet, fts_join = _postgres_match(terms)
+    elif sqlite_has_fts5(connection):
+        conversation_ids = db.scalars(
+            select(ServiceRequestORM.id)
+            .where(participant_filter)
+            .limit(MAX_FTS_CONVERSATIONS + 1)
+        ).all()
+        if not conversation_ids:
+            return ChatSearchResults(hits=[], has_more=False)
+        if len(conversation_ids) > MAX_FTS_CONVERSATIONS:
+            conversation_ids = None
+        scoped_in_index = conversation_ids is not None
+        match, score, snippet, fts_join = _sqlite_match(terms, conversation_ids)
+    else:
+        match, score, snippet, fts_join = _like_match(terms)
+
+    ranked = (
+        select(
+            ChatMessageORM.id.label("message_id"),
+            score.label("score"),
+            snippet.label("snippet"),
+        )
+        .join(ServiceRequestORM, ServiceRequestORM.id == ChatMessageORM.service_request_id)
+        .where(match, participant_filter)
+    )
+    if fts_join is not None:
+        ranked = ranked.join(fts_join, fts_join.c.rowid == ChatMessageORM.id)
+    if CHAT_SEARCH_CANDIDATES > 0 and not scoped_in_index:
+        floor = _candidate_floor(match, participant_filter, fts_join, CHAT_SEARCH_CANDIDATES)
+        # On SQLite the bound must be on the FTS rowid for FTS5 to use it
+        id_column = fts_join.c.rowid if fts_join is not None else ChatMessageORM.id
+        ranked = ranked.where(id_column >= floor)
+    if after is not None:
+        after_score, after_id = after
+        ranked = ranked.where(
+            or_(
+                score > after_score,
+                and_(score == after_score, ChatMessageORM.id < after_id),
+            )
+        )
+    # Rank and cut the page inside the matching query (ranking functions only
+    # work there), then load just that page with its senders
+    ranked = ranked.order_by(score, ChatMessageORM.id.desc()).limit(limit + 1).subquery()
+
+    statement = (
+        select(ChatMessageORM, ranked.c.score, ranked.c.snippet)
+        .join(ranked, ranked.c.message_id == ChatMessageORM.id)
+        .options(joinedload(ChatMessageORM.sender))
+        .order_by(ranked.c.score, ChatMessageORM.id.desc())
+    )
+
+    rows = db.execute(statement).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    hits = [
+        ChatSearchHit(
+            message=ChatMessageRead.model_validate(row.ChatMessageORM),
+            snippet=_render_snippet(row.snippet),
+            score=row.score,
+        )
+        for row in rows
+    ]
+    next_cursor = None
+    if has_more:
+        next_cursor = _encode_cursor(rows[-1].score, rows[-1].ChatMessageORM.id)
+    return ChatSearchResults(hits=hits, has_more=has_more, next_cursor=next_cursor)
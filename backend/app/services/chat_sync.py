@@ -0,0 +1,140 @@
+"""
+Per-user chat change feed for polling clients.
+
+New messages and watermark moves are written to chat_changes once per
+conversation participant, in the same transaction as the change itself. A
+client keeps the seq of the last change it has seen and asks for everything
+after it: one range scan over (user_id, seq), however many conversations the
+user has. The feed is append-only; messages are fanned out by a session event
+so every ORM write path records them.
+
+Seqs count each user's changes and are handed out by an upsert on the user's
+chat_change_cursors row. On PostgreSQL the row stays locked until the
+transaction ends, so a writer that wants the next seq waits for the one
+holding the previous seq to commit: a poll can never see seq n + 1 while n is
+still in flight, and skip it. (A global autoincrement id can: concurrent
+transactions commit their ids in any order.) Cursor rows are locked in user
+id order to keep concurrent fan-outs from deadlocking on each other.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, event, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import (
+    ChatChangeCursorORM,
+    ChatChangeORM,
+    ChatMessageORM,
+    ConversationParticipantORM,
+)
+from app.schemas import ChatChange, ChatMessageRead, ChatSync
+
+MESSAGE = "message"
+READ = "read"
+DELIVERED = "delivered"
+
+
+def _fan_out(connection, service_request_id: int, kind: str, actor_id: int, message_id: int):
+    """Append one change row for every participant of the conversation"""
+    participants = ConversationParticipantORM.__table__
+    cursors = ChatChangeCursorORM.__table__
+    # The actor is listed explicitly: a first-time sender's participant row
+    # may be written later in the same flush
+    recipients = union_all(
+        select(participants.c.user_id, literal(1)).where(
+            participants.c.service_request_id == service_request_id,
+            participants.c.user_id != actor_id,
+        ),
+        select(literal(actor_id), literal(1)),
+    ).order_by("user_id")
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(cursors).from_select(["user_id", "last_seq"], recipients)
+    seqs = connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=[cursors.c.user_id],
+            set_={"last_seq": cursors.c.last_seq + 1},
+        ).returning(cursors.c.user_id, cursors.c.last_seq)
+    ).all()
+
+    now = datetime.utcnow()
+    connection.execute(
+        ChatChangeORM.__table__.insert(),
+        [
+            {
+                "user_id": user_id,
+                "seq": seq,
+                "service_request_id": service_request_id,
+                "kind": kind,
+                "actor_id": actor_id,
+                "message_id": message_id,
+                "created_at": now,
+            }
+            for user_id, seq in seqs
+        ],
+    )
+
+
+def record_watermark_change(
+    db: Session, user_id: int, service_request_id: int, kind: str, up_to: int
+):
+    """Tell the conversation that ``user_id`` has read / received up to ``up_to``"""
+    _fan_out(db.connection(), service_request_id, kind, user_id, up_to)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_new_messages(session, flush_context):
+    messages = [obj for obj in session.new if isinstance(obj, ChatMessageORM)]
+    if not messages:
+        return
+    connection = session.connection()
+    for message in sorted(messages, key=lambda m: m.id):
+        _fan_out(
+            connection, message.service_request_id, MESSAGE, message.sender_id, message.id
+        )
+
+
+def latest_cursor(db: Session, user_id: int) -> int:
+    """Seq of the user's newest change, or 0: where a freshly loaded client starts"""
+    return db.scalar(
+        select(ChatChangeCursorORM.last_seq).where(ChatChangeCursorORM.user_id == user_id)
+    ) or 0
+
+
+def get_changes(db: Session, user_id: int, since: int, limit: int = 200) -> ChatSync:
+    """Changes after ``since`` for the user, oldest first"""
+    rows = db.execute(
+        select(ChatChangeORM, ChatMessageORM)
+        .outerjoin(
+            ChatMessageORM,
+            and_(
+                ChatChangeORM.kind == MESSAGE,
+                ChatMessageORM.id == ChatChangeORM.message_id,
+            ),
+        )
+        .options(joinedload(ChatMessageORM.sender))
+        .where(ChatChangeORM.user_id == user_id, ChatChangeORM.seq > since)
+        .order_by(ChatChangeORM.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for change, message in rows:
+        if change.kind == MESSAGE and message is None:
+            # Deleted since; nothing to deliver
+            continue
+        changes.append(
+            ChatChange(
+                seq=change.seq,
+                type=change.kind,
+                service_request_id=change.service_request_id,
+                actor_id=change.actor_id,
+                message_id=change.message_id,
+                message=ChatMessageRead.model_validate(message) if message else None,
+            )
+        )
+    cursor: Optional[int] = rows[-1][0].seq if rows else since
+    return ChatSync(changes=changes, cursor=cursor, has_more=has_more)
@@ -0,0 +1,256 @@
+"""
+Conversation membership: who may read and write a service request's chat.
+
+A user takes part in a conversation as the request owner, as the assigned
+provider, or as a responder once they have posted in it. Those rows live in
+conversation_participants and are kept current by session events, so every
+ORM write path (request creation, provider assignment, REST and WebSocket
+messages) maintains them without extra calls.
+
+Access checks go through ``membership_cache`` first: a bounded TTL/LRU set of
+(user_id, service_request_id) pairs known to be participants, so the hot path
+issues no SQL. Only positive answers are cached. Removals (reassigning a
+provider, deleting a request) invalidate the entry after commit in this
+process; other workers can keep granting access for up to the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from sqlalchemy import and_, delete, event, exists, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import ChatMessageORM, ConversationParticipantORM, ServiceRequestORM
+from config import CHAT_MEMBERSHIP_CACHE_MAX_SIZE, CHAT_MEMBERSHIP_CACHE_TTL_SECONDS
+
+OWNER = "owner"
+PROVIDER = "provider"
+RESPONDER = "responder"
+
+
+class MembershipCache:
+    """Bounded TTL/LRU set of (user_id, service_request_id) participant pairs"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[int, int], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def contains(self, user_id: int, service_request_id: int, record: bool = True) -> bool:
+        if not self.enabled:
+            return False
+        key = (user_id, service_request_id)
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                expires_at = None
+            if expires_at is None:
+                if record:
+                    self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return True
+
+    def add(self, user_id: int, service_request_id: int):
+        if not self.enabled:
+            return
+        key = (user_id, service_request_id)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int, service_request_id: int):
+        with self._lock:
+            if self._entries.pop((user_id, service_request_id), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_conversation(self, service_request_id: int):
+        with self._lock:
+            keys = [key for key in self._entries if key[1] == service_request_id]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+membership_cache = MembershipCache(
+    max_size=CHAT_MEMBERSHIP_CACHE_MAX_SIZE,
+    ttl_seconds=CHAT_MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+
+def _participant_key(user_id: int, service_request_id: int):
+    return {"service_request_id": service_request_id, "user_id": user_id}
+
+
+def is_participant(db: Session, user_id: int, service_request_id: int) -> bool:
+    """Whether the user may access the conversation: a cache hit or one PK lookup"""
+    if membership_cache.contains(user_id, service_request_id):
+        return True
+    found = db.get(
+        ConversationParticipantORM, _participant_key(user_id, service_request_id)
+    )
+    if found is None:
+        return False
+    membership_cache.add(user_id, service_request_id)
+    return True
+
+
+async def is_participant_async(
+    db: AsyncSession, user_id: int, service_request_id: int
+) -> bool:
+    """is_participant for AsyncSession routes"""
+    if membership_cache.contains(user_id, service_request_id):
+        return True
+    found = await db.get(
+        ConversationParticipantORM, _participant_key(user_id, service_request_id)
+    )
+    if found is None:
+        return False
+    membership_cache.add(user_id, service_request_id)
+    return True
+
+
+def participant_conversation_ids(user_id: int):
+    """SELECT of the ids of every conversation the user takes part in"""
+    return select(ConversationParticipantORM.service_request_id).where(
+        ConversationParticipantORM.user_id == user_id
+    )
+
+
+def _insert_participants(connection, rows):
+    """Insert (service_request_id, user_id, role) rows, skipping existing ones.
+
+    An existing responder who becomes the assigned provider is promoted; an
+    owner keeps the owner role.
+    """
+    table = ConversationParticipantORM.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    for role in (OWNER, PROVIDER, RESPONDER):
+        values = [
+            {"service_request_id": sr_id, "user_id": user_id, "role": role}
+            for sr_id, user_id, row_role in rows
+            if row_role == role
+        ]
+        if not values:
+            continue
+        statement = dialect.insert(table).values(values)
+        index_elements = [table.c.service_request_id, table.c.user_id]
+        if role == PROVIDER:
+            statement = statement.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={"role": PROVIDER},
+                where=table.c.role == RESPONDER,
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+        connection.execute(statement)
+
+
+def _remove_provider(connection, service_request_id: int, user_id: int):
+    """Drop a replaced provider, who stays on as a responder if they posted"""
+    table = ConversationParticipantORM.__table__
+    is_row = and_(
+        table.c.service_request_id == service_request_id,
+        table.c.user_id == user_id,
+        table.c.role == PROVIDER,
+    )
+    has_posted = exists().where(
+        ChatMessageORM.service_request_id == service_request_id,
+        ChatMessageORM.sender_id == user_id,
+    )
+    connection.execute(update(table).where(is_row, has_posted).values(role=RESPONDER))
+    connection.execute(delete(table).where(is_row))
+
+
+_PENDING_KEY = "conversation_participant_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_participants(session, flush_context):
+    rows = []
+    removed = []
+    for obj in session.new:
+        if isinstance(obj, ServiceRequestORM):
+            rows.append((obj.id, obj.user_id, OWNER))
+            if obj.assigned_provider_id is not None:
+                rows.append((obj.id, obj.assigned_provider_id, PROVIDER))
+        elif isinstance(obj, ChatMessageORM):
+            # Senders passed an access check moments ago, which cached them
+            if not membership_cache.contains(
+                obj.sender_id, obj.service_request_id, record=False
+            ):
+                rows.append((obj.service_request_id, obj.sender_id, RESPONDER))
+    for obj in session.dirty:
+        if not isinstance(obj, ServiceRequestORM):
+            continue
+        history = inspect(obj).attrs.assigned_provider_id.history
+        if not history.has_changes():
+            continue
+        removed.extend((obj.id, old) for old in history.deleted if old is not None)
+        if obj.assigned_provider_id is not None:
+            rows.append((obj.id, obj.assigned_provider_id, PROVIDER))
+
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.deleted:
+        if isinstance(obj, ServiceRequestORM):
+            pending.add((None, obj.id))
+
+    if not rows and not removed:
+        return
+    connection = session.connection()
+    for service_request_id, user_id in removed:
+        _remove_provider(connection, service_request_id, user_id)
+        pending.add((user_id, service_request_id))
+    if rows:
+        _insert_participants(connection, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_removed_participants(session):
+    for user_id, service_request_id in session.info.pop(_PENDING_KEY, ()):
+        if user_id is None:
+            membership_cache.invalidate_conversation(service_request_id)
+        else:
+            membership_cache.invalidate(user_id, service_request_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,93 @@
+"""
+Message id -> conversation routing for delivered/read status events.
+
+A status event names a message, but is broadcast to the message's
+conversation. ``message_routes`` remembers the service_request_id of recently
+created messages (bounded LRU), so routing a status needs no SQL. A
+message's conversation never changes, so entries need no TTL or
+invalidation; they are added after the commit that inserts the message, on
+every ORM write path. A miss costs one primary-key lookup.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import ChatMessageORM
+from config import CHAT_MESSAGE_ROUTE_CACHE_MAX_SIZE
+
+
+class MessageRouteCache:
+    """Bounded LRU map of message_id -> service_request_id"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, message_id: int) -> Optional[int]:
+        with self._lock:
+            service_request_id = self._entries.get(message_id)
+            if service_request_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(message_id)
+            self.hits += 1
+            return service_request_id
+
+    def put(self, message_id: int, service_request_id: int):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[message_id] = service_request_id
+            self._entries.move_to_end(message_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+message_routes = MessageRouteCache(max_size=CHAT_MESSAGE_ROUTE_CACHE_MAX_SIZE)
+
+
+_PENDING_KEY = "message_routes_created"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_created_messages(session, flush_context):
+    created = session.info.setdefault(_PENDING_KEY, {})
+    for obj in session.new:
+        if isinstance(obj, ChatMessageORM) and obj.id is not None:
+            created[obj.id] = obj.service_request_id
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_created_messages(session):
+    for message_id, service_request_id in session.info.pop(_PENDING_KEY, {}).items():
+        message_routes.put(message_id, service_request_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_created_messages(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,37 @@
+"""
+Commit helpers that hand back written rows without reading them again.
+
+``db.commit(); db.refresh(obj)`` costs a SELECT after every write: commit
+expires every loaded instance, so the refresh (or the first attribute read
+while serializing the response) goes back to the database. The values are
+already known, though. Client-side defaults are computed before the
+statement runs, and server-generated ones (primary keys, and server_default /
+server onupdate columns on mappers with ``eager_defaults``) come back from the
+INSERT / UPDATE itself through RETURNING, which PostgreSQL and SQLite 3.35+
+support.
+
+``commit_fresh`` commits and keeps the written instances loaded. Everything
+else in the session is expired as a plain commit would, so state that may
+have changed under it (Core statements run by session events, other
+transactions) is still re-read on next access.
+"""
+from sqlalchemy.orm import Session
+
+
+def commit_fresh(db: Session, *instances) -> None:
+    """Commit the session; ``instances`` stay loaded with what was written.
+
+    Async routes call it as ``await db.run_sync(commit_fresh, obj)``.
+    Unloaded relationships of the instances still lazy-load as usual.
+    """
+    expire_others = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_others
+    if expire_others:
+        kept = {id(instance) for instance in instances}
+        for instance in list(db.identity_map.values()):
+            if id(instance) not in kept:
+                db.expire(instance)
@@ -1,5 +1,26 @@
-from fastapi import UploadFile
+import hashlib
+import os
 import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# Bytes copied per read; peak memory per streamed upload is about one chunk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the allowed size while streaming"""
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
 
 
 def save_upload_file(upload_file: UploadFile, destination: str) -> str:
@@ -10,3 +31,67 @@ def save_upload_file(upload_file: UploadFile, destination: str) -> str:
         return str(destination)
     finally:
         upload_file.file.close()
+
+
+def _open_temp_file(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    # Same directory as the destination so the final rename is atomic
+    return tempfile.NamedTemporaryFile(dir=directory, prefix=".upload-", delete=False)
+
+
+def _write_chunk(temp_file, hasher, chunk: bytes):
+    temp_file.write(chunk)
+    hasher.update(chunk)
+
+
+def _commit_temp_file(temp_file, destination: Path):
+    temp_file.flush()
+    os.fsync(temp_file.fileno())
+    temp_file.close()
+    os.replace(temp_file.name, destination)
+
+
+def _discard_temp_file(temp_file):
+    temp_file.close()
+    try:
+        os.unlink(temp_file.name)
+    except FileNotFoundError:
+        pass
+
+
+async def stream_upload_to_path(
+    upload_file: UploadFile,
+    destination: Path,
+    max_size: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """Copy an upload to ``destination`` chunk by chunk.
+
+    Disk I/O and hashing run in the threadpool so the event loop never blocks
+    on them. The copy stops as soon as ``max_size`` is exceeded, and the file
+    only appears at ``destination`` (via rename) once it is complete.
+    """
+    if upload_file.size is not None and upload_file.size > max_size:
+        raise FileTooLargeError(upload_file.filename)
+
+    destination = Path(destination)
+    temp_file = await run_in_threadpool(_open_temp_file, destination.parent)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLargeError(upload_file.filename)
+            await run_in_threadpool(_write_chunk, temp_file, hasher, chunk)
+        await run_in_threadpool(_commit_temp_file, temp_file, destination)
+    except BaseException:
+        await run_in_threadpool(_discard_temp_file, temp_file)
+        raise
+    finally:
+        await upload_file.close()
+
+    return StoredUpload(path=destination, size=size, sha256=hasher.hexdigest())
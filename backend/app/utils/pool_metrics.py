@@ -0,0 +1,164 @@
+"""
+Connection pool instrumentation.
+
+The pool classes below time how long each checkout waits for a connection,
+and ``attach_pool_metrics`` wires pool events onto an engine so the internal
+metrics endpoint can report live checked-out/idle/overflow numbers.
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counters and a wait-time histogram for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.bucket_counts: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.wait_count = 0
+            self.wait_sum_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.checkouts = 0
+            self.invalidations = 0
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        wait_ms = seconds * 1000
+        index = len(WAIT_BUCKETS_MS)
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def _increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool=None) -> Dict:
+        with self._lock:
+            buckets = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self.bucket_counts)
+            }
+            buckets["le_inf"] = self.bucket_counts[-1]
+            data = {
+                "name": self.name,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum_ms, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "avg": round(self.wait_sum_ms / self.wait_count, 3)
+                    if self.wait_count
+                    else 0.0,
+                    "buckets": buckets,
+                },
+            }
+
+        if isinstance(pool, QueuePool):
+            data.update(
+                {
+                    "pool_class": type(pool).__name__,
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "idle": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                    "timeout": pool.timeout(),
+                }
+            )
+        elif pool is not None:
+            data["pool_class"] = type(pool).__name__
+        return data
+
+
+class _TimedCheckoutMixin:
+    """Records the time ``_do_get`` spends waiting for a free connection"""
+
+    pool_metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.pool_metrics is not None:
+                self.pool_metrics.observe_wait(
+                    time.perf_counter() - start, timed_out=True
+                )
+            raise
+        if self.pool_metrics is not None:
+            self.pool_metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same
+        # metrics object so the counters survive it.
+        new_pool = super().recreate()
+        new_pool.pool_metrics = self.pool_metrics
+        return new_pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# name -> (metrics, engine) for everything attach_pool_metrics has seen
+_registry: Dict[str, tuple] = {}
+
+
+def attach_pool_metrics(engine, name: str) -> PoolMetrics:
+    """Start collecting pool metrics for ``engine`` (sync or async)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics = PoolMetrics(name)
+    sync_engine.pool.pool_metrics = metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics._increment("connects")
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics._increment("checkouts")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics._increment("invalidations")
+
+    _registry[name] = (metrics, sync_engine)
+    return metrics
+
+
+def pool_metrics_snapshot() -> List[Dict]:
+    """Current metrics for every instrumented engine"""
+    return [
+        metrics.snapshot(sync_engine.pool)
+        for metrics, sync_engine in _registry.values()
+    ]
@@ -0,0 +1,144 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+Cursor-execute events on every Engine feed whichever ``QueryStats`` is active
+in the current context. ``QueryCounterMiddleware`` opens one per HTTP request,
+reports it through response headers and logs repeated statements;
+``assert_max_queries`` opens one around a block of test code.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+# The same statement this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+
+class QueryStats:
+    """Statement count and DB time for one request (or test block)"""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def record(self, statement: str, duration: float):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    stats.record(statement, time.perf_counter() - start_times.pop())
+
+
+@contextmanager
+def track_queries():
+    """Collect query stats for the enclosed block; nests inside outer blocks"""
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the enclosed block issues more than ``limit`` SQL statements"""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        details = "\n".join(
+            f"  {count}x {statement}" for statement, count in stats.statements.most_common()
+        )
+        raise AssertionError(
+            f"Expected at most {limit} queries, {stats.count} were executed:\n{details}"
+        )
+
+
+class QueryCounterMiddleware:
+    """Adds per-request statement count and DB time to headers and logs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.encode(), str(stats.count).encode()))
+                    headers.append(
+                        (QUERY_TIME_HEADER.encode(), f"{stats.duration_ms:.2f}".encode())
+                    )
+                    message["headers"] = headers
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        path = scope.get("path", "")
+        logger.debug(
+            "%s %s issued %d queries in %.2f ms",
+            scope.get("method"),
+            path,
+            stats.count,
+            stats.duration_ms,
+        )
+        for statement, count in stats.repeated_statements():
+            logger.warning(
+                "Possible N+1 on %s %s: statement ran %d times: %s",
+                scope.get("method"),
+                path,
+                count,
+                " ".join(statement.split())[:200],
+            )
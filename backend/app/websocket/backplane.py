@@ -0,0 +1,225 @@
+"""
+Backplanes carry chat events between the workers that hold WebSockets.
+
+The connection manager only knows the sockets of its own process, so with
+several uvicorn workers or replicas a message sent through worker A would
+never reach a socket held by worker B. Every fan-out (room broadcasts,
+typing indicators, message status, personal messages) is therefore
+published as an event on a backplane, and each worker's manager delivers
+the events it receives to its own sockets.
+
+``InProcessBackplane``
+    Delivers to the managers subscribed to the same instance. One process
+    has one manager, so this is the single-worker setup; tests subscribe two
+    managers to one instance to stand in for two workers.
+``PostgresBackplane``
+    Delivers locally, then ``NOTIFY``s the event on a channel that every
+    worker ``LISTEN``s on, over one dedicated asyncpg connection per worker.
+    Events are at-most-once: a worker whose listener connection drops misses
+    what is sent until it reconnects, and its clients catch up through the
+    delta sync endpoint like after any reconnect.
+
+Events are JSON-serializable dicts; the manager pre-serializes the frame so
+receivers only enqueue it.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from config import CHAT_BACKPLANE, CHAT_BACKPLANE_CHANNEL, CHAT_BACKPLANE_URL
+
+logger = logging.getLogger(__name__)
+
+BACKPLANES = ("inprocess", "postgres")
+
+# NOTIFY payloads must be shorter than 8000 bytes; larger events are split
+# into parts of this many characters (the serialized event is pure ASCII)
+NOTIFY_CHUNK_CHARS = 7000
+
+# Partly received events are dropped past this many, oldest first
+MAX_PARTIAL_EVENTS = 1024
+
+RECONNECT_MAX_DELAY_SECONDS = 30
+
+EventHandler = Callable[[Dict], Awaitable[None]]
+
+
+class Backplane:
+    """Publish/subscribe interface the connection manager fans out through"""
+
+    def __init__(self):
+        self._handlers: List[EventHandler] = []
+
+    def subscribe(self, handler: EventHandler):
+        """Call ``handler`` with every event published, here or elsewhere"""
+        self._handlers.append(handler)
+
+    async def _dispatch(self, event: Dict):
+        for handler in self._handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"Error delivering backplane event: {e}")
+
+    async def publish(self, event: Dict):
+        raise NotImplementedError
+
+    async def start(self):
+        """Begin receiving other workers' events"""
+
+    async def stop(self):
+        """Stop receiving events and release connections"""
+
+    def stats(self) -> Dict:
+        return {"backplane": type(self).__name__}
+
+
+class InProcessBackplane(Backplane):
+    """Events reach only the managers subscribed to this instance"""
+
+    async def publish(self, event: Dict):
+        await self._dispatch(event)
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    # asyncpg takes a plain postgresql:// DSN, sslmode included
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class PostgresBackplane(Backplane):
+    """Events fan out to every worker through Postgres LISTEN/NOTIFY
+
+    Each notification is ``"<origin> <event id> <part> <parts> <data>"``,
+    ``data`` being a slice of the JSON-encoded event. A worker skips its own
+    notifications since it has already delivered those events locally.
+    """
+
+    def __init__(self, database_url: str, channel: str = CHAT_BACKPLANE_CHANNEL, connect=asyncpg.connect):
+        super().__init__()
+        self.dsn = _asyncpg_dsn(database_url)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._connect = connect
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._next_event_id = 0
+        self._partial: Dict[Tuple[str, str], List[Optional[str]]] = {}
+        self._reconnecting: Optional[asyncio.Task] = None
+        self._stopped = False
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+        self.reconnects = 0
+
+    async def start(self):
+        self._stopped = False
+        try:
+            await self._listen()
+        except Exception as e:
+            # Serve this worker's own sockets meanwhile rather than fail startup
+            logger.error(f"Chat backplane could not connect: {e}")
+            self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _listen(self):
+        connection = await self._connect(self.dsn)
+        connection.add_termination_listener(self._on_termination)
+        await connection.add_listener(self.channel, self._on_notification)
+        self._connection = connection
+        logger.info(f"Chat backplane listening on {self.channel!r}")
+
+    def _on_termination(self, connection):
+        if self._connection is connection:
+            self._connection = None
+        if not self._stopped and (self._reconnecting is None or self._reconnecting.done()):
+            logger.warning("Chat backplane connection lost; reconnecting")
+            self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 1
+        while not self._stopped and self._connection is None:
+            try:
+                await self._listen()
+                self.reconnects += 1
+                return
+            except Exception as e:
+                logger.error(f"Chat backplane reconnect failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+
+    async def stop(self):
+        self._stopped = True
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.remove_listener(self.channel, self._on_notification)
+            finally:
+                await connection.close()
+
+    async def publish(self, event: Dict):
+        await self._dispatch(event)
+        connection = self._connection
+        if connection is None:
+            # Not started (or reconnecting): other workers miss this event
+            self.publish_errors += 1
+            return
+        data = json.dumps(event, separators=(",", ":"))
+        parts = [data[i:i + NOTIFY_CHUNK_CHARS] for i in range(0, len(data), NOTIFY_CHUNK_CHARS)]
+        self._next_event_id += 1
+        event_id = self._next_event_id
+        try:
+            # One connection serves both NOTIFY and LISTEN; queries on it
+            # must not overlap, and the parts must go out in order
+            async with self._lock:
+                for index, part in enumerate(parts):
+                    payload = f"{self.origin} {event_id} {index} {len(parts)} {part}"
+                    await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            self.published += 1
+        except Exception as e:
+            self.publish_errors += 1
+            logger.error(f"Error publishing chat backplane event: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload: str):
+        origin, event_id, index, count, data = payload.split(" ", 4)
+        if origin == self.origin:
+            return
+        index, count = int(index), int(count)
+        if count > 1:
+            key = (origin, event_id)
+            parts = self._partial.setdefault(key, [None] * count)
+            parts[index] = data
+            if any(part is None for part in parts):
+                while len(self._partial) > MAX_PARTIAL_EVENTS:
+                    del self._partial[next(iter(self._partial))]
+                return
+            del self._partial[key]
+            data = "".join(parts)
+        self.received += 1
+        asyncio.get_running_loop().create_task(self._dispatch(json.loads(data)))
+
+    def stats(self) -> Dict:
+        return {
+            "backplane": type(self).__name__,
+            "channel": self.channel,
+            "connected": self._connection is not None,
+            "published": self.published,
+            "received": self.received,
+            "publish_errors": self.publish_errors,
+            "reconnects": self.reconnects,
+        }
+
+
+def create_backplane(kind: str = CHAT_BACKPLANE) -> Backplane:
+    """The backplane CHAT_BACKPLANE selects"""
+    if kind == "inprocess":
+        return InProcessBackplane()
+    if kind == "postgres":
+        return PostgresBackplane(CHAT_BACKPLANE_URL)
+    raise ValueError(f"Unknown chat backplane: {kind!r} (expected one of {BACKPLANES})")
@@ -4,14 +4,20 @@ Provides WebSocket endpoints for real-time messaging
 """
 import json
 import asyncio
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.dependencies.db import get_db
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+from app.dependencies.db import get_db, get_session_factory
 from app.dependencies.auth import get_current_user_websocket
 from app.models import UserORM, ServiceRequestORM, ChatMessageORM
 from app.schemas import ChatMessageCreate, ChatMessageRead
 from app.websocket.connection_manager import manager
+from app.websocket.message_writer import ChatMessageWriter, PendingMessage, get_message_writer
+from app.websocket.replay_log import ResumePlan
+from app.websocket.typing_state import TypingTracker
+from app.services.chat_read_state import advance_watermarks
+from app.services.conversation_participants import is_participant
+from config import CHAT_SESSION_MAX_SUBSCRIPTIONS
 from datetime import datetime
 import logging
 
@@ -19,100 +25,169 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+async def _authenticate_user(
+    db: Session, token: Optional[str]
+) -> Tuple[Optional[UserORM], Optional[str]]:
+    """The user the token belongs to, or the reason to close the socket"""
+    if not token:
+        return None, "Authentication required"
+        
+    # Get current user from token
+    current_user = await get_current_user_websocket(token=token, db=db)
+    if not current_user:
+        return None, "Invalid authentication"
+    return current_user, None
+
+def _access_denied_reason(db: Session, user_id: int, service_request_id: int) -> Optional[str]:
+    """Why the user may not join the conversation, or None if they may"""
+    # Verify user has access (and that the service request exists)
+    if is_participant(db, user_id, service_request_id):
+        return None
+    if db.get(ServiceRequestORM, service_request_id) is None:
+        return "Service request not found"
+    return "Access denied"
+
+async def _authenticate(
+    db: Session, token: Optional[str], service_request_id: int
+) -> Tuple[Optional[UserORM], Optional[str]]:
+    """The connecting user, or the reason to close the socket"""
+    current_user, close_reason = await _authenticate_user(db, token)
+    if current_user is None:
+        return None, close_reason
+    close_reason = _access_denied_reason(db, current_user.id, service_request_id)
+    if close_reason:
+        return None, close_reason
+    return current_user, None
+
+def _plan_resume(
+    session_factory: sessionmaker,
+    service_request_id: int,
+    user_id: int,
+    replay_epoch: Optional[str],
+    resume_from: int,
+) -> Tuple[ResumePlan, List[dict]]:
+    """How the socket catches up, with the messages to load for it"""
+    plan = manager.replay_log.plan(service_request_id, replay_epoch, resume_from, user_id)
+    messages = []
+    if plan.message_ids:
+        # Messages older than the frame log: one primary-key range read
+        with session_factory() as db:
+            messages = [
+                ChatMessageRead.model_validate(message).model_dump(mode="json")
+                for message in db.query(ChatMessageORM)
+                .options(joinedload(ChatMessageORM.sender))
+                .filter(
+                    ChatMessageORM.service_request_id == service_request_id,
+                    ChatMessageORM.id.in_(plan.message_ids),
+                )
+                .order_by(ChatMessageORM.id)
+            ]
+    return plan, messages
+
+async def _handle_frame(
+    websocket: WebSocket,
+    message_data: dict,
+    current_user: UserORM,
+    service_request_id: int,
+    session_factory: sessionmaker,
+    writer: ChatMessageWriter,
+):
+    """Handle one conversation frame from a chat or session socket"""
+    if message_data.get("type") == "message":
+        await handle_chat_message(message_data, current_user, service_request_id, writer)
+    elif message_data.get("type") == "typing":
+        await handle_typing_indicator(message_data, current_user, service_request_id)
+    elif message_data.get("type") == "message_read":
+        with session_factory() as db:
+            await handle_message_read(message_data, current_user, service_request_id, db)
+    elif message_data.get("type") == "message_delivered":
+        with session_factory() as db:
+            await handle_message_delivered(message_data, current_user, service_request_id, db)
+    elif message_data.get("type") == "ping":
+        # Handle ping to keep connection alive
+        await manager.send_to_connection(websocket, json.dumps({"type": "pong"}))
+    else:
+        logger.warning(f"Unknown message type: {message_data.get('type')}")
+
 @router.websocket("/chat/{service_request_id}")
 async def websocket_chat_endpoint(
     websocket: WebSocket,
     service_request_id: int,
     token: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    resume_from: Optional[int] = Query(None),
+    replay_epoch: Optional[str] = Query(None),
+    session_factory: sessionmaker = Depends(get_session_factory),
+    writer: ChatMessageWriter = Depends(get_message_writer)
 ):
-    """WebSocket endpoint for real-time chat"""
-    
+    """WebSocket endpoint for real-time chat
+
+    No database session lives as long as the socket: authentication and each
+    frame that needs the database open their own and close it before the
+    next receive, so an idle socket holds no pooled connection.
+
+    A reconnecting client passes the ``replay_epoch`` it was given and the
+    last ``seq`` it saw as ``resume_from``, and is sent what it missed
+    before any live frame (see app.websocket.replay_log).
+    """
+    connected = False
     try:
-        # Authenticate user using token
-        if not token:
-            await websocket.close(code=1008, reason="Authentication required")
-            return
-            
-        # Get current user from token
-        current_user = await get_current_user_websocket(token=token, db=db)
-        if not current_user:
-            await websocket.close(code=1008, reason="Invalid authentication")
-            return
-            
-        # Refresh the user from the database to get the latest data
-        current_user = db.query(UserORM).filter(UserORM.id == current_user.id).first()
-        if not current_user:
-            await websocket.close(code=1008, reason="User not found")
-            return
-            
-        # Verify service request exists and user has access
-        service_request = (
-            db.query(ServiceRequestORM)
-            .filter(ServiceRequestORM.id == service_request_id)
-            .first()
-        )
-        
-        if not service_request:
-            await websocket.close(code=1008, reason="Service request not found")
-            return
-            
-        # Check access control: Owner OR Assigned Provider
-        is_owner = service_request.user_id == current_user.id
-        is_assigned_provider = service_request.assigned_provider_id == current_user.id
-        
-        if not (is_owner or is_assigned_provider):
-            await websocket.close(code=1008, reason="Access denied")
+        with session_factory() as db:
+            current_user, close_reason = await _authenticate(db, token, service_request_id)
+        if close_reason:
+            await websocket.close(code=1008, reason=close_reason)
             return
+        resume = None
+        if resume_from is not None:
+            resume = _plan_resume(
+                session_factory, service_request_id, current_user.id, replay_epoch, resume_from
+            )
             
         # Connect to WebSocket
         await manager.connect(websocket, current_user.id, service_request_id)
+        manager.presence.remember(current_user)
+        connected = True
         
-        # Send connection confirmation
-        await websocket.send_text(json.dumps({
+        # Send connection confirmation, then any replay, with no await in
+        # between that would let live frames overtake them
+        epoch, seq = manager.replay_log.position(service_request_id)
+        manager.queue_to_connection(websocket, json.dumps({
             "type": "connection_established",
             "service_request_id": service_request_id,
             "user_id": current_user.id,
             "username": current_user.username,
+            "replay_epoch": epoch,
+            "seq": seq,
             "timestamp": datetime.utcnow().isoformat()
         }))
+        if resume is not None:
+            manager.resume(websocket, service_request_id, *resume)
+        await manager.publish_presence()
         
         logger.info(f"User {current_user.username} connected to chat {service_request_id}")
         
         # Listen for messages
         while True:
             try:
-                # Receive message from client
+                # Receive message from client; any frame is a heartbeat
                 data = await websocket.receive_text()
+                manager.heartbeat(websocket)
                 message_data = json.loads(data)
-                
-                # Handle different message types
-                if message_data.get("type") == "message":
-                    await handle_chat_message(message_data, current_user, service_request_id, db)
-                elif message_data.get("type") == "typing":
-                    await handle_typing_indicator(message_data, current_user, service_request_id)
-                elif message_data.get("type") == "message_read":
-                    await handle_message_read(message_data, current_user, service_request_id, db)
-                elif message_data.get("type") == "message_delivered":
-                    await handle_message_delivered(message_data, current_user, service_request_id, db)
-                elif message_data.get("type") == "ping":
-                    # Handle ping to keep connection alive
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-                else:
-                    logger.warning(f"Unknown message type: {message_data.get('type')}")
+                await _handle_frame(
+                    websocket, message_data, current_user, service_request_id, session_factory, writer
+                )
                     
             except WebSocketDisconnect:
                 logger.info(f"User {current_user.username} disconnected from chat {service_request_id}")
                 break
             except json.JSONDecodeError:
                 logger.error("Invalid JSON received from WebSocket")
-                await websocket.send_text(json.dumps({
+                await manager.send_to_connection(websocket, json.dumps({
                     "type": "error",
                     "message": "Invalid JSON format"
                 }))
             except Exception as e:
                 logger.error(f"Error processing WebSocket message: {e}")
-                await websocket.send_text(json.dumps({
+                await manager.send_to_connection(websocket, json.dumps({
                     "type": "error",
                     "message": "Internal server error"
                 }))
@@ -125,11 +200,176 @@ async def websocket_chat_endpoint(
             pass
     finally:
         # Clean up connection
-        if 'current_user' in locals():
+        if connected:
             await manager.disconnect(websocket, current_user.id, service_request_id)
+            await manager.publish_presence()
+            await typing_tracker.stop(service_request_id, current_user.id)
 
-async def handle_chat_message(message_data: dict, current_user: UserORM, service_request_id: int, db: Session):
-    """Handle incoming chat message via WebSocket"""
+@router.websocket("/session")
+async def websocket_session_endpoint(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    session_factory: sessionmaker = Depends(get_session_factory),
+    writer: ChatMessageWriter = Depends(get_message_writer)
+):
+    """One WebSocket for all of a user's conversations
+
+    Authenticates once per connection. The client then picks the
+    conversations it hears from with ``{"type": "subscribe",
+    "service_request_id": N}`` (answered by ``subscribed`` or an ``error``)
+    and ``unsubscribe``, and names the conversation in every other frame,
+    which /ws/chat frames otherwise match. Personal frames (acknowledgements,
+    errors) reach the socket whatever it is subscribed to.
+    """
+    connected = False
+    try:
+        with session_factory() as db:
+            current_user, close_reason = await _authenticate_user(db, token)
+        if close_reason:
+            await websocket.close(code=1008, reason=close_reason)
+            return
+
+        await manager.connect(websocket, current_user.id)
+        manager.presence.remember(current_user)
+        connected = True
+
+        await manager.send_to_connection(websocket, json.dumps({
+            "type": "connection_established",
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "timestamp": datetime.utcnow().isoformat()
+        }))
+
+        logger.info(f"User {current_user.username} opened a chat session")
+
+        while True:
+            try:
+                data = await websocket.receive_text()
+                manager.heartbeat(websocket)
+                message_data = json.loads(data)
+                frame_type = message_data.get("type")
+                if frame_type == "ping":
+                    await manager.send_to_connection(websocket, json.dumps({"type": "pong"}))
+                    continue
+
+                service_request_id = message_data.get("service_request_id")
+                if not isinstance(service_request_id, int) or isinstance(service_request_id, bool):
+                    await manager.send_to_connection(websocket, json.dumps({
+                        "type": "error",
+                        "message": "service_request_id is required"
+                    }))
+                elif frame_type == "subscribe":
+                    await handle_subscribe(websocket, message_data, current_user, service_request_id, session_factory)
+                elif frame_type == "unsubscribe":
+                    if manager.unsubscribe(websocket, service_request_id):
+                        await manager.publish_presence()
+                        await typing_tracker.stop(service_request_id, current_user.id)
+                    await manager.send_to_connection(websocket, json.dumps({
+                        "type": "unsubscribed",
+                        "service_request_id": service_request_id
+                    }))
+                elif not manager.is_subscribed(websocket, service_request_id):
+                    await manager.send_to_connection(websocket, json.dumps({
+                        "type": "error",
+                        "message": "Not subscribed to this conversation",
+                        "service_request_id": service_request_id
+                    }))
+                else:
+                    await _handle_frame(
+                        websocket, message_data, current_user, service_request_id, session_factory, writer
+                    )
+
+            except WebSocketDisconnect:
+                logger.info(f"User {current_user.username} closed their chat session")
+                break
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON received from WebSocket")
+                await manager.send_to_connection(websocket, json.dumps({
+                    "type": "error",
+                    "message": "Invalid JSON format"
+                }))
+            except Exception as e:
+                logger.error(f"Error processing WebSocket message: {e}")
+                await manager.send_to_connection(websocket, json.dumps({
+                    "type": "error",
+                    "message": "Internal server error"
+                }))
+
+    except Exception as e:
+        logger.error(f"WebSocket session error: {e}")
+        try:
+            await websocket.close(code=1011, reason="Internal server error")
+        except:
+            pass
+    finally:
+        if connected:
+            rooms = manager.subscriptions(websocket)
+            await manager.disconnect(websocket, current_user.id)
+            await manager.publish_presence()
+            for service_request_id in rooms:
+                await typing_tracker.stop(service_request_id, current_user.id)
+
+async def handle_subscribe(
+    websocket: WebSocket,
+    message_data: dict,
+    current_user: UserORM,
+    service_request_id: int,
+    session_factory: sessionmaker,
+):
+    """Join a session socket to a conversation the user takes part in
+
+    Like /ws/chat, the frame may carry ``replay_epoch`` and ``resume_from``
+    to be sent what was missed since.
+    """
+    if (
+        not manager.is_subscribed(websocket, service_request_id)
+        and len(manager.subscriptions(websocket)) >= CHAT_SESSION_MAX_SUBSCRIPTIONS
+    ):
+        reason = "Too many subscriptions"
+    else:
+        # A membership cache hit needs no database connection
+        with session_factory() as db:
+            reason = _access_denied_reason(db, current_user.id, service_request_id)
+    resume_from = message_data.get("resume_from")
+    if not reason and resume_from is not None and (
+        not isinstance(resume_from, int) or isinstance(resume_from, bool)
+    ):
+        reason = "resume_from must be an integer"
+    if reason:
+        await manager.send_to_connection(websocket, json.dumps({
+            "type": "error",
+            "message": reason,
+            "service_request_id": service_request_id
+        }))
+        return
+    resume = None
+    if resume_from is not None:
+        resume = _plan_resume(
+            session_factory, service_request_id, current_user.id, message_data.get("replay_epoch"), resume_from
+        )
+
+    # Joined, confirmed and replayed with no await in between (see /ws/chat)
+    joined = manager.subscribe(websocket, service_request_id)
+    epoch, seq = manager.replay_log.position(service_request_id)
+    manager.queue_to_connection(websocket, json.dumps({
+        "type": "subscribed",
+        "service_request_id": service_request_id,
+        "replay_epoch": epoch,
+        "seq": seq,
+        "timestamp": datetime.utcnow().isoformat()
+    }))
+    # Already subscribed: live frames were never missed
+    if resume is not None and joined:
+        manager.resume(websocket, service_request_id, *resume)
+    await manager.publish_presence()
+
+async def handle_chat_message(message_data: dict, current_user: UserORM, service_request_id: int, writer: ChatMessageWriter):
+    """Handle incoming chat message via WebSocket
+
+    The message is acknowledged with its provisional id as soon as it is
+    queued; the writer stores, broadcasts and confirms it (see
+    app.websocket.message_writer).
+    """
     try:
         # Create message object
         message_create = ChatMessageCreate(
@@ -162,42 +402,33 @@ async def handle_chat_message(message_data: dict, current_user: UserORM, service
                 }
             }
 
-        # Create message in database
-        db_message = ChatMessageORM(
+        pending = PendingMessage(
             service_request_id=service_request_id,
             sender_id=current_user.id,
             message=message_create.message,
             message_type=message_create.message_type,
             message_metadata=message_metadata,
-            is_read=False
         )
+        client_message_id = message_data.get("client_message_id")
+        if client_message_id is not None:
+            if not isinstance(client_message_id, str) or not 0 < len(client_message_id) <= 64:
+                await manager.send_personal_message(json.dumps({
+                    "type": "error",
+                    "message": "client_message_id must be 1-64 characters"
+                }), current_user.id)
+                return
+            pending.client_message_id = client_message_id
 
-        db.add(db_message)
-        db.commit()
-        db.refresh(db_message)
-        
-        # Convert to response format
-        message_response = ChatMessageRead.model_validate(db_message)
-        
-        # Broadcast to all users in the conversation
-        broadcast_data = {
-            "type": "new_message",
-            "message": message_response.model_dump(),
-            "service_request_id": service_request_id,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await manager.broadcast_message(broadcast_data, service_request_id, exclude_user_id=current_user.id)
-        
-        # Send confirmation to sender
+        # Queue it for the next group commit and acknowledge the provisional id
+        await writer.submit(pending)
+        await typing_tracker.stop(service_request_id, current_user.id)
         await manager.send_personal_message(json.dumps({
-            "type": "message_sent",
-            "message_id": db_message.id,
+            "type": "message_accepted",
+            "client_message_id": pending.client_message_id,
+            "service_request_id": service_request_id,
             "timestamp": datetime.utcnow().isoformat()
         }), current_user.id)
         
-        logger.info(f"Message {db_message.id} sent by {current_user.username} in chat {service_request_id}")
-        
     except Exception as e:
         logger.error(f"Error handling chat message: {e}")
         await manager.send_personal_message(json.dumps({
@@ -205,10 +436,18 @@ async def handle_chat_message(message_data: dict, current_user: UserORM, service
             "message": "Failed to send message"
         }), current_user.id)
 
+async def _emit_typing(service_request_id: int, user_id: int, is_typing: bool):
+    await manager.send_typing_indicator(service_request_id, user_id, is_typing)
+
+
+# Only start/stop transitions reach the room, not every keystroke's frame
+typing_tracker = TypingTracker(_emit_typing)
+
+
 async def handle_typing_indicator(message_data: dict, current_user: UserORM, service_request_id: int):
     """Handle typing indicator"""
     is_typing = message_data.get("is_typing", False)
-    await manager.send_typing_indicator(service_request_id, current_user.id, is_typing)
+    await typing_tracker.update(service_request_id, current_user.id, bool(is_typing))
 
 async def handle_message_delivered(message_data: dict, current_user: UserORM, service_request_id: int, db: Session):
     """Handle message delivered status"""
@@ -217,16 +456,22 @@ async def handle_message_delivered(message_data: dict, current_user: UserORM, se
         if not message_id:
             return
             
-        # Update message as delivered
+        # Advance the delivered watermark up to this message
         message = db.query(ChatMessageORM).filter(ChatMessageORM.id == message_id).first()
-        if message and message.sender_id != current_user.id:  # Don't mark own messages as delivered
-            if message.delivery_status != "read":
-                message.delivery_status = "delivered"
-                message.delivered_at = datetime.utcnow()
-                db.commit()
-                
-                # Broadcast delivered status
-                await manager.send_message_status(message_id, "delivered", current_user.id)
+        if (
+            message
+            and message.service_request_id == service_request_id
+            and message.sender_id != current_user.id  # Don't mark own messages as delivered
+        ):
+            advance_watermarks(
+                db, current_user.id, service_request_id, delivered_up_to=message.id
+            )
+            db.commit()
+
+            # Broadcast delivered status
+            await manager.send_message_status(
+                message.id, "delivered", current_user.id, service_request_id
+            )
                 
     except Exception as e:
         logger.error(f"Error handling message delivered: {e}")
@@ -238,50 +483,57 @@ async def handle_message_read(message_data: dict, current_user: UserORM, service
         if not message_id:
             return
             
-        # Update message as read
+        # Advance the read watermark up to this message
         message = db.query(ChatMessageORM).filter(ChatMessageORM.id == message_id).first()
-        if message and message.sender_id != current_user.id:  # Don't mark own messages as read
-            message.is_read = True
+        if (
+            message
+            and message.service_request_id == service_request_id
+            and message.sender_id != current_user.id  # Don't mark own messages as read
+        ):
+            advance_watermarks(
+                db, current_user.id, service_request_id, read_up_to=message.id
+            )
             db.commit()
             
             # Broadcast read status
-            await manager.send_message_status(message_id, "read", current_user.id)
+            await manager.send_message_status(
+                message.id, "read", current_user.id, service_request_id
+            )
             
     except Exception as e:
         logger.error(f"Error handling message read: {e}")
 
 @router.get("/chat/{service_request_id}/online-users")
-async def get_online_users(service_request_id: int, db: Session = Depends(get_db)):
-    """Get list of users currently online in a chat"""
+def get_online_users(service_request_id: int, db: Session = Depends(get_db)):
+    """Get list of users currently online in a chat
+
+    Answered from the presence registry; only users whose profile it lacks
+    are looked up, in one query.
+    """
     try:
         # Get service request
-        service_request = (
-            db.query(ServiceRequestORM)
-            .filter(ServiceRequestORM.id == service_request_id)
-            .first()
-        )
+        service_request = db.get(ServiceRequestORM, service_request_id)
         
         if not service_request:
             raise HTTPException(status_code=404, detail="Service request not found")
             
         # Get online user IDs
-        online_user_ids = set()
-        if service_request_id in manager.service_request_connections:
-            for connection in manager.service_request_connections[service_request_id]:
-                user_id = manager._find_user_for_connection(connection)
-                if user_id:
-                    online_user_ids.add(user_id)
-                    
+        online_user_ids = manager.online_user_ids(service_request_id)
+
         # Get user details
+        profiles = manager.presence.profiles(online_user_ids)
+        missing = online_user_ids - profiles.keys()
+        if missing:
+            for user in db.query(UserORM).filter(UserORM.id.in_(missing)):
+                manager.presence.remember(user)
+            profiles = manager.presence.profiles(online_user_ids)
         online_users = []
-        for user_id in online_user_ids:
-            user = db.query(UserORM).filter(UserORM.id == user_id).first()
-            if user:
-                online_users.append({
-                    "id": user.id,
-                    "username": user.username,
-                    "is_provider": user.is_provider
-                })
+        for user_id in sorted(profiles):
+            last_seen = manager.presence.last_seen(user_id)
+            online_users.append({
+                **profiles[user_id],
+                "last_seen": last_seen.isoformat() if last_seen else None
+            })
                 
         return {
             "service_request_id": service_request_id,
@@ -289,6 +541,8 @@ async def get_online_users(service_request_id: int, db: Session = Depends(get_db
             "count": len(online_users)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting online users: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -4,106 +4,425 @@ Handles WebSocket connections and message broadcasting
 """
 import json
 import asyncio
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
-from app.dependencies.db import get_db
 from app.models import UserORM, ServiceRequestORM, ChatMessageORM
 from app.schemas import ChatMessageRead
+from app.services.chat_hot_buffer import HotMessageBuffer, hot_messages
+from app.services.message_routes import message_routes
+from app.websocket.backplane import Backplane, create_backplane
+from app.websocket.presence import PresenceRegistry
+from app.websocket.replay_log import ReplayLog, ResumePlan, frame_message_ids
+from app.websocket.send_queue import OVERFLOW_POLICIES, ConnectionOutbox, SendQueueMetrics
+from app.websocket.status_batcher import StatusBatcher
+from config import CHAT_STATUS_BATCH_MS, CHAT_WS_SEND_QUEUE_OVERFLOW, CHAT_WS_SEND_QUEUE_SIZE
+from database import SessionLocal
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Room frames that carry newly written messages
+MESSAGE_FRAMES = ("new_message", "new_messages")
+
 class ConnectionManager:
-    """Manages WebSocket connections for real-time chat"""
+    """Manages WebSocket connections for real-time chat
+
+    Every socket is indexed three ways: by user, by conversation, and from the
+    socket itself back to its (user_id, service_request_id) and the rooms it
+    is in. Broadcasts, disconnect cleanup and presence therefore cost
+    O(sockets in the room), however many connections the process holds.
+
+    A /ws/chat socket is in the one room it was opened for; a /ws/session
+    socket joins and leaves rooms with ``subscribe`` and ``unsubscribe``.
+
+    Sends never wait on a client: each socket has a ConnectionOutbox whose
+    writer task does the actual send_text, and a socket whose queue is full
+    is handled by the ``overflow`` policy (see app.websocket.send_queue).
+
+    Fan-out to a user or a room is published on the backplane, so sockets
+    held by other workers get it too (see app.websocket.backplane). The
+    indexes, and so presence, only cover this process's sockets.
+
+    Messages written on any worker reach this process's hot message buffer
+    through the backplane too: from the ``new_message`` / ``new_messages``
+    room frames, or from ``publish_messages`` for sends that broadcast none.
+
+    Room frames are stamped with a per-conversation ``seq`` as they are
+    delivered, and logged so a reconnecting socket can resume from the last
+    one it saw (see app.websocket.replay_log).
+
+    Every frame a socket sends counts as a heartbeat; sockets silent past the
+    presence TTL are closed (see app.websocket.presence). A user coming
+    online in a room, or leaving it with their last socket, is announced to
+    the room with a ``presence`` frame. Index changes only queue those
+    frames: the socket endpoints broadcast them with ``publish_presence``
+    once a socket is set up or torn down, and the manager does so itself
+    after dropping a socket.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        send_queue_size: int = CHAT_WS_SEND_QUEUE_SIZE,
+        overflow: str = CHAT_WS_SEND_QUEUE_OVERFLOW,
+        backplane: Optional[Backplane] = None,
+        status_batch_ms: float = CHAT_STATUS_BATCH_MS,
+        replay_log: Optional[ReplayLog] = None,
+        presence: Optional[PresenceRegistry] = None,
+        hot_buffer: Optional[HotMessageBuffer] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown send queue overflow policy: {overflow!r}")
+        self.send_queue_size = send_queue_size
+        self.overflow = overflow
+        self.send_metrics = SendQueueMetrics()
         # Store active connections by user_id
         self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Store connections by service_request_id for targeted messaging
         self.service_request_connections: Dict[int, Set[WebSocket]] = {}
+        # Reverse index: socket -> (user_id, service_request_id or None)
+        self.connection_owners: Dict[WebSocket, Tuple[int, Optional[int]]] = {}
+        # Users present in each conversation, with their socket count there
+        self.room_members: Dict[int, Dict[int, int]] = {}
+        # Rooms each socket is in
+        self.connection_rooms: Dict[WebSocket, Set[int]] = {}
+        # Outbound queue and writer task of each socket
+        self.outboxes: Dict[WebSocket, ConnectionOutbox] = {}
+        self.replay_log = replay_log or ReplayLog()
+        self.presence = presence or PresenceRegistry()
+        self.hot_buffer = hot_buffer or hot_messages
+        # presence frames waiting to be broadcast: (service_request_id, frame)
+        self._presence_changes: List[Tuple[int, dict]] = []
+        self._presence_flush: Optional[asyncio.Task] = None
+        self._expiry_task: Optional[asyncio.Task] = None
+        self.backplane = backplane or create_backplane()
+        self.backplane.subscribe(self._deliver)
+        # Delivered/read events, one broadcast per conversation per tick
+        self.status_batcher = StatusBatcher(self.broadcast_message, status_batch_ms / 1000)
+
+    async def start(self):
+        """Start receiving events published by other workers, and expiring stale sockets"""
+        await self.backplane.start()
+        self._expiry_task = asyncio.get_running_loop().create_task(self._expire_stale_periodically())
+
+    async def stop(self):
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
+        await self.backplane.stop()
         
     async def connect(self, websocket: WebSocket, user_id: int, service_request_id: int = None):
         """Connect a user to WebSocket"""
         await websocket.accept()
-        
-        # Add to user connections
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        self.active_connections[user_id].add(websocket)
-        
-        # Add to service request connections if specified
-        if service_request_id:
-            if service_request_id not in self.service_request_connections:
-                self.service_request_connections[service_request_id] = set()
-            self.service_request_connections[service_request_id].add(websocket)
-            
+        self._register(websocket, user_id, service_request_id)
         logger.info(f"User {user_id} connected to WebSocket. Service Request: {service_request_id}")
-        
-    async def disconnect(self, websocket: WebSocket, user_id: int, service_request_id: int = None):
-        """Disconnect a user from WebSocket"""
-        # Remove from user connections
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-                
-        # Remove from service request connections
-        if service_request_id and service_request_id in self.service_request_connections:
-            self.service_request_connections[service_request_id].discard(websocket)
-            if not self.service_request_connections[service_request_id]:
+
+    def _register(self, websocket: WebSocket, user_id: int, service_request_id: Optional[int]):
+        if websocket in self.connection_owners:
+            self._unregister(websocket)
+        self.connection_owners[websocket] = (user_id, service_request_id or None)
+        self.connection_rooms[websocket] = set()
+        self.outboxes[websocket] = ConnectionOutbox(
+            websocket, self.send_queue_size, self.send_metrics, self._drop_failed_connection
+        )
+        self.active_connections.setdefault(user_id, set()).add(websocket)
+        self.presence.touch(websocket, user_id)
+        if service_request_id:
+            self._join(websocket, user_id, service_request_id)
+
+    def _join(self, websocket: WebSocket, user_id: int, service_request_id: int):
+        self.connection_rooms[websocket].add(service_request_id)
+        self.service_request_connections.setdefault(service_request_id, set()).add(websocket)
+        members = self.room_members.setdefault(service_request_id, {})
+        members[user_id] = members.get(user_id, 0) + 1
+        if members[user_id] == 1:
+            self._presence_changed(service_request_id, user_id, "online")
+
+    def _leave(self, websocket: WebSocket, user_id: int, service_request_id: int):
+        room = self.service_request_connections.get(service_request_id)
+        if room is not None:
+            room.discard(websocket)
+            if not room:
                 del self.service_request_connections[service_request_id]
-                
+        members = self.room_members.get(service_request_id)
+        if members is not None and user_id in members:
+            members[user_id] -= 1
+            if not members[user_id]:
+                del members[user_id]
+                self._presence_changed(service_request_id, user_id, "offline")
+            if not members:
+                del self.room_members[service_request_id]
+
+    def _unregister(self, websocket: WebSocket) -> Optional[Tuple[int, Optional[int]]]:
+        owner = self.connection_owners.pop(websocket, None)
+        if owner is None:
+            return None
+        user_id, _ = owner
+        self.outboxes.pop(websocket).close()
+        self.presence.forget(websocket)
+
+        for service_request_id in self.connection_rooms.pop(websocket, ()):
+            self._leave(websocket, user_id, service_request_id)
+
+        connections = self.active_connections.get(user_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[user_id]
+                self.presence.forget_user(user_id)
+        return owner
+
+    def heartbeat(self, websocket: WebSocket):
+        """Record that a socket is alive; called for every frame it sends"""
+        owner = self.connection_owners.get(websocket)
+        if owner is not None:
+            self.presence.touch(websocket, owner[0])
+
+    def _presence_changed(self, service_request_id: int, user_id: int, status: str):
+        last_seen = self.presence.last_seen(user_id)
+        self._presence_changes.append((service_request_id, {
+            "type": "presence",
+            "service_request_id": service_request_id,
+            "user_id": user_id,
+            "status": status,
+            "last_seen": last_seen.isoformat() if last_seen else None,
+        }))
+
+    def _schedule_presence(self):
+        """publish_presence from code that cannot wait for it"""
+        if self._presence_flush is None or self._presence_flush.done():
+            self._presence_flush = asyncio.get_running_loop().create_task(self.publish_presence())
+
+    async def publish_presence(self):
+        """Broadcast the presence changes queued so far"""
+        while self._presence_changes:
+            changes, self._presence_changes = self._presence_changes, []
+            for service_request_id, frame in changes:
+                await self.broadcast_message(frame, service_request_id, exclude_user_id=frame["user_id"])
+
+    async def expire_stale_connections(self) -> int:
+        """Close the sockets that missed their heartbeats"""
+        stale = self.presence.stale()
+        for websocket in stale:
+            logger.info(f"Closing stale WebSocket of user {self._find_user_for_connection(websocket)}")
+            self._unregister(websocket)
+            asyncio.get_running_loop().create_task(self._close(websocket, 1001, "Heartbeat timeout"))
+        self.presence.expired += len(stale)
+        await self.publish_presence()
+        return len(stale)
+
+    async def _expire_stale_periodically(self):
+        while True:
+            await asyncio.sleep(self.presence.ttl_seconds / 2)
+            try:
+                await self.expire_stale_connections()
+            except Exception as e:
+                logger.error(f"Error expiring stale WebSocket connections: {e}")
+
+    def subscribe(self, websocket: WebSocket, service_request_id: int) -> bool:
+        """Add a connected socket to a room; False if it is not connected or already there"""
+        owner = self.connection_owners.get(websocket)
+        if owner is None or service_request_id in self.connection_rooms[websocket]:
+            return False
+        self._join(websocket, owner[0], service_request_id)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, service_request_id: int) -> bool:
+        """Remove a socket from a room; False if it was not there"""
+        rooms = self.connection_rooms.get(websocket)
+        if rooms is None or service_request_id not in rooms:
+            return False
+        rooms.discard(service_request_id)
+        self._leave(websocket, self.connection_owners[websocket][0], service_request_id)
+        return True
+
+    def subscriptions(self, websocket: WebSocket) -> Set[int]:
+        """Rooms the socket is in"""
+        return set(self.connection_rooms.get(websocket, ()))
+
+    def is_subscribed(self, websocket: WebSocket, service_request_id: int) -> bool:
+        return service_request_id in self.connection_rooms.get(websocket, ())
+        
+    async def disconnect(self, websocket: WebSocket, user_id: int = None, service_request_id: int = None):
+        """Disconnect a user from WebSocket
+
+        The socket's own registration decides what is cleaned up; the ids are
+        only used for logging.
+        """
+        owner = self._unregister(websocket)
+        if owner is not None:
+            user_id, service_request_id = owner
         logger.info(f"User {user_id} disconnected from WebSocket. Service Request: {service_request_id}")
+
+    async def _drop_failed_connection(self, websocket: WebSocket):
+        """A send failed: the socket is gone"""
+        await self.disconnect(websocket)
+        await self.publish_presence()
+
+    def _enqueue(self, websocket: WebSocket, message: str):
+        """Queue a frame for one socket, applying the overflow policy if it is full"""
+        outbox = self.outboxes.get(websocket)
+        if outbox is None or outbox.offer(message):
+            return
+        if self.overflow == "drop":
+            self.send_metrics.observe_drop()
+            return
+        logger.warning(
+            f"Disconnecting slow WebSocket consumer {self._find_user_for_connection(websocket)}: "
+            f"{outbox.depth} frames queued"
+        )
+        self.send_metrics.observe_slow_disconnect()
+        self._unregister(websocket)
+        self._schedule_presence()
+        asyncio.get_running_loop().create_task(self._close(websocket, 1013, "Too slow to keep up"))
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def _yield_to_writers(self):
+        # Enqueueing never waits; yielding once lets idle writers send right
+        # away instead of after the caller's next real await
+        await asyncio.sleep(0)
+
+    def queue_to_connection(self, websocket: WebSocket, message: str):
+        """Queue a frame for one socket without yielding to other tasks"""
+        self._enqueue(websocket, message)
+
+    async def send_to_connection(self, websocket: WebSocket, message: str):
+        """Send a message to one socket, in order with its other frames"""
+        self._enqueue(websocket, message)
+        await self._yield_to_writers()
+
+    def resume(self, websocket: WebSocket, service_request_id: int, plan: ResumePlan, messages: List[dict]):
+        """Queue what a socket that has just joined the room missed
+
+        ``messages`` are the plan's messages, loaded from the database. Call
+        this with no await since the socket joined, so that no live frame
+        can overtake the replay. The replay ends with ``resumed``, or is
+        replaced by ``resync_required`` if it cannot be complete.
+        """
+        user_id = self._find_user_for_connection(websocket)
+        frames = None
+        if plan.source != "resync":
+            frames = self.replay_log.frames_since(service_request_id, plan.after_seq, user_id)
+        epoch, seq = self.replay_log.position(service_request_id)
+        if frames is None:
+            self._enqueue(websocket, json.dumps({
+                "type": "resync_required",
+                "service_request_id": service_request_id,
+                "replay_epoch": epoch,
+                "seq": seq,
+            }))
+            return
+        if messages:
+            self._enqueue(websocket, json.dumps({
+                "type": "new_messages",
+                "service_request_id": service_request_id,
+                "messages": messages,
+                "replayed": True,
+            }))
+        for text in frames:
+            self._enqueue(websocket, text)
+        self._enqueue(websocket, json.dumps({
+            "type": "resumed",
+            "service_request_id": service_request_id,
+            "source": plan.source,
+            "replay_epoch": epoch,
+            "seq": seq,
+        }))
         
+    async def _deliver(self, event: Dict):
+        """Queue a backplane event's frame on the matching sockets of this process"""
+        if event["to"] == "messages":
+            self._buffer_messages(event["service_request_id"], event["messages"])
+            return
+        text = event["text"]
+        exclude_user_id = event.get("exclude_user_id")
+        if event["to"] == "user":
+            connections = self.active_connections.get(event["user_id"], ())
+        else:
+            connections = self.service_request_connections.get(event["service_request_id"], ())
+            if event.get("type") in MESSAGE_FRAMES and self.hot_buffer.holds(event["service_request_id"]):
+                frame = json.loads(text)
+                self._buffer_messages(
+                    event["service_request_id"], frame.get("messages") or [frame["message"]]
+                )
+            # Logged even with no socket here: its client may reconnect here
+            text = self.replay_log.stamp(
+                event["service_request_id"],
+                text,
+                exclude_user_id,
+                event.get("type"),
+                event.get("message_ids", ()),
+            )
+        for connection in list(connections):
+            # Skip sending to the user who sent the message
+            if exclude_user_id and self._find_user_for_connection(connection) == exclude_user_id:
+                continue
+            self._enqueue(connection, text)
+
+    def _buffer_messages(self, service_request_id: int, messages: List[dict]):
+        """Add messages written on some worker to this process's hot buffer"""
+        if not self.hot_buffer.holds(service_request_id):
+            return
+        for message in messages:
+            self.hot_buffer.append(service_request_id, ChatMessageRead.model_validate(message))
+
+    async def publish_messages(self, service_request_id: int, messages: List[ChatMessageRead]):
+        """Tell every worker's hot buffer about messages not broadcast to the room"""
+        await self.backplane.publish(
+            {
+                "to": "messages",
+                "service_request_id": service_request_id,
+                "messages": [message.model_dump(mode="json") for message in messages],
+            }
+        )
+
     async def send_personal_message(self, message: str, user_id: int):
         """Send a message to a specific user"""
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id].copy():
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to user {user_id}: {e}")
-                    await self.disconnect(connection, user_id)
+        await self.backplane.publish({"to": "user", "user_id": user_id, "text": message})
+        await self._yield_to_writers()
                     
     async def send_to_service_request(self, message: str, service_request_id: int):
         """Send a message to all users connected to a service request"""
-        if service_request_id in self.service_request_connections:
-            for connection in self.service_request_connections[service_request_id].copy():
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to service request {service_request_id}: {e}")
-                    # Find user_id for this connection to properly disconnect
-                    user_id = self._find_user_for_connection(connection)
-                    if user_id:
-                        await self.disconnect(connection, user_id, service_request_id)
+        await self.backplane.publish(
+            {"to": "room", "service_request_id": service_request_id, "text": message}
+        )
+        await self._yield_to_writers()
                         
-    def _find_user_for_connection(self, websocket: WebSocket) -> int:
+    def _find_user_for_connection(self, websocket: WebSocket) -> Optional[int]:
         """Find user_id for a given WebSocket connection"""
-        for user_id, connections in self.active_connections.items():
-            if websocket in connections:
-                return user_id
-        return None
+        owner = self.connection_owners.get(websocket)
+        return owner[0] if owner else None
+
+    def online_user_ids(self, service_request_id: int) -> Set[int]:
+        """Users with at least one socket open on the conversation"""
+        return set(self.room_members.get(service_request_id, ()))
         
     async def broadcast_message(self, message: dict, service_request_id: int, exclude_user_id: int = None):
         """Broadcast a message to all users in a service request conversation"""
-        message_json = json.dumps(message)
-        
-        if service_request_id in self.service_request_connections:
-            for connection in self.service_request_connections[service_request_id].copy():
-                try:
-                    # Skip sending to the user who sent the message
-                    user_id = self._find_user_for_connection(connection)
-                    if exclude_user_id and user_id == exclude_user_id:
-                        continue
-                        
-                    await connection.send_text(message_json)
-                except Exception as e:
-                    logger.error(f"Error broadcasting message: {e}")
-                    if user_id:
-                        await self.disconnect(connection, user_id, service_request_id)
+        await self.backplane.publish(
+            {
+                "to": "room",
+                "service_request_id": service_request_id,
+                "exclude_user_id": exclude_user_id,
+                "type": message.get("type"),
+                "message_ids": frame_message_ids(message),
+                "text": json.dumps(message),
+            }
+        )
+        await self._yield_to_writers()
+
+    def send_queue_stats(self) -> Dict:
+        """Queue depth, drops and send latency across this process's sockets"""
+        stats = self.send_metrics.snapshot(list(self.outboxes.values()))
+        stats.update({"queue_size": self.send_queue_size, "overflow": self.overflow})
+        return stats
                         
     async def send_typing_indicator(self, service_request_id: int, user_id: int, is_typing: bool):
         """Send typing indicator to other users in the conversation"""
@@ -117,24 +436,38 @@ class ConnectionManager:
         
         await self.broadcast_message(typing_message, service_request_id, exclude_user_id=user_id)
         
-    async def send_message_status(self, message_id: int, status: str, user_id: int):
-        """Send message status update (delivered, read)"""
-        status_message = {
+    async def send_message_status(
+        self, message_id: int, status: str, user_id: int, service_request_id: Optional[int] = None
+    ):
+        """Send message status update (delivered, read)
+
+        Callers that know the message's conversation should pass it; otherwise
+        it comes from ``message_routes``, or one lookup on a miss.
+        """
+        if service_request_id is None:
+            service_request_id = message_routes.get(message_id)
+        if service_request_id is None:
+            service_request_id = await asyncio.to_thread(self._lookup_conversation, message_id)
+            if service_request_id is None:
+                return
+
+        await self.status_batcher.add(service_request_id, {
             "type": "message_status",
             "message_id": message_id,
+            "service_request_id": service_request_id,
             "status": status,
             "user_id": user_id,
             "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Find service_request_id for this message
-        db = next(get_db())
-        try:
-            message = db.query(ChatMessageORM).filter(ChatMessageORM.id == message_id).first()
-            if message:
-                await self.broadcast_message(status_message, message.service_request_id)
-        finally:
-            db.close()
+        })
+
+    @staticmethod
+    def _lookup_conversation(message_id: int) -> Optional[int]:
+        with SessionLocal() as db:
+            message = db.get(ChatMessageORM, message_id)
+            if message is None:
+                return None
+            message_routes.put(message_id, message.service_request_id)
+            return message.service_request_id
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -0,0 +1,258 @@
+"""
+Group-commit write-behind for chat messages sent over WebSocket.
+
+Writing each frame's message with its own INSERT and COMMIT on the event
+loop blocks every other socket of the worker for a database round trip per
+message. Instead the socket handler validates the frame, queues the message
+and acknowledges it straight away with a provisional id (``message_accepted``,
+carrying the ``client_message_id``). One writer task per process then:
+
+1. takes the first queued message and waits up to CHAT_WRITE_BATCH_WINDOW_MS
+   for more, up to CHAT_WRITE_BATCH_MAX;
+2. writes the batch in a worker thread and one transaction: a single
+   multi-row INSERT ... RETURNING on PostgreSQL (SQLite cannot match
+   multi-row RETURNING to rows, so it gets an INSERT per message, still
+   under one commit);
+3. broadcasts each message with its final id, and confirms it to the sender
+   (``message_sent`` with ``message_id`` and ``client_message_id``).
+
+Guarantees:
+
+Durability
+    ``message_accepted`` means queued, not stored; only ``message_sent`` means
+    committed. Messages still queued when the process dies are lost. The
+    provisional id is the stored ``client_message_id``, unique per sender, so a
+    client that resends everything it has no ``message_sent`` for can never
+    create a duplicate: an already stored message is confirmed again instead.
+    Shutdown drains the queue before the process exits.
+Ordering
+    Messages accepted by a process are inserted, broadcast and confirmed in
+    the order they were accepted, and get increasing ids in that order. There
+    is no ordering between messages accepted by different workers beyond
+    their ids.
+Failure
+    If a batch cannot be written, each of its messages is retried in its own
+    transaction, so one bad row only fails itself. A message that still fails
+    is reported to its sender as an ``error`` frame with its
+    ``client_message_id``.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.models import ChatMessageORM, UserORM
+from app.schemas import ChatMessageRead
+from app.services.chat_hot_buffer import hot_messages
+from app.utils.db_writes import commit_fresh
+from app.websocket.connection_manager import manager
+from config import CHAT_WRITE_BATCH_MAX, CHAT_WRITE_BATCH_WINDOW_MS, CHAT_WRITE_QUEUE_MAX
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingMessage:
+    """A validated message waiting to be written"""
+
+    service_request_id: int
+    sender_id: int
+    message: str
+    message_type: str
+    message_metadata: Optional[dict] = None
+    # Provisional id: the client's own, or one generated on acceptance
+    client_message_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+# (pending, stored message or None if it could not be written, duplicate)
+WriteResult = Tuple[PendingMessage, Optional[ChatMessageRead], bool]
+
+
+def write_messages(db: Session, batch: List[PendingMessage]) -> List[WriteResult]:
+    """Store a batch in one transaction; messages already stored are returned as duplicates"""
+    keys = list(dict.fromkeys((pending.sender_id, pending.client_message_id) for pending in batch))
+    stored = {
+        (message.sender_id, message.client_message_id): message
+        for message in db.query(ChatMessageORM).filter(
+            tuple_(ChatMessageORM.sender_id, ChatMessageORM.client_message_id).in_(keys)
+        )
+    }
+    # Loaded up front so each message's sender resolves from the identity map
+    senders = db.query(UserORM).filter(UserORM.id.in_({sender_id for sender_id, _ in keys})).all()
+
+    written = {}
+    for pending in batch:
+        key = (pending.sender_id, pending.client_message_id)
+        if key in stored or key in written:
+            continue
+        written[key] = ChatMessageORM(
+            service_request_id=pending.service_request_id,
+            sender_id=pending.sender_id,
+            message=pending.message,
+            message_type=pending.message_type,
+            message_metadata=pending.message_metadata,
+            client_message_id=pending.client_message_id,
+            is_read=False,
+        )
+    if written:
+        db.add_all(written.values())
+        # One multi-row INSERT ... RETURNING where the dialect supports it
+        commit_fresh(db, *written.values(), *stored.values(), *senders)
+
+    results = []
+    returned = set()
+    for pending in batch:
+        key = (pending.sender_id, pending.client_message_id)
+        duplicate = key in stored or key in returned
+        returned.add(key)
+        message = stored.get(key) or written[key]
+        results.append((pending, ChatMessageRead.model_validate(message), duplicate))
+    return results
+
+
+class ChatMessageWriter:
+    """Batches queued messages into group commits, then fans the results out"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_max: int = CHAT_WRITE_BATCH_MAX,
+        window_ms: float = CHAT_WRITE_BATCH_WINDOW_MS,
+        queue_max: int = CHAT_WRITE_QUEUE_MAX,
+    ):
+        self.session_factory = session_factory
+        self.batch_max = batch_max
+        self.window_seconds = window_ms / 1000
+        self.queue_max = queue_max
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self.batches = 0
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.write_seconds = 0.0
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and tasks belong to one event loop
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_max)
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, pending: PendingMessage):
+        """Queue a message; waits only while the queue is full"""
+        self._ensure_running()
+        await self._queue.put(pending)
+
+    async def _next_batch(self) -> List[PendingMessage]:
+        batch = [await self._queue.get()]
+        if self.window_seconds > 0 and self._queue.qsize() < self.batch_max - 1:
+            # Let the burst this message belongs to catch up. Sleeping rather
+            # than timing out a get() cannot lose a message to the timeout.
+            await asyncio.sleep(self.window_seconds)
+        while len(batch) < self.batch_max and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _write(self, batch: List[PendingMessage]) -> List[WriteResult]:
+        try:
+            with self.session_factory() as db:
+                return write_messages(db, batch)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error writing chat message {batch[0].client_message_id}: {e}")
+                return [(batch[0], None, False)]
+            logger.warning(f"Error writing a batch of {len(batch)} chat messages, retrying one by one: {e}")
+            return [result for pending in batch for result in self._write([pending])]
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                started = time.perf_counter()
+                results = await asyncio.to_thread(self._write, batch)
+                self.write_seconds += time.perf_counter() - started
+                self.batches += 1
+                await self._publish(results)
+            except Exception as e:
+                logger.error(f"Error in chat message writer: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _publish(self, results: List[WriteResult]):
+        for pending, message, duplicate in results:
+            if message is None:
+                self.failed += 1
+                await manager.send_personal_message(json.dumps({
+                    "type": "error",
+                    "message": "Failed to send message",
+                    "client_message_id": pending.client_message_id,
+                    "service_request_id": pending.service_request_id,
+                }), pending.sender_id)
+                continue
+            if duplicate:
+                self.duplicates += 1
+            else:
+                self.written += 1
+                hot_messages.append(message.service_request_id, message)
+                await manager.broadcast_message({
+                    "type": "new_message",
+                    "message": message.model_dump(mode="json"),
+                    "service_request_id": message.service_request_id,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }, message.service_request_id, exclude_user_id=pending.sender_id)
+            await manager.send_personal_message(json.dumps({
+                "type": "message_sent",
+                "message_id": message.id,
+                "client_message_id": pending.client_message_id,
+                "service_request_id": pending.service_request_id,
+                "duplicate": duplicate,
+                "timestamp": datetime.utcnow().isoformat(),
+            }), pending.sender_id)
+
+    async def flush(self):
+        """Wait until every message queued so far is written and published"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def stop(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "avg_batch_size": round((self.written + self.duplicates + self.failed) / self.batches, 2)
+            if self.batches
+            else 0.0,
+            "avg_write_ms": round(self.write_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+            "batch_max": self.batch_max,
+            "window_ms": self.window_seconds * 1000,
+        }
+
+
+message_writer = ChatMessageWriter()
+
+
+def get_message_writer() -> ChatMessageWriter:
+    """Writer dependency for the chat socket"""
+    return message_writer
@@ -0,0 +1,76 @@
+"""
+Heartbeat-based presence for chat sockets.
+
+A socket is alive while it keeps talking: every frame it sends, including
+the client's periodic ``ping``, refreshes its last-seen time. A socket
+silent for longer than ``ttl_seconds`` is stale (a half-open TCP connection
+after a phone lost signal, say); the connection manager closes it, which
+takes its user out of the room's online set like any other disconnect.
+
+The registry also keeps the public profile (id, username, is_provider) of
+every connected user, so online-users is answered from memory and only
+looks up users that connected without one.
+"""
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from config import CHAT_PRESENCE_TTL_SECONDS
+
+
+class PresenceRegistry:
+    """Last heartbeat of each socket, and profiles of the users they belong to"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = CHAT_PRESENCE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # socket -> (user_id, clock() of its last frame)
+        self._seen: Dict[WebSocket, Tuple[int, float]] = {}
+        # Wall-clock time of each connected user's last frame, on any socket
+        self._user_seen: Dict[int, datetime] = {}
+        self._profiles: Dict[int, dict] = {}
+        self.expired = 0
+
+    def touch(self, websocket: WebSocket, user_id: int):
+        self._seen[websocket] = (user_id, self.clock())
+        self._user_seen[user_id] = datetime.utcnow()
+
+    def forget(self, websocket: WebSocket):
+        self._seen.pop(websocket, None)
+
+    def forget_user(self, user_id: int):
+        """Drop what is kept for a user with no socket left"""
+        self._user_seen.pop(user_id, None)
+        self._profiles.pop(user_id, None)
+
+    def stale(self) -> List[WebSocket]:
+        """Sockets silent for longer than the TTL"""
+        deadline = self.clock() - self.ttl_seconds
+        return [websocket for websocket, (_, seen) in self._seen.items() if seen < deadline]
+
+    def last_seen(self, user_id: int) -> Optional[datetime]:
+        return self._user_seen.get(user_id)
+
+    def remember(self, user):
+        self._profiles[user.id] = {
+            "id": user.id,
+            "username": user.username,
+            "is_provider": user.is_provider,
+        }
+
+    def profiles(self, user_ids: Iterable[int]) -> Dict[int, dict]:
+        return {user_id: self._profiles[user_id] for user_id in user_ids if user_id in self._profiles}
+
+    def stats(self) -> Dict:
+        return {
+            "sockets": len(self._seen),
+            "users": len(self._user_seen),
+            "ttl_seconds": self.ttl_seconds,
+            "expired": self.expired,
+        }
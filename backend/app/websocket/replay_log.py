@@ -0,0 +1,197 @@
+"""
+Per-conversation sequence numbers and a replay log for reconnecting sockets.
+
+Every frame broadcast to a conversation is stamped with ``seq``, increasing
+by one per frame in that conversation, and kept in a bounded log. A client
+that reconnects with the last ``seq`` it saw gets only the frames it
+missed:
+
+- from the log, verbatim, while it still holds every frame after ``seq``;
+- otherwise from the database: the log remembers the message ids of its
+  message frames much further back than the frames themselves, and those
+  messages are sent again in one ``new_messages`` frame. Other frames
+  (typing, statuses) are not replayed this far back;
+- if even the message ids are gone, the client is told to resync over REST.
+
+Typing frames are neither stamped nor logged: a stale indicator is not
+worth replaying, and they would push message frames out of the log.
+Stamping never parses a frame: ``seq`` is spliced into the serialized text,
+and the ids of the messages a frame carries come with the backplane event.
+
+Sequence numbers are stamped by each worker as it delivers, so they are only
+comparable within one log. Each room's log has an ``epoch``, announced when a
+socket joins the room, and a resume must name it: a client that reconnects
+to another worker, or after a restart or eviction, gets resync_required.
+"""
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import (
+    CHAT_REPLAY_LOG_FRAMES,
+    CHAT_REPLAY_LOG_MESSAGES,
+    CHAT_REPLAY_LOG_ROOMS,
+    CHAT_REPLAY_MAX_MESSAGES,
+)
+
+
+# Room frames that are delivered but not stamped or logged
+UNLOGGED_FRAMES = ("typing",)
+
+
+def frame_message_ids(frame: dict) -> Tuple[int, ...]:
+    """Ids of the stored messages a frame announces"""
+    if frame.get("type") == "new_message" and isinstance(frame.get("message"), dict):
+        messages = [frame["message"]]
+    elif frame.get("type") == "new_messages" and isinstance(frame.get("messages"), list):
+        messages = frame["messages"]
+    else:
+        return ()
+    return tuple(m["id"] for m in messages if isinstance(m, dict) and isinstance(m.get("id"), int))
+
+
+@dataclass
+class _RoomLog:
+    frames_max: int
+    messages_max: int
+    epoch: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    seq: int = 0
+    # (seq, exclude_user_id, text) of the newest frames
+    frames: Deque[Tuple[int, Optional[int], str]] = field(default_factory=deque)
+    # (seq, exclude_user_id, message ids) of the newest message frames
+    messages: Deque[Tuple[int, Optional[int], Tuple[int, ...]]] = field(default_factory=deque)
+    # Newest seq dropped from each deque: resuming from below it needs more
+    frames_floor: int = 0
+    messages_floor: int = 0
+
+    def append(self, exclude_user_id: Optional[int], text: str, message_ids: Tuple[int, ...]):
+        self.frames.append((self.seq, exclude_user_id, text))
+        if len(self.frames) > self.frames_max:
+            self.frames_floor = self.frames.popleft()[0]
+        if message_ids:
+            self.messages.append((self.seq, exclude_user_id, message_ids))
+            if len(self.messages) > self.messages_max:
+                self.messages_floor = self.messages.popleft()[0]
+
+
+@dataclass
+class ResumePlan:
+    """How a socket joining a room catches up from ``after_seq``
+
+    ``source`` is "log" (replay frames after ``after_seq``), "database" (send
+    ``message_ids`` from the database, then the frames after ``after_seq``)
+    or "resync" (nothing can be replayed).
+    """
+
+    source: str
+    after_seq: int = 0
+    message_ids: List[int] = field(default_factory=list)
+
+
+class ReplayLog:
+    """Sequence numbers and recent frames of each conversation, bounded LRU by room"""
+
+    def __init__(
+        self,
+        frames_per_room: int = CHAT_REPLAY_LOG_FRAMES,
+        messages_per_room: int = CHAT_REPLAY_LOG_MESSAGES,
+        max_rooms: int = CHAT_REPLAY_LOG_ROOMS,
+        max_replay_messages: int = CHAT_REPLAY_MAX_MESSAGES,
+    ):
+        self.frames_per_room = frames_per_room
+        self.messages_per_room = messages_per_room
+        self.max_rooms = max_rooms
+        self.max_replay_messages = max_replay_messages
+        self._rooms: "OrderedDict[int, _RoomLog]" = OrderedDict()
+        self.stamped = 0
+        self.evictions = 0
+        self.resumes: Dict[str, int] = {"log": 0, "database": 0, "resync": 0}
+
+    def _room(self, service_request_id: int) -> _RoomLog:
+        room = self._rooms.get(service_request_id)
+        if room is None:
+            room = self._rooms[service_request_id] = _RoomLog(self.frames_per_room, self.messages_per_room)
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+                self.evictions += 1
+        self._rooms.move_to_end(service_request_id)
+        return room
+
+    def stamp(
+        self,
+        service_request_id: int,
+        text: str,
+        exclude_user_id: Optional[int] = None,
+        frame_type: Optional[str] = None,
+        message_ids: Tuple[int, ...] = (),
+    ) -> str:
+        """Give a room frame its seq and log it
+
+        ``text`` is a JSON object, ``message_ids`` those of the stored messages
+        it announces (see ``frame_message_ids``). Typing frames, and text that
+        is not a non-empty object, pass unstamped.
+        """
+        if frame_type in UNLOGGED_FRAMES or len(text) < 3 or text[0] != "{" or text[-1] != "}":
+            return text
+        room = self._room(service_request_id)
+        room.seq += 1
+        # A key repeated in a JSON object takes its last value, so this seq
+        # wins over any the frame carried
+        text = f'{text[:-1]}, "seq": {room.seq}}}'
+        room.append(exclude_user_id, text, tuple(message_ids))
+        self.stamped += 1
+        return text
+
+    def position(self, service_request_id: int) -> Tuple[str, int]:
+        """(epoch, seq of the newest frame) a joining socket continues from"""
+        room = self._room(service_request_id)
+        return room.epoch, room.seq
+
+    def plan(self, service_request_id: int, epoch: Optional[str], resume_from: int, user_id: int) -> ResumePlan:
+        """How a socket that saw frames up to ``resume_from`` of ``epoch`` catches up"""
+        room = self._rooms.get(service_request_id)
+        if room is None or epoch != room.epoch or not 0 <= resume_from <= room.seq:
+            plan = ResumePlan("resync")
+        elif resume_from >= room.frames_floor:
+            plan = ResumePlan("log", after_seq=resume_from)
+        elif resume_from >= room.messages_floor:
+            message_ids = [
+                message_id
+                for seq, exclude_user_id, ids in room.messages
+                if seq > resume_from and exclude_user_id != user_id
+                for message_id in ids
+            ]
+            if len(message_ids) > self.max_replay_messages:
+                plan = ResumePlan("resync")
+            else:
+                plan = ResumePlan("database", after_seq=room.seq, message_ids=message_ids)
+        else:
+            plan = ResumePlan("resync")
+        self.resumes[plan.source] += 1
+        return plan
+
+    def frames_since(self, service_request_id: int, after_seq: int, user_id: int) -> Optional[List[str]]:
+        """Frames after ``after_seq`` the user would have received, or None if some are gone"""
+        room = self._rooms.get(service_request_id)
+        if room is None or after_seq < room.frames_floor:
+            return None
+        return [
+            text
+            for seq, exclude_user_id, text in room.frames
+            if seq > after_seq and exclude_user_id != user_id
+        ]
+
+    def clear(self):
+        self._rooms.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "rooms": len(self._rooms),
+            "max_rooms": self.max_rooms,
+            "frames": sum(len(room.frames) for room in self._rooms.values()),
+            "frames_per_room": self.frames_per_room,
+            "stamped": self.stamped,
+            "evictions": self.evictions,
+            "resumes": dict(self.resumes),
+        }
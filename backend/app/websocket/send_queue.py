@@ -0,0 +1,172 @@
+"""
+Per-connection outbound queues for WebSocket fan-out.
+
+Every socket gets a bounded queue and a writer task that drains it, so a
+broadcast only enqueues: a client on a slow link backs up its own queue
+instead of stalling delivery to the rest of the room and the sender's
+handler loop. Writers run only while their queue has frames, so idle
+sockets cost no task. A queue that fills up is handled by the overflow
+policy:
+
+``disconnect`` (default)
+    Close the socket (1013, try again later). The client reconnects and
+    catches up through the delta sync endpoint, so it never silently misses
+    a message.
+``drop``
+    Discard the frame that did not fit and keep the connection.
+
+``SendQueueMetrics`` records queue depth and enqueue-to-sent latency for
+the internal metrics endpoint. Like the connection manager, queues and
+metrics are per process.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("disconnect", "drop")
+
+# Upper bounds (milliseconds) of the enqueue-to-sent latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class SendQueueMetrics:
+    """Counters and a send-latency histogram across every outbox of a manager"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.bucket_counts: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self.enqueued = 0
+            self.sent = 0
+            self.dropped = 0
+            self.slow_disconnects = 0
+            self.send_errors = 0
+            self.latency_sum_ms = 0.0
+            self.latency_max_ms = 0.0
+            self.depth_max = 0
+
+    def observe_enqueue(self, depth: int):
+        with self._lock:
+            self.enqueued += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def observe_sent(self, seconds: float):
+        latency_ms = seconds * 1000
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.sent += 1
+            self.latency_sum_ms += latency_ms
+            self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+
+    def observe_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def observe_slow_disconnect(self):
+        with self._lock:
+            self.slow_disconnects += 1
+
+    def observe_send_error(self):
+        with self._lock:
+            self.send_errors += 1
+
+    def snapshot(self, outboxes: Iterable["ConnectionOutbox"]) -> Dict:
+        depths = [outbox.depth for outbox in outboxes]
+        with self._lock:
+            buckets = {
+                f"le_{bound}ms": count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.bucket_counts)
+            }
+            buckets["le_inf"] = self.bucket_counts[-1]
+            return {
+                "connections": len(depths),
+                "queued": sum(depths),
+                "depth_now_max": max(depths, default=0),
+                "depth_max": self.depth_max,
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "slow_disconnects": self.slow_disconnects,
+                "send_errors": self.send_errors,
+                "latency_ms": {
+                    "count": self.sent,
+                    "sum": round(self.latency_sum_ms, 3),
+                    "max": round(self.latency_max_ms, 3),
+                    "avg": round(self.latency_sum_ms / self.sent, 3) if self.sent else 0.0,
+                    "buckets": buckets,
+                },
+            }
+
+
+class ConnectionOutbox:
+    """Bounded queue of text frames for one socket, drained by its own task
+
+    The writer task is started by the first frame queued and ends once the
+    queue is empty.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int,
+        metrics: SendQueueMetrics,
+        on_send_error: Callable[[WebSocket], Awaitable[None]],
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.metrics = metrics
+        self._on_send_error = on_send_error
+        # (frame, perf_counter at enqueue)
+        self._frames: Deque[Tuple[str, float]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def offer(self, text: str) -> bool:
+        """Queue a frame without waiting; False when the queue is full"""
+        if self._closed:
+            return True
+        if len(self._frames) >= self.max_size:
+            return False
+        self._frames.append((text, time.perf_counter()))
+        self.metrics.observe_enqueue(len(self._frames))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        return True
+
+    async def _drain(self):
+        while self._frames:
+            text, enqueued_at = self._frames.popleft()
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                logger.error(f"Error sending WebSocket frame: {e}")
+                self.metrics.observe_send_error()
+                await self._on_send_error(self.websocket)
+                return
+            self.metrics.observe_sent(time.perf_counter() - enqueued_at)
+
+    def close(self):
+        """Stop the writer; frames still queued are discarded"""
+        self._closed = True
+        self._frames.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
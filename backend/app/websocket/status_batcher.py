@@ -0,0 +1,84 @@
+"""
+Batches delivered/read status events into one frame per conversation.
+
+A client that catches up on a conversation acknowledges messages one frame
+at a time, and each acknowledgement used to become its own broadcast.
+``StatusBatcher`` holds the events of a conversation for ``tick_seconds``
+and then publishes them together:
+
+- statuses are watermarks ("read up to message N"), so of several events
+  for the same user and status only the newest message is kept;
+- a tick with a single event publishes the usual ``message_status`` frame;
+- a tick with several publishes one ``message_status_batch`` frame whose
+  ``statuses`` are those ``message_status`` frames, oldest first.
+
+A tick of 0 publishes every event at once, unbatched.
+"""
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+StatusPublisher = Callable[[dict, int], Awaitable[None]]
+
+
+class StatusBatcher:
+    """Coalesces message status events per conversation per tick"""
+
+    def __init__(self, publish: StatusPublisher, tick_seconds: float):
+        self._publish = publish
+        self.tick_seconds = tick_seconds
+        # service_request_id -> (user_id, status) -> newest message_status frame
+        self._pending: Dict[int, Dict[Tuple[int, str], dict]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.events = 0
+        self.frames = 0
+
+    async def add(self, service_request_id: int, status: dict):
+        """Queue a ``message_status`` frame for the conversation's next tick"""
+        self.events += 1
+        if self.tick_seconds <= 0:
+            self.frames += 1
+            await self._publish(status, service_request_id)
+            return
+        statuses = self._pending.setdefault(service_request_id, {})
+        key = (status["user_id"], status["status"])
+        current = statuses.get(key)
+        if current is None or current["message_id"] <= status["message_id"]:
+            statuses.pop(key, None)
+            statuses[key] = status
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush_after_tick())
+
+    async def _flush_after_tick(self):
+        await asyncio.sleep(self.tick_seconds)
+        await self.flush()
+
+    async def flush(self):
+        """Publish everything queued so far"""
+        pending, self._pending = self._pending, {}
+        for service_request_id, statuses in pending.items():
+            frames = list(statuses.values())
+            if len(frames) == 1:
+                frame = frames[0]
+            else:
+                frame = {
+                    "type": "message_status_batch",
+                    "service_request_id": service_request_id,
+                    "statuses": frames,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            self.frames += 1
+            await self._publish(frame, service_request_id)
+
+    def clear(self):
+        # A pending flusher finds nothing left to publish
+        self._pending.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "pending_conversations": len(self._pending),
+            "events": self.events,
+            "frames": self.frames,
+            "tick_ms": self.tick_seconds * 1000,
+        }
@@ -0,0 +1,125 @@
+"""
+Server-side typing state, so keystrokes do not each fan out to the room.
+
+Chatty clients send ``{"type": "typing", "is_typing": true}`` on every
+keystroke. ``TypingTracker`` keeps one state per (conversation, user) and
+only emits transitions:
+
+- the first "typing" frame emits start; later ones only push back the expiry;
+- a "stopped" frame is held for ``stop_delay_seconds``, and dropped if the
+  user types again meanwhile, so pauses between words don't flap the
+  indicator. A user therefore causes at most one start/stop pair per
+  ``stop_delay_seconds``;
+- a user that goes quiet without saying so (closed tab, lost network) is
+  stopped ``timeout_seconds`` after their last frame;
+- sending a message or closing the socket stops the indicator at once.
+
+Nothing is sent while a user keeps typing, so clients must show the
+indicator from start to stop rather than hide it a few seconds after the
+last frame; a stop always follows, at the latest ``timeout_seconds`` after
+the user's last frame.
+
+Held stops and expiries are applied by a sweep every ``sweep_seconds`` that
+only runs while someone is typing, so they are late by up to that much.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from config import CHAT_TYPING_STOP_DELAY_MS, CHAT_TYPING_TIMEOUT_SECONDS
+
+TYPING_SWEEP_SECONDS = 0.25
+
+TypingEmitter = Callable[[int, int, bool], Awaitable[None]]
+
+
+@dataclass
+class _TypingState:
+    expires_at: float
+    # When a held "stopped" frame takes effect, unless typing resumes first
+    stop_at: Optional[float] = None
+
+
+class TypingTracker:
+    """Debounced typing start/stop per (service_request_id, user_id)"""
+
+    def __init__(
+        self,
+        emit: TypingEmitter,
+        timeout_seconds: float = CHAT_TYPING_TIMEOUT_SECONDS,
+        stop_delay_seconds: float = CHAT_TYPING_STOP_DELAY_MS / 1000,
+        sweep_seconds: Optional[float] = TYPING_SWEEP_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._emit = emit
+        self.timeout_seconds = timeout_seconds
+        self.stop_delay_seconds = stop_delay_seconds
+        self.sweep_seconds = sweep_seconds
+        self.clock = clock
+        self._states: Dict[Tuple[int, int], _TypingState] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.frames = 0
+        self.emitted = 0
+
+    async def _send(self, service_request_id: int, user_id: int, is_typing: bool):
+        self.emitted += 1
+        await self._emit(service_request_id, user_id, is_typing)
+
+    async def update(self, service_request_id: int, user_id: int, is_typing: bool):
+        """Apply a typing frame from the client"""
+        self.frames += 1
+        key = (service_request_id, user_id)
+        state = self._states.get(key)
+        now = self.clock()
+        if is_typing:
+            if state is None:
+                self._states[key] = _TypingState(expires_at=now + self.timeout_seconds)
+                self._ensure_sweeping()
+                await self._send(service_request_id, user_id, True)
+            else:
+                state.expires_at = now + self.timeout_seconds
+                state.stop_at = None
+        elif state is not None and state.stop_at is None:
+            state.stop_at = now + self.stop_delay_seconds
+
+    async def stop(self, service_request_id: int, user_id: int):
+        """Stop the indicator now, if it is showing"""
+        if self._states.pop((service_request_id, user_id), None) is not None:
+            await self._send(service_request_id, user_id, False)
+
+    async def sweep(self):
+        """Emit the held stops and expiries that are due"""
+        now = self.clock()
+        due = [
+            key
+            for key, state in self._states.items()
+            if state.expires_at <= now or (state.stop_at is not None and state.stop_at <= now)
+        ]
+        for key in due:
+            del self._states[key]
+        for service_request_id, user_id in due:
+            await self._send(service_request_id, user_id, False)
+
+    def _ensure_sweeping(self):
+        if not self.sweep_seconds:
+            return
+        loop = asyncio.get_running_loop()
+        if self._sweeper is None or self._sweeper.done() or self._sweeper.get_loop() is not loop:
+            self._sweeper = loop.create_task(self._sweep_while_typing())
+
+    async def _sweep_while_typing(self):
+        while self._states:
+            await asyncio.sleep(self.sweep_seconds)
+            await self.sweep()
+
+    def clear(self):
+        # A running sweeper finds nothing left and exits
+        self._states.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "typing": len(self._states),
+            "frames": self.frames,
+            "emitted": self.emitted,
+        }
@@ -0,0 +1,144 @@
+"""
+Benchmark /chat/search against a LIKE scan.
+
+Seeds a throwaway database with synthetic conversations (1M messages by
+default), then times search_messages() for a set of queries and reports
+p50/p95 latency next to the equivalent ``message LIKE '%term%'`` query.
+
+    python -m benchmarks.chat_search                  # temp SQLite file
+    python -m benchmarks.chat_search --messages 100000
+    python -m benchmarks.chat_search --database-url postgresql://...
+
+The target database is dropped and recreated: never point it at real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Base, ChatMessageORM, ServiceRequestORM, UserORM
+from app.services.chat_search import search_messages
+
+WORDS = (
+    "walk dog cat feed leash park vet appointment tomorrow morning evening "
+    "thanks please collar treat food water bowl grooming bath nails rex luna "
+    "max bella charlie late early address gate key door keys sitter weekend "
+    "medicine pill allergy photo update happy tired playful ball toy"
+).split()
+# Real chat vocabularies have a long tail: names, places, one-off words
+RARE_WORDS = [f"{word}{n}" for word in ("name", "street", "code") for n in range(20_000)]
+QUERIES = ["leash", "vet appointment", "medic", "gate key", "street123", "name4567 luna"]
+
+
+def seed(engine, messages: int, conversations: int, users: int, batch: int = 10_000):
+    rng = random.Random(42)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(UserORM),
+            [{"id": i, "username": f"bench_{i}", "hashed_password": "x"} for i in range(1, users + 1)],
+        )
+        conn.execute(
+            insert(ServiceRequestORM),
+            [
+                {
+                    "id": i,
+                    "user_id": (i % users) + 1,
+                    "assigned_provider_id": ((i + 1) % users) + 1,
+                    "service_type": "walking",
+                    "title": f"Request {i}",
+                    "description": "benchmark",
+                    "pet_ids": [],
+                }
+                for i in range(1, conversations + 1)
+            ],
+        )
+    start = datetime(2025, 1, 1)
+    for offset in range(0, messages, batch):
+        rows = []
+        for n in range(offset, min(offset + batch, messages)):
+            sr_id = rng.randint(1, conversations)
+            rows.append(
+                {
+                    "service_request_id": sr_id,
+                    "sender_id": (sr_id % users) + 1,
+                    "message": " ".join(
+                        rng.choices(WORDS, k=rng.randint(3, 20)) + rng.choices(RARE_WORDS, k=2)
+                    ),
+                    "message_type": "text",
+                    "created_at": start + timedelta(seconds=n),
+                }
+            )
+        # The FTS triggers / GIN index are maintained as part of each insert
+        with engine.begin() as conn:
+            conn.execute(insert(ChatMessageORM), rows)
+
+
+def _like_search(db: Session, participant, query: str, limit: int):
+    terms = query.split()
+    return db.execute(
+        select(ChatMessageORM.id)
+        .join(ServiceRequestORM, ServiceRequestORM.id == ChatMessageORM.service_request_id)
+        .where(participant, and_(*[ChatMessageORM.message.ilike(f"%{t}%") for t in terms]))
+        .order_by(ChatMessageORM.id.desc())
+        .limit(limit)
+    ).all()
+
+
+def _time(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - began) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def run(engine, repeat: int, limit: int):
+    with Session(engine) as db:
+        print(f"{'query':<22}{'scope':<8}{'fts p50':>10}{'fts p95':>10}{'like p50':>10}{'like p95':>10}  ms")
+        scopes = {
+            "user": ServiceRequestORM.user_id == 1,
+            "all": ServiceRequestORM.id.isnot(None),
+        }
+        for query in QUERIES:
+            for scope, participant in scopes.items():
+                fts = _time(lambda: search_messages(db, participant, query, limit), repeat)
+                like = _time(lambda: _like_search(db, participant, query, limit), repeat)
+                print(f"{query:<22}{scope:<8}{fts[0]:>10.2f}{fts[1]:>10.2f}{like[0]:>10.2f}{like[1]:>10.2f}")
+        total = db.scalar(select(func.count(ChatMessageORM.id)))
+        print(f"\n{total} messages, {engine.dialect.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), "chat_search_bench.db")
+        url = f"sqlite:///{path}"
+    engine = create_engine(url)
+
+    began = time.perf_counter()
+    seed(engine, args.messages, args.conversations, args.users)
+    print(f"seeded {args.messages} messages in {time.perf_counter() - began:.1f}s")
+    run(engine, args.repeat, args.limit)
+
+
+if __name__ == "__main__":
+    main()
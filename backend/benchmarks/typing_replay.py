@@ -0,0 +1,115 @@
+"""
+Benchmark typing-indicator fan-out: every frame relayed against TypingTracker.
+
+Replays synthetic typing traces on a virtual clock. Each of --users composes
+--messages messages a word at a time, sending ``is_typing: true`` on every
+keystroke (60-250ms apart, 100-400ms between words) the way chatty clients
+do. Some pause to think mid-message and send ``is_typing: false`` after a
+second of silence; some give up on a message and send nothing more. "relay"
+fans out every frame, as the socket handler used to; "tracker" fans out only
+TypingTracker's start/stop transitions, swept every 250ms. Each fanned-out
+frame goes to every other member of the conversation (--room-size - 1).
+
+    python -m benchmarks.typing_replay
+    python -m benchmarks.typing_replay --users 500 --room-size 5 --stop-delay-ms 1000
+"""
+import argparse
+import asyncio
+import heapq
+import os
+import random
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.websocket.typing_state import TYPING_SWEEP_SECONDS, TypingTracker  # noqa: E402
+
+
+def _trace(rng: random.Random, messages: int):
+    """[(seconds, event)] for one user; event is True, False or "sent" """
+    events, now = [], 0.0
+    for _ in range(messages):
+        now += rng.uniform(2, 20)
+        words = rng.randint(2, 15)
+        abandoned = rng.random() < 0.1
+        for word in range(words):
+            for _ in range(rng.randint(2, 9)):
+                events.append((now, True))
+                now += rng.uniform(0.06, 0.25)
+            now += rng.uniform(0.1, 0.4)
+            if rng.random() < 0.08:
+                # Thinking: the client reports the pause after a second
+                events.append((now + 1.0, False))
+                now += rng.uniform(1.5, 8)
+            if abandoned and word == words // 2:
+                break
+        if not abandoned:
+            events.append((now, False))
+            events.append((now, "sent"))
+    return events
+
+
+async def _replay(traces, stop_delay_seconds: float, timeout_seconds: float):
+    clock = [0.0]
+    relayed = 0
+
+    async def emit(service_request_id, user_id, is_typing):
+        pass
+
+    tracker = TypingTracker(
+        emit,
+        timeout_seconds=timeout_seconds,
+        stop_delay_seconds=stop_delay_seconds,
+        sweep_seconds=None,
+        clock=lambda: clock[0],
+    )
+    timeline = heapq.merge(
+        *(
+            [(at, user_id, event) for at, event in trace]
+            for user_id, trace in enumerate(traces)
+        ),
+        key=lambda item: item[0],
+    )
+    next_sweep = TYPING_SWEEP_SECONDS
+    for at, user_id, event in timeline:
+        while next_sweep <= at:
+            clock[0] = next_sweep
+            await tracker.sweep()
+            next_sweep += TYPING_SWEEP_SECONDS
+        clock[0] = at
+        # Each user types in their own conversation
+        if event == "sent":
+            await tracker.stop(user_id, user_id)
+        else:
+            relayed += 1
+            await tracker.update(user_id, user_id, event)
+    clock[0] += timeout_seconds + TYPING_SWEEP_SECONDS
+    await tracker.sweep()
+    return relayed, tracker.emitted, clock[0]
+
+
+async def _run(users: int, messages: int, room_size: int, stop_delay_ms: float, timeout: float, seed: int):
+    rng = random.Random(seed)
+    traces = [_trace(rng, messages) for _ in range(users)]
+    relayed, emitted, duration = await _replay(traces, stop_delay_ms / 1000, timeout)
+    recipients = room_size - 1
+    print(f"{users} users x {messages} messages, {duration / 60:.1f} virtual minutes, rooms of {room_size}")
+    print(f"{'':8} {'fanned out':>11} {'frames sent':>12} {'per user-minute':>16}")
+    for name, count in (("relay", relayed), ("tracker", emitted)):
+        print(f"{name:8} {count:11} {count * recipients:12} {count * 60 / duration / users:16.2f}")
+    print(f"reduction: {relayed / emitted:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--room-size", type=int, default=2)
+    parser.add_argument("--stop-delay-ms", type=float, default=1500)
+    parser.add_argument("--timeout", type=float, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(_run(args.users, args.messages, args.room_size, args.stop_delay_ms, args.timeout, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark the create/update routes with and without commit_fresh.
+
+Runs each write route against a throwaway SQLite database twice: once as it
+ships (commit_fresh: server-generated values come back through RETURNING and
+the written row stays loaded) and once with the old ``commit(); refresh()``
+swapped back in. Reports SQL statements per request and p50 latency for both.
+
+    python -m benchmarks.write_round_trips
+    python -m benchmarks.write_round_trips --requests 500
+
+Statement counts are what matter on a networked database, where each one is
+a round trip; SQLite latencies only show the CPU side.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+
+_db_dir = tempfile.mkdtemp(prefix="write_round_trips_")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.dependencies.auth import get_current_user  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import PetORM, ServiceRequestORM, UserORM  # noqa: E402
+from app.routers import (  # noqa: E402
+    medical_record,
+    pet,
+    service_requests,
+    task,
+    vaccination,
+    weight_record,
+)
+from app.utils.query_counter import track_queries  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+ROUTERS = (medical_record, pet, service_requests, task, vaccination, weight_record)
+
+
+def commit_then_refresh(db, *instances):
+    """The pattern commit_fresh replaced"""
+    db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+def _today():
+    return str(date.today())
+
+
+# (name, method, path template, payload builder). {pet} is a seeded pet and
+# {id} the row the route's POST counterpart created last. Creating a service
+# request needs a matching provider, so only the update is measured there.
+ROUTES = [
+    ("POST /pets", "post", "/pets/", lambda pet: {"name": "Rex", "breed_type": "dog", "breed": "lab"}),
+    ("PUT /pets/{id}", "put", "/pets/{pet}/", lambda pet: {"notes": "Updated"}),
+    ("POST /task", "post", "/task/", lambda pet: {"title": "Walk", "description": "Around the block", "date_time": datetime.utcnow().isoformat()}),
+    ("PUT /task/{id}", "put", "/task/{id}/", lambda pet: {"title": "Walk twice"}),
+    (
+        "POST /vaccinations",
+        "post",
+        "/vaccinations/pet/{pet}/",
+        lambda pet: {"vaccine_name": "Rabies", "date_administered": _today(), "veterinarian": "Dr. A", "clinic": "Main", "pet_id": pet},
+    ),
+    (
+        "PUT /vaccinations/{id}",
+        "put",
+        "/vaccinations/{id}/",
+        lambda pet: {"vaccine_name": "Rabies", "date_administered": _today(), "veterinarian": "Dr. B", "clinic": "Main"},
+    ),
+    (
+        "POST /medical-records",
+        "post",
+        "/medical-records/pet/{pet}/",
+        lambda pet: {"record_type": "checkup", "title": "Annual", "date": _today(), "pet_id": pet},
+    ),
+    (
+        "PUT /medical-records/{id}",
+        "put",
+        "/medical-records/{id}/",
+        lambda pet: {"record_type": "checkup", "title": "Annual visit", "date": _today()},
+    ),
+    ("PUT /service-requests/{id}", "put", "/service-requests/{id}/", lambda pet: {"title": "Morning walk"}),
+    (
+        "POST /api/weight-records",
+        "post",
+        "/api/weight-records/",
+        lambda pet: {"pet_id": pet, "weight": 12.5, "weight_unit": "kg", "date": datetime.utcnow().isoformat()},
+    ),
+    ("PUT /api/weight-records/{id}", "put", "/api/weight-records/{id}/", lambda pet: {"weight": 13.0}),
+]
+
+
+def _seed():
+    """The acting user, and a pet and service request of theirs"""
+    with SessionLocal() as db:
+        user = UserORM(username="bench_writer", hashed_password="x")
+        db.add(user)
+        db.flush()
+        pet = PetORM(user_id=user.id, name="Seed", breed_type="dog", breed="lab")
+        db.add(pet)
+        db.flush()
+        request = ServiceRequestORM(
+            user_id=user.id,
+            service_type="walking",
+            title="Evening walk",
+            description="Thirty minutes around the park",
+            pet_ids=[pet.id],
+        )
+        db.add(request)
+        db.commit()
+        ids = (pet.id, request.id)
+        db.refresh(user)
+        db.expunge(user)
+        return user, *ids
+
+
+async def _measure(client, requests: int, pet_id: int, request_id: int):
+    """{route: (statements per request, p50 ms)}"""
+    results = {}
+    created_ids = {"/service-requests": request_id}
+    for name, method, template, payload in ROUTES:
+        resource = name.split()[1].split("/{")[0]
+        counts, timings = [], []
+        for _ in range(requests):
+            path = template.format(pet=pet_id, id=created_ids.get(resource))
+            started = time.perf_counter()
+            with track_queries() as stats:
+                response = await getattr(client, method)(path, json=payload(pet_id))
+            timings.append((time.perf_counter() - started) * 1000)
+            counts.append(stats.count)
+            response.raise_for_status()
+            if method == "post":
+                created_ids[resource] = response.json()["id"]
+        results[name] = (statistics.mean(counts), statistics.median(timings))
+    return results
+
+
+async def _run(requests: int):
+    user, pet_id, request_id = _seed()
+    app.dependency_overrides[get_current_user] = lambda: user
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        fresh = await _measure(client, requests, pet_id, request_id)
+        for module in ROUTERS:
+            module.commit_fresh = commit_then_refresh
+        refreshed = await _measure(client, requests, pet_id, request_id)
+
+    print(f"{'route':32} {'stmts before':>12} {'after':>6} {'saved':>6} {'p50 before':>11} {'after':>8}")
+    for name, *_ in ROUTES:
+        before_count, before_ms = refreshed[name]
+        after_count, after_ms = fresh[name]
+        print(
+            f"{name:32} {before_count:12.1f} {after_count:6.1f} {before_count - after_count:6.1f}"
+            f" {before_ms:9.2f}ms {after_ms:6.2f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100, help="requests per route")
+    args = parser.parse_args()
+    asyncio.run(_run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Micro-benchmark ConnectionManager bookkeeping with many open sockets.
+
+Connects 50k fake sockets (two users per conversation by default) and times
+a broadcast into one room, the online-user lookup and a disconnect, next to
+the per-socket scan of every user's connections that each of them used to
+run. Sends are no-ops, so only the manager's own work is measured.
+
+    python -m benchmarks.ws_connections
+    python -m benchmarks.ws_connections --sockets 100000 --room-size 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.websocket.connection_manager import ConnectionManager
+
+
+class FakeSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        pass
+
+
+def scan_for_user(manager, websocket):
+    """The old _find_user_for_connection: a walk over every user's sockets"""
+    for user_id, connections in manager.active_connections.items():
+        if websocket in connections:
+            return user_id
+    return None
+
+
+def _p50_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+async def _timed(action, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = action()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - started)
+    return _p50_ms(samples)
+
+
+async def _run(sockets: int, room_size: int, repeat: int):
+    manager = ConnectionManager()
+    rooms = max(1, sockets // room_size)
+    started = time.perf_counter()
+    for n in range(sockets):
+        # Users are spread across rooms so each room has room_size members
+        await manager.connect(FakeSocket(), user_id=n, service_request_id=n % rooms + 1)
+    connect_seconds = time.perf_counter() - started
+    room = rooms // 2 + 1
+    members = list(manager.service_request_connections[room])
+    message = {"type": "new_message", "message": "hello"}
+
+    def legacy_broadcast_lookups():
+        for websocket in members:
+            scan_for_user(manager, websocket)
+
+    def legacy_online_users():
+        return {scan_for_user(manager, websocket) for websocket in members}
+
+    rows = [
+        (
+            "broadcast to one room",
+            await _timed(lambda: manager.broadcast_message(message, room, exclude_user_id=-1), repeat),
+            await _timed(legacy_broadcast_lookups, repeat),
+        ),
+        (
+            "online users of one room",
+            await _timed(lambda: manager.online_user_ids(room), repeat),
+            await _timed(legacy_online_users, repeat),
+        ),
+        (
+            "find a socket's user",
+            await _timed(lambda: manager._find_user_for_connection(members[0]), repeat),
+            await _timed(lambda: scan_for_user(manager, members[0]), repeat),
+        ),
+    ]
+
+    # Disconnect and reconnect the same socket so the population stays put
+    websocket = members[0]
+    user_id = manager._find_user_for_connection(websocket)
+
+    async def cycle():
+        await manager.disconnect(websocket)
+        await manager.connect(websocket, user_id=user_id, service_request_id=room)
+
+    rows.append(("disconnect + reconnect", await _timed(cycle, repeat), None))
+
+    print(
+        f"{sockets} sockets, {rooms} rooms of {room_size}; "
+        f"connected in {connect_seconds:.2f}s ({connect_seconds / sockets * 1e6:.1f}us each)"
+    )
+    print(f"{'operation':28} {'indexed p50':>12} {'scan p50':>12}")
+    for name, indexed, scanned in rows:
+        scan = f"{scanned:10.4f}ms" if scanned is not None else f"{'-':>12}"
+        print(f"{name:28} {indexed:10.4f}ms {scan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sockets", type=int, default=50_000)
+    parser.add_argument("--room-size", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(_run(args.sockets, args.room_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark room fan-out with one slow client among fast ones.
+
+Broadcasts a burst of messages into a room where one socket takes --slow-ms
+per send and the rest answer at once, and reports how long the broadcasting
+handler was held up and how long the fast clients waited for the whole
+burst. The per-connection send queues are compared with the old loop that
+awaited each send_text in turn.
+
+    python -m benchmarks.ws_fanout
+    python -m benchmarks.ws_fanout --members 200 --messages 50 --slow-ms 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.websocket.connection_manager import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+    async def send_text(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+        if self.received == self.expected:
+            self.done.set()
+
+
+async def sequential_broadcast(manager, message, service_request_id):
+    """The pre-queue broadcast_message: one awaited send after another"""
+    message_json = json.dumps(message)
+    for connection in list(manager.service_request_connections[service_request_id]):
+        await connection.send_text(message_json)
+
+
+async def _scenario(members: int, messages: int, slow_ms: float, queued: bool):
+    manager = ConnectionManager(send_queue_size=max(messages, 1))
+    slow = FakeSocket(delay=slow_ms / 1000)
+    fast = [FakeSocket() for _ in range(members - 1)]
+    for user_id, websocket in enumerate([slow, *fast], start=1):
+        websocket.expected = messages
+        await manager.connect(websocket, user_id=user_id, service_request_id=1)
+
+    started = time.perf_counter()
+    for n in range(messages):
+        payload = {"type": "new_message", "n": n}
+        if queued:
+            await manager.broadcast_message(payload, 1)
+        else:
+            await sequential_broadcast(manager, payload, 1)
+    handler_ms = (time.perf_counter() - started) * 1000
+    await asyncio.gather(*(websocket.done.wait() for websocket in fast))
+    fast_ms = (time.perf_counter() - started) * 1000
+    await slow.done.wait()
+    slow_total_ms = (time.perf_counter() - started) * 1000
+    return handler_ms, fast_ms, slow_total_ms, manager.send_queue_stats()
+
+
+async def _run(members: int, messages: int, slow_ms: float):
+    print(f"{members} sockets in one room, one taking {slow_ms:g}ms per send, {messages} messages")
+    print(f"{'':12} {'handler held':>13} {'fast clients':>13} {'slow client':>12}")
+    for name, queued in (("sequential", False), ("queued", True)):
+        handler_ms, fast_ms, slow_total_ms, stats = await _scenario(members, messages, slow_ms, queued)
+        print(f"{name:12} {handler_ms:11.1f}ms {fast_ms:11.1f}ms {slow_total_ms:10.1f}ms")
+    latency = stats["latency_ms"]
+    print(
+        f"queued: depth_max={stats['depth_max']} sent={stats['sent']} "
+        f"avg latency={latency['avg']}ms max={latency['max']}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--members", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--slow-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(_run(args.members, args.messages, args.slow_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark WebSocket message writes: inline commits against the group-commit writer.
+
+Simulates --senders sockets each sending --messages chat messages as fast as
+their handler loop allows, against a throwaway SQLite database. "inline" is
+the previous handler: INSERT and COMMIT per message on the event loop.
+"write-behind" queues each message to ChatMessageWriter, which commits
+batches from a worker thread. Reports throughput (until every message is
+stored and broadcast) and the worst event-loop stall seen by a 1ms ticker,
+which is how long every other socket on the worker would have waited.
+
+    python -m benchmarks.ws_message_writes
+    python -m benchmarks.ws_message_writes --senders 50 --messages 40 --window-ms 2
+
+SQLite commits are cheap; on a networked PostgreSQL each inline commit also
+waits a round trip, which the writer pays once per batch.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="ws_message_writes_")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from app.models import ChatMessageORM, ServiceRequestORM, UserORM  # noqa: E402
+from app.schemas import ChatMessageRead  # noqa: E402
+from app.utils.db_writes import commit_fresh  # noqa: E402
+from app.websocket.connection_manager import manager  # noqa: E402
+from app.websocket.message_writer import ChatMessageWriter, PendingMessage  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+
+def _seed(senders: int):
+    """One conversation per sender; returns [(user_id, service_request_id)]"""
+    with SessionLocal() as db:
+        users = [UserORM(username=f"bench_sender_{n}", hashed_password="x") for n in range(senders)]
+        db.add_all(users)
+        db.flush()
+        requests = [
+            ServiceRequestORM(
+                user_id=user.id,
+                service_type="walking",
+                title="Evening walk",
+                description="Thirty minutes around the park",
+                pet_ids=[1],
+            )
+            for user in users
+        ]
+        db.add_all(requests)
+        db.flush()
+        pairs = [(user.id, request.id) for user, request in zip(users, requests)]
+        db.commit()
+        return pairs
+
+
+async def inline_send(user_id: int, service_request_id: int, text: str):
+    """The handler before write-behind: one commit per message, on the loop"""
+    with SessionLocal() as db:
+        message = ChatMessageORM(
+            service_request_id=service_request_id,
+            sender_id=user_id,
+            message=text,
+            message_type="text",
+            is_read=False,
+        )
+        db.add(message)
+        commit_fresh(db, message)
+        response = ChatMessageRead.model_validate(message)
+    await manager.broadcast_message(
+        {"type": "new_message", "message": response.model_dump(mode="json")},
+        service_request_id,
+        exclude_user_id=user_id,
+    )
+
+
+async def _ticker(stalls: list, stop: asyncio.Event):
+    """Records how late each 1ms sleep wakes up"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(time.perf_counter() - started - 0.001)
+
+
+async def _scenario(pairs, messages: int, writer):
+    stalls, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stalls, stop))
+
+    async def sender(user_id, service_request_id):
+        for n in range(messages):
+            if writer is None:
+                await inline_send(user_id, service_request_id, f"message {n}")
+            else:
+                await writer.submit(
+                    PendingMessage(
+                        service_request_id=service_request_id,
+                        sender_id=user_id,
+                        message=f"message {n}",
+                        message_type="text",
+                    )
+                )
+            # A socket's reader loop yields between frames
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(*pair) for pair in pairs))
+    if writer is not None:
+        await writer.flush()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return elapsed, max(stalls) * 1000
+
+
+async def _run(senders: int, messages: int, window_ms: float, batch_max: int):
+    pairs = _seed(senders)
+    total = senders * messages
+    print(f"{senders} senders x {messages} messages = {total}")
+    print(f"{'':14} {'messages/s':>11} {'elapsed':>9} {'worst loop stall':>17}")
+    elapsed, stall = await _scenario(pairs, messages, None)
+    print(f"{'inline':14} {total / elapsed:11.0f} {elapsed:8.2f}s {stall:15.1f}ms")
+    writer = ChatMessageWriter(SessionLocal, batch_max=batch_max, window_ms=window_ms)
+    elapsed, stall = await _scenario(pairs, messages, writer)
+    stats = writer.stats()
+    await writer.stop()
+    print(f"{'write-behind':14} {total / elapsed:11.0f} {elapsed:8.2f}s {stall:15.1f}ms")
+    print(f"write-behind: {stats['batches']} batches, {stats['avg_batch_size']} messages each, {stats['avg_write_ms']}ms per batch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--senders", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--batch-max", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.senders, args.messages, args.window_ms, args.batch_max))
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,114 @@ def get_database_url():
 
 DATABASE_URL = get_database_url()
 
+# --- Connection Pool Config ---
+# Defaults match SQLAlchemy's own QueuePool defaults, except pool_recycle which
+# keeps connections younger than Railway's proxy idle timeout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+# pre_ping costs one round trip per checkout. With it off, dead connections are
+# only detected when a query fails, and pool_recycle does the preventive work.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Shared secret for /internal/* endpoints. When unset, those endpoints are
+# only served outside production.
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN", "")
+
+# --- Auth Cache Config ---
+# Authenticated users are cached per process by token subject. Writes made
+# through this process invalidate immediately; other workers may serve a
+# stale row for up to the TTL. Set either value to 0 to disable the cache.
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_MAX_SIZE = int(os.getenv("AUTH_USER_CACHE_MAX_SIZE", "1024"))
+
+# --- Chat Search Config ---
+# When a search cannot be narrowed to the user's conversations inside the
+# index, only the newest N matches are ranked, so a very common word costs
+# about the same as a rare one. 0 ranks every match.
+CHAT_SEARCH_CANDIDATES = int(os.getenv("CHAT_SEARCH_CANDIDATES", "2000"))
+
+# --- Chat Membership Cache Config ---
+# Conversation access checks are answered from a per-process cache of known
+# participants. Removing a participant invalidates this process immediately;
+# other workers may keep granting access for up to the TTL. Set either value
+# to 0 to disable the cache.
+CHAT_MEMBERSHIP_CACHE_TTL_SECONDS = float(os.getenv("CHAT_MEMBERSHIP_CACHE_TTL_SECONDS", "300"))
+CHAT_MEMBERSHIP_CACHE_MAX_SIZE = int(os.getenv("CHAT_MEMBERSHIP_CACHE_MAX_SIZE", "10000"))
+
+# --- Chat Hot Buffer Config ---
+# The newest messages of recently active conversations are kept serialized in
+# memory, so opening a busy conversation does not read its messages from the
+# database. Buffers hold up to MESSAGES per conversation and MAX_BYTES in
+# total (least recently used conversations go first); the TTL bounds how long
+# an embedded sender profile can be stale. Set MESSAGES to 0 to disable.
+CHAT_HOT_BUFFER_MESSAGES = int(os.getenv("CHAT_HOT_BUFFER_MESSAGES", "100"))
+CHAT_HOT_BUFFER_MAX_BYTES = int(os.getenv("CHAT_HOT_BUFFER_MAX_BYTES", str(16 * 1024 * 1024)))
+CHAT_HOT_BUFFER_TTL_SECONDS = float(os.getenv("CHAT_HOT_BUFFER_TTL_SECONDS", "300"))
+
+# --- Chat WebSocket Send Queue Config ---
+# Each socket has its own bounded outbound queue drained by a writer task, so
+# a slow client cannot hold up a room. When a socket's queue is full the
+# OVERFLOW policy applies: "disconnect" closes it (the client reconnects and
+# resyncs), "drop" discards the frame that did not fit.
+CHAT_WS_SEND_QUEUE_SIZE = int(os.getenv("CHAT_WS_SEND_QUEUE_SIZE", "256"))
+CHAT_WS_SEND_QUEUE_OVERFLOW = os.getenv("CHAT_WS_SEND_QUEUE_OVERFLOW", "disconnect")
+
+# --- Chat Backplane Config ---
+# How chat events reach sockets held by other workers or replicas.
+# "inprocess" delivers within this process only, which is enough for a single
+# worker. "postgres" also publishes every event with NOTIFY on CHANNEL and
+# LISTENs for the other workers' events, over one dedicated connection to
+# CHAT_BACKPLANE_URL (DATABASE_URL when unset).
+CHAT_BACKPLANE = os.getenv("CHAT_BACKPLANE", "inprocess")
+CHAT_BACKPLANE_URL = os.getenv("CHAT_BACKPLANE_URL", "") or DATABASE_URL
+CHAT_BACKPLANE_CHANNEL = os.getenv("CHAT_BACKPLANE_CHANNEL", "chat_events")
+
+# --- Chat Write-Behind Config ---
+# Messages sent over WebSocket are acknowledged on arrival and written in
+# group commits: the writer waits up to WINDOW_MS after the first queued
+# message for others, and writes at most BATCH_MAX per INSERT. Once QUEUE_MAX
+# messages are waiting, sockets wait for room before reading another frame.
+CHAT_WRITE_BATCH_WINDOW_MS = float(os.getenv("CHAT_WRITE_BATCH_WINDOW_MS", "5"))
+CHAT_WRITE_BATCH_MAX = int(os.getenv("CHAT_WRITE_BATCH_MAX", "200"))
+CHAT_WRITE_QUEUE_MAX = int(os.getenv("CHAT_WRITE_QUEUE_MAX", "10000"))
+
+# --- Chat Typing Config ---
+# Typing frames are coalesced into start/stop transitions per user and
+# conversation. A "stopped" frame is held for STOP_DELAY_MS in case typing
+# resumes, and a user who sends no frame for TIMEOUT_SECONDS is stopped.
+CHAT_TYPING_STOP_DELAY_MS = float(os.getenv("CHAT_TYPING_STOP_DELAY_MS", "1500"))
+CHAT_TYPING_TIMEOUT_SECONDS = float(os.getenv("CHAT_TYPING_TIMEOUT_SECONDS", "6"))
+
+# --- Chat Message Status Config ---
+# Delivered/read events are routed to their conversation through an LRU of
+# recently created message ids, and broadcast once per conversation every
+# STATUS_BATCH_MS (0 sends each event on its own).
+CHAT_MESSAGE_ROUTE_CACHE_MAX_SIZE = int(os.getenv("CHAT_MESSAGE_ROUTE_CACHE_MAX_SIZE", "100000"))
+CHAT_STATUS_BATCH_MS = float(os.getenv("CHAT_STATUS_BATCH_MS", "50"))
+
+# --- Chat Session Socket Config ---
+# A /ws/session socket carries every conversation its user subscribes to,
+# up to MAX_SUBSCRIPTIONS of them.
+CHAT_SESSION_MAX_SUBSCRIPTIONS = int(os.getenv("CHAT_SESSION_MAX_SUBSCRIPTIONS", "500"))
+
+# --- Chat Replay Config ---
+# Each conversation keeps its newest LOG_FRAMES broadcast frames for sockets
+# resuming after a reconnect, and the message ids of its newest LOG_MESSAGES
+# message frames to replay older gaps from the database, at most
+# MAX_MESSAGES at a time. Logs are kept for the LOG_ROOMS most recently
+# active conversations.
+CHAT_REPLAY_LOG_FRAMES = int(os.getenv("CHAT_REPLAY_LOG_FRAMES", "128"))
+CHAT_REPLAY_LOG_MESSAGES = int(os.getenv("CHAT_REPLAY_LOG_MESSAGES", "1024"))
+CHAT_REPLAY_LOG_ROOMS = int(os.getenv("CHAT_REPLAY_LOG_ROOMS", "2000"))
+CHAT_REPLAY_MAX_MESSAGES = int(os.getenv("CHAT_REPLAY_MAX_MESSAGES", "500"))
+
+# --- Chat Presence Config ---
+# Clients ping every 30 seconds; a socket that sends nothing for TTL_SECONDS
+# is closed and its user shown offline.
+CHAT_PRESENCE_TTL_SECONDS = float(os.getenv("CHAT_PRESENCE_TTL_SECONDS", "90"))
+
 # --- File Upload Config ---
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
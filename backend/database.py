@@ -1,19 +1,100 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.models import Base
-from config import DATABASE_URL
+from app.utils.pool_metrics import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    attach_pool_metrics,
+)
+from config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver.
+
+    sqlite -> aiosqlite, postgres/postgresql -> asyncpg. asyncpg does not
+    understand libpq's ``sslmode`` query parameter, so it is dropped here and
+    re-applied through ``connect_args`` by the caller.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(
+            hide_password=False
+        )
+    if backend in ("postgres", "postgresql"):
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(
+            ["sslmode"]
+        )
+        return url.render_as_string(hide_password=False)
+    return database_url
+
+
+def _async_connect_args(database_url: str) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {"check_same_thread": False}
+    # asyncpg accepts libpq's sslmode names directly via its ``ssl`` argument
+    sslmode = url.query.get("sslmode")
+    return {"ssl": sslmode} if sslmode else {}
+
 
 # Create engine
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=TimedQueuePool,
+    )
+    async_engine = create_async_engine(
+        get_async_database_url(DATABASE_URL),
+        connect_args=_async_connect_args(DATABASE_URL),
+        poolclass=TimedAsyncAdaptedQueuePool,
+    )
 else:
-    # pool_pre_ping checks each connection before use and transparently replaces
-    # dead ones (Railway's public DB proxy can silently drop idle connections).
-    # pool_recycle forces connections to be replaced before they go stale.
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
+    # Pool sizing and health checks come from config (DB_POOL_*). pool_pre_ping
+    # checks each connection before use and transparently replaces dead ones
+    # (Railway's public DB proxy can silently drop idle connections), at the
+    # cost of one round trip per checkout. pool_recycle forces connections to
+    # be replaced before they go stale.
+    pool_options = dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **pool_options)
+    async_engine = create_async_engine(
+        get_async_database_url(DATABASE_URL),
+        connect_args=_async_connect_args(DATABASE_URL),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **pool_options,
+    )
+
+attach_pool_metrics(engine, "sync")
+attach_pool_metrics(async_engine, "async")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False: after an async commit, touching an expired attribute
+# would need an implicit (sync) reload, which AsyncSession cannot do.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Only create tables automatically in local/test mode
 if DATABASE_URL.startswith("sqlite") or "TEST_DB_URL" in DATABASE_URL:
     Base.metadata.create_all(bind=engine)
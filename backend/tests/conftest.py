@@ -10,11 +10,15 @@ os.environ["TEST_ENV"] = "1"
 TEST_PASSWORD = "Fixture-Only-99"   # noqa: S105 — test fixture, not a secret
 TEST_WRONG_PASSWORD = "Wrong-Pass-00"  # noqa: S105
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
 from dotenv import load_dotenv
 import pytest
 import pytest_asyncio
+from fastapi.testclient import TestClient
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 # --------------------------------------------------------------------
@@ -28,11 +32,20 @@ print("Using TEST_DATABASE_URL:", TEST_DATABASE_URL)
 
 # Now import the app and Base (they may read DATABASE_URL on import)
 from app.main import app
-from app.models import Base
+from app.models import Base, ServiceRequestORM, UserORM
 
 # Also import both possible get_db callables (absolute and relative import paths)
 from app.dependencies.db import get_db as app_get_db
 from app.dependencies.db import get_db as rel_get_db
+from app.dependencies.db import get_async_db, get_session_factory
+from app.auth.utils import create_access_token
+from app.utils.query_counter import assert_max_queries as _assert_max_queries
+from app.auth.user_cache import user_cache
+from app.services.chat_hot_buffer import hot_messages
+from app.services.conversation_participants import membership_cache
+from app.services.message_routes import message_routes
+from app.websocket.chat_router import typing_tracker
+from app.websocket.message_writer import ChatMessageWriter, get_message_writer
 
 # --------------------------------------------------------------------
 # 🧱 Create dedicated engine and session for testing
@@ -51,6 +64,13 @@ def setup_test_db():
     """Drop and recreate all tables for a clean slate each test."""
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Cached users, memberships and messages would otherwise outlive the
+    # tables they were read from
+    user_cache.clear()
+    membership_cache.clear()
+    hot_messages.clear()
+    message_routes.clear()
+    typing_tracker.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -97,16 +117,99 @@ def override_get_db(db_session):
         finally:
             pass
 
+    async def _async_override():
+        # Wrap the same transaction-scoped session so async routes see (and
+        # roll back with) the data the sync fixtures created.
+        yield AsyncSession(sync_session_class=lambda **kwargs: db_session)
+
     # Apply overrides
     app.dependency_overrides[app_get_db] = _override
     app.dependency_overrides[rel_get_db] = _override
+    app.dependency_overrides[get_async_db] = _async_override
 
     try:
         yield
     finally:
         # Remove only the overrides we added
-        for key in (app_get_db, rel_get_db):
+        for key in (app_get_db, rel_get_db, get_async_db):
             try:
                 del app.dependency_overrides[key]
             except KeyError:
                 pass
+
+
+# --------------------------------------------------------------------
+# 📏 Query budget fixture
+# --------------------------------------------------------------------
+@pytest.fixture
+def assert_max_queries():
+    """Pin an endpoint's SQL budget: ``with assert_max_queries(3): ...``"""
+    return _assert_max_queries
+
+
+# --------------------------------------------------------------------
+# 💬 Chat fixtures shared by the REST and WebSocket tests
+# --------------------------------------------------------------------
+def add_service_request(db, owner, **fields):
+    """Add (and flush) the walking request the chat tests talk about."""
+    request = ServiceRequestORM(
+        user_id=owner.id,
+        service_type="walking",
+        title="Morning walk",
+        description="Morning walk around the block",
+        pet_ids=[1],
+        **fields,
+    )
+    db.add(request)
+    db.flush()
+    return request
+
+
+def fake_socket():
+    """A WebSocket stand-in that records the frames sent to it."""
+    return Mock(accept=AsyncMock(), send_text=AsyncMock(), close=AsyncMock())
+
+
+@pytest.fixture
+def committed_conversation():
+    """Create an owner, an optional assigned provider and their request.
+
+    Committed for real, unlike ``db_session``: sockets and the message
+    writer open their own sessions and must be able to see the rows.
+    """
+
+    def _create(owner_name, provider_name=None):
+        with TestingSessionLocal() as db:
+            owner = UserORM(username=owner_name, hashed_password=TEST_PASSWORD)
+            db.add(owner)
+            provider = None
+            if provider_name:
+                provider = UserORM(username=provider_name, hashed_password=TEST_PASSWORD, is_provider=True)
+                db.add(provider)
+            db.flush()
+            request = add_service_request(
+                db, owner, assigned_provider_id=provider.id if provider else None
+            )
+            conversation = SimpleNamespace(
+                token=create_access_token({"sub": owner.username}),
+                owner_id=owner.id,
+                provider_id=provider.id if provider else None,
+                service_request_id=request.id,
+            )
+            db.commit()
+        return conversation
+
+    return _create
+
+
+@pytest.fixture
+def socket_client():
+    """A TestClient whose sockets use the test DB and a real message writer."""
+    writer = ChatMessageWriter(TestingSessionLocal)
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    app.dependency_overrides[get_message_writer] = lambda: writer
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(writer.stop)
+    app.dependency_overrides.pop(get_session_factory, None)
+    app.dependency_overrides.pop(get_message_writer, None)
@@ -1,11 +1,25 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies.auth import get_current_user
 from app.main import app
-from app.models import ChatMessageORM, ServiceRequestORM, UserORM
-from tests.conftest import TEST_PASSWORD, TEST_WRONG_PASSWORD
+from app.models import (
+    ChatChangeORM,
+    ChatMessageORM,
+    ChatReadStateORM,
+    FCMTokenORM,
+    ServiceRequestORM,
+    UserORM,
+)
+from app.services.chat_sync import get_changes
+from app.utils.query_counter import track_queries
+from tests.conftest import TEST_PASSWORD, TEST_WRONG_PASSWORD, TestingSessionLocal
 
 
 @pytest.fixture
@@ -109,10 +123,13 @@ def override_current_user():
 async def test_send_message_success(
     client, db_session, override_current_user, owner_user, service_request
 ):
+    db_session.add(FCMTokenORM(user_id=service_request.assigned_provider_id, token="provider-device"))
+    db_session.commit()
     override_current_user(owner_user)
 
     with patch(
-        "app.routers.chat.send_push_notification_for_message", new=AsyncMock()
+        "app.routers.chat.firebase_admin_service.send_chat_notification",
+        return_value=True,
     ) as mock_push:
         response = await client.post(
             "/chat/messages",
@@ -131,7 +148,8 @@ async def test_send_message_success(
 
     saved_messages = db_session.query(ChatMessageORM).all()
     assert len(saved_messages) == 1
-    mock_push.assert_awaited_once()
+    mock_push.assert_called_once()
+    assert mock_push.call_args.kwargs["fcm_token"] == "provider-device"
 
 
 @pytest.mark.asyncio
@@ -171,9 +189,10 @@ async def test_get_conversation_for_assigned_provider_marks_messages_read(
     assert data["service_request_id"] == service_request.id
     assert len(data["messages"]) == 1
     assert data["unread_count"] == 1
+    assert data["messages"][0]["is_read"] is True
 
-    db_session.refresh(existing_message)
-    assert existing_message.is_read is True
+    state = db_session.get(ChatReadStateORM, (assigned_provider.id, service_request.id))
+    assert state.last_read_message_id == existing_message.id
 
 
 @pytest.mark.asyncio
@@ -217,6 +236,24 @@ async def test_get_my_conversations_for_owner_includes_owned_request(
     )
 
 
+
+@pytest.mark.asyncio
+async def test_my_conversations_keep_their_message_page(
+    client, override_current_user, owner_user, service_request
+):
+    override_current_user(owner_user)
+    for text in ("First", "Second"):
+        await client.post(
+            "/chat/messages",
+            json={"service_request_id": service_request.id, "message": text},
+        )
+
+    conversation = (await client.get("/chat/my-conversations")).json()[0]
+
+    # List views count the page and title it from its first message
+    assert [m["message"] for m in conversation["messages"]] == ["First", "Second"]
+    assert conversation["total_messages"] == 2
+
 @pytest.mark.asyncio
 async def test_mark_message_read_updates_delivery_state(
     client,
@@ -232,7 +269,687 @@ async def test_mark_message_read_updates_delivery_state(
     assert response.status_code == 200
     assert response.json()["message"] == "Message marked as read"
 
-    db_session.refresh(existing_message)
-    assert existing_message.is_read is True
-    assert existing_message.delivery_status == "read"
-    assert existing_message.read_at is not None
+    state = db_session.get(
+        ChatReadStateORM, (assigned_provider.id, existing_message.service_request_id)
+    )
+    assert state.last_read_message_id == existing_message.id
+    assert state.last_delivered_message_id == existing_message.id
+    assert state.read_at is not None
+
+
+@pytest.fixture
+def long_conversation(db_session, service_request, owner_user):
+    # Pairs share a timestamp so the id tie-breaker is exercised
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    messages = [
+        ChatMessageORM(
+            service_request_id=service_request.id,
+            sender_id=owner_user.id,
+            message=f"message {i}",
+            message_type="text",
+            created_at=base + timedelta(minutes=i // 2),
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(messages)
+    db_session.commit()
+    return [message.id for message in messages]
+
+
+@pytest.mark.asyncio
+async def test_conversation_keyset_pages_back_through_history(
+    client, override_current_user, owner_user, service_request, long_conversation
+):
+    override_current_user(owner_user)
+    url = f"/chat/conversations/{service_request.id}"
+
+    first = (await client.get(url, params={"limit": 3})).json()
+    assert [m["id"] for m in first["messages"]] == long_conversation[4:]
+    assert first["has_more"] is True
+    assert first["total_messages"] is None
+
+    second = (
+        await client.get(
+            url, params={"limit": 3, "before_id": first["oldest_message_id"]}
+        )
+    ).json()
+    assert [m["id"] for m in second["messages"]] == long_conversation[1:4]
+    assert second["has_more"] is True
+    assert second["current_offset"] is None
+
+    last = (
+        await client.get(
+            url, params={"limit": 3, "before_id": second["oldest_message_id"]}
+        )
+    ).json()
+    assert [m["id"] for m in last["messages"]] == long_conversation[:1]
+    assert last["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_conversation_after_id_returns_newer_messages(
+    client, override_current_user, owner_user, service_request, long_conversation
+):
+    override_current_user(owner_user)
+
+    response = await client.get(
+        f"/chat/conversations/{service_request.id}",
+        params={"limit": 4, "after_id": long_conversation[1]},
+    )
+
+    data = response.json()
+    assert [m["id"] for m in data["messages"]] == long_conversation[2:6]
+    assert data["has_more"] is True
+    assert data["newest_message_id"] == long_conversation[5]
+
+
+@pytest.mark.asyncio
+async def test_conversation_page_does_not_count_unless_asked(
+    client,
+    override_current_user,
+    owner_user,
+    service_request,
+    long_conversation,
+):
+    override_current_user(owner_user)
+    url = f"/chat/conversations/{service_request.id}"
+
+    with track_queries() as stats:
+        await client.get(url, params={"before_id": long_conversation[-1]})
+    assert not any("count(" in s.lower() for s in stats.statements)
+
+    response = await client.get(url, params={"include_total": "true"})
+    assert response.json()["total_messages"] == len(long_conversation)
+
+
+@pytest.mark.asyncio
+async def test_conversation_rejects_conflicting_cursors(
+    client, override_current_user, owner_user, service_request
+):
+    override_current_user(owner_user)
+    url = f"/chat/conversations/{service_request.id}"
+
+    both = await client.get(url, params={"before_id": 1, "after_id": 2})
+    with_offset = await client.get(url, params={"before_id": 1, "offset": 10})
+
+    assert both.status_code == 400
+    assert with_offset.status_code == 400
+
+
+@pytest.fixture
+def second_request(db_session, owner_user):
+    request = ServiceRequestORM(
+        user_id=owner_user.id,
+        service_type="sitting",
+        title="Need a sitter",
+        description="Looking for a sitter for the weekend.",
+        pet_ids=[],
+        responses_count=0,
+        created_at=datetime(2026, 1, 2),
+    )
+    db_session.add(request)
+    db_session.commit()
+    db_session.refresh(request)
+    return request
+
+
+@pytest.mark.asyncio
+async def test_inbox_returns_last_message_and_unread_count_in_one_query(
+    client,
+    db_session,
+    override_current_user,
+    owner_user,
+    assigned_provider,
+    service_request,
+    second_request,
+    assert_max_queries,
+):
+    for minute, sender in enumerate([owner_user, assigned_provider, assigned_provider]):
+        db_session.add(
+            ChatMessageORM(
+                service_request_id=service_request.id,
+                sender_id=sender.id,
+                message=f"message {minute}",
+                message_type="text",
+                created_at=datetime(2026, 1, 3, 9, minute),
+            )
+        )
+    db_session.commit()
+    db_session.refresh(owner_user)
+    override_current_user(owner_user)
+
+    with assert_max_queries(1):
+        response = await client.get("/chat/inbox")
+
+    data = response.json()
+    assert [c["service_request_id"] for c in data["conversations"]] == [
+        service_request.id,
+        second_request.id,
+    ]
+    latest, empty = data["conversations"]
+    assert latest["last_message"]["message"] == "message 2"
+    assert latest["last_message"]["sender"]["id"] == assigned_provider.id
+    assert latest["unread_count"] == 2
+    assert empty["last_message"] is None
+    assert empty["unread_count"] == 0
+    assert data["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_inbox_pages_by_last_activity(
+    client, override_current_user, owner_user, service_request, second_request
+):
+    override_current_user(owner_user)
+
+    first = (await client.get("/chat/inbox", params={"limit": 1})).json()
+    second = (
+        await client.get(
+            "/chat/inbox", params={"limit": 1, "cursor": first["next_cursor"]}
+        )
+    ).json()
+
+    assert first["has_more"] is True
+    assert second["has_more"] is False
+    assert {
+        first["conversations"][0]["service_request_id"],
+        second["conversations"][0]["service_request_id"],
+    } == {service_request.id, second_request.id}
+
+    bad = await client.get("/chat/inbox", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_inbox_includes_requests_a_provider_replied_to(
+    client,
+    db_session,
+    override_current_user,
+    provider_with_history,
+    service_request,
+):
+    db_session.add(
+        ChatMessageORM(
+            service_request_id=service_request.id,
+            sender_id=provider_with_history.id,
+            message="Happy to help",
+            message_type="text",
+        )
+    )
+    db_session.commit()
+    override_current_user(provider_with_history)
+
+    response = await client.get("/chat/inbox")
+
+    conversations = response.json()["conversations"]
+    assert [c["service_request_id"] for c in conversations] == [service_request.id]
+    assert conversations[0]["unread_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_mark_conversation_read_moves_watermark_in_one_call(
+    client,
+    db_session,
+    override_current_user,
+    assigned_provider,
+    service_request,
+    long_conversation,
+):
+    override_current_user(assigned_provider)
+    url = f"/chat/conversations/{service_request.id}/read"
+
+    partial = await client.put(url, params={"up_to": long_conversation[3]})
+    assert partial.json() == {
+        "service_request_id": service_request.id,
+        "read_up_to": long_conversation[3],
+        "unread_count": 3,
+    }
+
+    # An older id never moves the watermark back
+    await client.put(url, params={"up_to": long_conversation[0]})
+    inbox = (await client.get("/chat/inbox")).json()
+    assert inbox["conversations"][0]["unread_count"] == 3
+
+    everything = await client.put(url)
+    assert everything.json()["unread_count"] == 0
+    assert everything.json()["read_up_to"] == long_conversation[-1]
+
+
+@pytest.mark.asyncio
+async def test_mark_conversation_read_requires_participant(
+    client, override_current_user, outside_user, service_request
+):
+    override_current_user(outside_user)
+
+    response = await client.put(f"/chat/conversations/{service_request.id}/read")
+
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_sender_sees_read_status_from_the_other_watermark(
+    client,
+    db_session,
+    override_current_user,
+    owner_user,
+    assigned_provider,
+    service_request,
+    long_conversation,
+):
+    override_current_user(assigned_provider)
+    await client.put(
+        f"/chat/conversations/{service_request.id}/read",
+        params={"up_to": long_conversation[2]},
+    )
+    await client.put(f"/chat/messages/{long_conversation[4]}/delivered")
+
+    db_session.refresh(owner_user)
+    override_current_user(owner_user)
+    data = (await client.get(f"/chat/conversations/{service_request.id}")).json()
+
+    statuses = [m["delivery_status"] for m in data["messages"]]
+    assert statuses == ["read"] * 3 + ["delivered"] * 2 + ["sent"] * 2
+
+
+@pytest.fixture
+def chat_upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.routers.chat.CHAT_UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_send_message_with_files_streams_attachment_to_disk(
+    client, override_current_user, owner_user, service_request, chat_upload_dir
+):
+    override_current_user(owner_user)
+    content = b"%PDF-1.4 " + b"x" * 200_000
+
+    response = await client.post(
+        "/chat/messages-with-files",
+        data={"service_request_id": str(service_request.id), "message": "See attached"},
+        files=[("files", ("report.pdf", content, "application/pdf"))],
+    )
+
+    assert response.status_code == 200
+    attachment = response.json()["message_metadata"]["attachments"][0]
+    assert attachment["file_size"] == len(content)
+    assert attachment["sha256"] == hashlib.sha256(content).hexdigest()
+    stored = [p for p in chat_upload_dir.iterdir()]
+    assert [p.name for p in stored] == [attachment["file_url"].rsplit("/", 1)[-1]]
+    assert stored[0].read_bytes() == content
+
+
+@pytest.mark.asyncio
+async def test_send_message_with_oversized_file_leaves_nothing_behind(
+    client,
+    db_session,
+    override_current_user,
+    owner_user,
+    service_request,
+    chat_upload_dir,
+    monkeypatch,
+):
+    monkeypatch.setattr("app.routers.chat.MAX_FILE_SIZE", 1024)
+    override_current_user(owner_user)
+
+    response = await client.post(
+        "/chat/messages-with-files",
+        data={"service_request_id": str(service_request.id), "message": "Two files"},
+        files=[
+            ("files", ("small.txt", b"ok", "text/plain")),
+            ("files", ("big.txt", b"x" * 4096, "text/plain")),
+        ],
+    )
+
+    assert response.status_code == 400
+    assert "File too large" in response.json()["detail"]
+    assert list(chat_upload_dir.iterdir()) == []
+    assert db_session.query(ChatMessageORM).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_send_message_with_files_removes_attachments_if_commit_fails(
+    client, override_current_user, owner_user, service_request, chat_upload_dir, monkeypatch
+):
+    monkeypatch.setattr(
+        AsyncSession, "commit", AsyncMock(side_effect=RuntimeError("database went away"))
+    )
+    override_current_user(owner_user)
+
+    with pytest.raises(RuntimeError):
+        await client.post(
+            "/chat/messages-with-files",
+            data={"service_request_id": str(service_request.id), "message": "See attached"},
+            files=[("files", ("notes.txt", b"walk at six", "text/plain"))],
+        )
+
+    assert list(chat_upload_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_search_finds_message_sent_through_the_api(
+    client, override_current_user, owner_user, assigned_provider, service_request
+):
+    override_current_user(owner_user)
+    await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "Walk Rex at <noon> please"},
+    )
+    await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "Thanks again"},
+    )
+
+    override_current_user(assigned_provider)
+    response = await client.get("/chat/search", params={"q": "rex noo"})
+
+    assert response.status_code == 200
+    hits = response.json()["hits"]
+    assert [h["message"]["message"] for h in hits] == ["Walk Rex at <noon> please"]
+    assert hits[0]["snippet"] == "Walk <mark>Rex</mark> at &lt;<mark>noon</mark>&gt; please"
+
+
+@pytest.mark.asyncio
+async def test_search_only_covers_the_users_conversations(
+    client, override_current_user, outside_user, existing_message
+):
+    override_current_user(outside_user)
+
+    response = await client.get("/chat/search", params={"q": "hello"})
+
+    assert response.json() == {"hits": [], "has_more": False, "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_search_pages_through_ranked_hits(
+    client, db_session, override_current_user, owner_user, service_request
+):
+    for text in ["leash", "leash and collar", "leash leash leash", "no match here"]:
+        db_session.add(
+            ChatMessageORM(
+                service_request_id=service_request.id,
+                sender_id=owner_user.id,
+                message=text,
+                message_type="text",
+            )
+        )
+    db_session.commit()
+    db_session.refresh(owner_user)
+    override_current_user(owner_user)
+
+    first = (await client.get("/chat/search", params={"q": "leash", "limit": 2})).json()
+    second = (
+        await client.get(
+            "/chat/search",
+            params={"q": "leash", "limit": 2, "cursor": first["next_cursor"]},
+        )
+    ).json()
+
+    assert first["has_more"] is True
+    assert second["has_more"] is False
+    found = [h["message"]["message"] for h in first["hits"] + second["hits"]]
+    assert sorted(found) == ["leash", "leash and collar", "leash leash leash"]
+    scores = [h["score"] for h in first["hits"] + second["hits"]]
+    assert scores == sorted(scores)
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_bad_input(client, override_current_user, owner_user):
+    override_current_user(owner_user)
+
+    assert (await client.get("/chat/search", params={"q": ""})).status_code == 422
+    bad_cursor = await client.get("/chat/search", params={"q": "x", "cursor": "nope"})
+    assert bad_cursor.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_only_the_newest_candidates(
+    client, db_session, override_current_user, owner_user, service_request, monkeypatch
+):
+    monkeypatch.setattr("app.services.chat_search.CHAT_SEARCH_CANDIDATES", 2)
+    # The window applies when the index cannot narrow by conversation
+    monkeypatch.setattr("app.services.chat_search.MAX_FTS_CONVERSATIONS", 0)
+    for text in ["treat one", "treat two", "treat three"]:
+        db_session.add(
+            ChatMessageORM(
+                service_request_id=service_request.id,
+                sender_id=owner_user.id,
+                message=text,
+                message_type="text",
+            )
+        )
+    db_session.commit()
+    db_session.refresh(owner_user)
+    override_current_user(owner_user)
+
+    hits = (await client.get("/chat/search", params={"q": "treat"})).json()["hits"]
+
+    assert sorted(h["message"]["message"] for h in hits) == ["treat three", "treat two"]
+
+
+@pytest.mark.asyncio
+async def test_sync_returns_only_changes_since_the_cursor(
+    client,
+    db_session,
+    override_current_user,
+    owner_user,
+    assigned_provider,
+    service_request,
+):
+    override_current_user(assigned_provider)
+    start = (await client.get("/chat/sync")).json()
+    assert start["changes"] == []
+
+    override_current_user(owner_user)
+    sent = await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "Are you free?"},
+    )
+    message_id = sent.json()["id"]
+    override_current_user(assigned_provider)
+    await client.put(f"/chat/messages/{message_id}/read")
+    db_session.refresh(assigned_provider)
+
+    with track_queries() as stats:
+        response = await client.get("/chat/sync", params={"since": start["cursor"]})
+
+    assert stats.count == 1
+    body = response.json()
+    assert [(c["type"], c["message_id"]) for c in body["changes"]] == [
+        ("message", message_id),
+        ("read", message_id),
+    ]
+    assert body["changes"][0]["message"]["message"] == "Are you free?"
+    assert body["changes"][1]["actor_id"] == assigned_provider.id
+    assert body["has_more"] is False
+
+    override_current_user(owner_user)
+    owner_feed = (await client.get("/chat/sync", params={"since": 0})).json()
+    assert [c["type"] for c in owner_feed["changes"]] == ["message", "read"]
+
+
+def test_sync_waits_for_a_change_still_being_written():
+    with TestingSessionLocal() as db:
+        owner = UserORM(username="sync_owner", hashed_password=TEST_PASSWORD)
+        provider = UserORM(username="sync_provider", hashed_password=TEST_PASSWORD, is_provider=True)
+        db.add_all([owner, provider])
+        db.flush()
+        request = ServiceRequestORM(
+            user_id=owner.id,
+            service_type="walking",
+            title="Evening walk",
+            description="Evening walk in the park",
+            pet_ids=[1],
+        )
+        db.add(request)
+        db.commit()
+        owner_id, provider_id, request_id = owner.id, provider.id, request.id
+
+    # The first writer has taken the owner's next seq but not committed yet
+    slow = TestingSessionLocal()
+    slow.add(ChatMessageORM(service_request_id=request_id, sender_id=owner_id, message="first"))
+    slow.flush()
+
+    def send_second():
+        with TestingSessionLocal() as db:
+            db.add(ChatMessageORM(service_request_id=request_id, sender_id=provider_id, message="second"))
+            db.commit()
+
+    fast = threading.Thread(target=send_second)
+    fast.start()
+    fast.join(timeout=0.5)
+    with TestingSessionLocal() as db:
+        early = get_changes(db, owner_id, since=0)
+    assert early.changes == [] and early.cursor == 0
+    assert fast.is_alive()
+
+    slow.commit()
+    slow.close()
+    fast.join()
+    with TestingSessionLocal() as db:
+        sync = get_changes(db, owner_id, since=early.cursor)
+    assert [(c.seq, c.message.message) for c in sync.changes] == [(1, "first"), (2, "second")]
+
+
+@pytest.mark.asyncio
+async def test_repeated_read_ack_adds_one_change(
+    client,
+    db_session,
+    override_current_user,
+    owner_user,
+    assigned_provider,
+    service_request,
+):
+    override_current_user(owner_user)
+    sent = await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "Seen this?"},
+    )
+    message_id = sent.json()["id"]
+
+    override_current_user(assigned_provider)
+    for _ in range(2):
+        assert (await client.put(f"/chat/messages/{message_id}/read")).status_code == 200
+    await client.put(f"/chat/messages/{message_id}/delivered")
+
+    kinds = db_session.scalars(
+        select(ChatChangeORM.kind).where(ChatChangeORM.user_id == owner_user.id)
+    ).all()
+    assert kinds == ["message", "read"]
+
+
+@pytest.mark.asyncio
+async def test_idle_sync_poll_is_not_modified(
+    client, override_current_user, owner_user, service_request
+):
+    override_current_user(owner_user)
+    await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "Ping"},
+    )
+    first = await client.get("/chat/sync", params={"since": 0})
+    cursor = first.json()["cursor"]
+
+    idle = await client.get("/chat/sync", params={"since": cursor})
+    assert idle.json() == {"changes": [], "cursor": cursor, "has_more": False}
+
+    again = await client.get(
+        "/chat/sync",
+        params={"since": cursor},
+        headers={"If-None-Match": idle.headers["etag"]},
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_through_a_backlog(
+    client, override_current_user, owner_user, service_request, long_conversation
+):
+    override_current_user(owner_user)
+
+    first = (await client.get("/chat/sync", params={"since": 0, "limit": 4})).json()
+    rest = (
+        await client.get("/chat/sync", params={"since": first["cursor"], "limit": 4})
+    ).json()
+
+    assert first["has_more"] is True
+    assert rest["has_more"] is False
+    seen = [c["message_id"] for c in first["changes"] + rest["changes"]]
+    assert seen == long_conversation
+
+
+def _batch(service_request_id, *pairs):
+    return {
+        "messages": [
+            {
+                "service_request_id": service_request_id,
+                "client_message_id": client_id,
+                "message": text,
+            }
+            for client_id, text in pairs
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_send_inserts_once_and_dedupes_replays(
+    client, db_session, override_current_user, owner_user, service_request
+):
+    override_current_user(owner_user)
+    payload = _batch(service_request.id, ("a", "First"), ("b", "Second"), ("a", "First"))
+
+    db_session.refresh(owner_user)
+    with track_queries() as stats:
+        first = await client.post("/chat/messages/batch", json=payload)
+    replay = await client.post("/chat/messages/batch", json=payload)
+
+    assert first.status_code == 200
+    assert [r["duplicate"] for r in first.json()["results"]] == [False, False, True]
+    assert [r["duplicate"] for r in replay.json()["results"]] == [True, True, True]
+    assert [r["message"]["id"] for r in replay.json()["results"]] == [
+        r["message"]["id"] for r in first.json()["results"]
+    ]
+    inserts = [s for s in stats.statements if s.startswith("INSERT INTO chat_messages")]
+    assert len(inserts) == 1
+    assert db_session.query(ChatMessageORM).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_send_broadcasts_and_notifies_once_per_conversation(
+    client, db_session, override_current_user, owner_user, assigned_provider, service_request
+):
+    db_session.add(FCMTokenORM(user_id=assigned_provider.id, token="provider-device"))
+    db_session.commit()
+    override_current_user(owner_user)
+
+    with patch(
+        "app.routers.chat.manager.broadcast_message", new=AsyncMock()
+    ) as broadcast, patch(
+        "app.routers.chat.firebase_admin_service.send_chat_notification",
+        return_value=True,
+    ) as notify:
+        response = await client.post(
+            "/chat/messages/batch",
+            json=_batch(service_request.id, ("x", "Leaving now"), ("y", "Running late")),
+        )
+
+    assert response.status_code == 200
+    broadcast.assert_awaited_once()
+    frame = broadcast.call_args.args[0]
+    assert frame["type"] == "new_messages"
+    assert [m["message"] for m in frame["messages"]] == ["Leaving now", "Running late"]
+    notify.assert_called_once()
+    assert notify.call_args.kwargs["message_preview"] == "2 new messages: Running late"
+
+
+@pytest.mark.asyncio
+async def test_batch_send_requires_access_to_every_conversation(
+    client, override_current_user, outside_user, service_request
+):
+    override_current_user(outside_user)
+
+    response = await client.post(
+        "/chat/messages/batch", json=_batch(service_request.id, ("z", "Hi"))
+    )
+
+    assert response.status_code == 403
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.dependencies.auth import get_current_user
+from app.main import app
+from app.models import UserORM
+from app.schemas import ChatMessageRead
+from app.services.chat_hot_buffer import HotMessageBuffer, hot_messages
+from app.utils.query_counter import track_queries
+from app.websocket.backplane import InProcessBackplane
+from app.websocket.connection_manager import ConnectionManager
+from tests.conftest import TEST_PASSWORD, add_service_request
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _message(message_id, text="hello", service_request_id=1):
+    return ChatMessageRead(
+        id=message_id,
+        service_request_id=service_request_id,
+        sender_id=1,
+        message=text,
+        message_type="text",
+        is_read=False,
+        is_edited=False,
+        edited_at=None,
+        created_at=START + timedelta(seconds=message_id),
+    )
+
+
+def _seed(buffer, messages, has_more=False, service_request_id=1):
+    token = buffer.begin_seed(service_request_id)
+    buffer.seed(service_request_id, token, messages, has_more)
+
+
+@pytest.fixture
+def owner(db_session):
+    user = UserORM(username="hot_owner", hashed_password=TEST_PASSWORD)
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture
+def service_request(db_session, owner):
+    request = add_service_request(db_session, owner)
+    db_session.commit()
+    db_session.refresh(request)
+    return request
+
+
+@pytest.fixture
+def act_as_owner(owner):
+    app.dependency_overrides[get_current_user] = lambda: owner
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_newest_page_is_served_from_memory_after_a_write(
+    client, db_session, act_as_owner, owner, service_request
+):
+    url = f"/chat/conversations/{service_request.id}"
+    await client.get(url)
+    sent = await client.post(
+        "/chat/messages",
+        json={"service_request_id": service_request.id, "message": "On my way"},
+    )
+    assert sent.status_code == 200
+
+    db_session.refresh(owner)
+    with track_queries() as stats:
+        response = await client.get(url)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [message["message"] for message in body["messages"]] == ["On my way"]
+    assert body["has_more"] is False
+    assert not any("FROM chat_messages" in statement for statement in stats.statements)
+    assert hot_messages.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_older_pages_still_read_the_database(
+    client, act_as_owner, service_request
+):
+    for text in ("one", "two", "three"):
+        await client.post(
+            "/chat/messages",
+            json={"service_request_id": service_request.id, "message": text},
+        )
+    url = f"/chat/conversations/{service_request.id}"
+    newest = (await client.get(url, params={"limit": 2})).json()
+
+    older = await client.get(
+        url, params={"limit": 2, "before_id": newest["oldest_message_id"]}
+    )
+
+    assert newest["has_more"] is True
+    assert [message["message"] for message in older.json()["messages"]] == ["one"]
+    assert hot_messages.stats()["hits"] == 0
+
+
+def test_buffer_keeps_the_newest_messages_in_order():
+    buffer = HotMessageBuffer(capacity=3, max_bytes=1 << 20, ttl_seconds=60)
+    _seed(buffer, [_message(1), _message(2)])
+    buffer.append(1, _message(4))
+    buffer.append(1, _message(3))
+    buffer.append(1, _message(5))
+
+    page, has_more = buffer.newest_page(1, 3)
+    assert [message.id for message in page] == [3, 4, 5]
+    assert has_more is True
+    # The first two were trimmed, so a larger page has to come from the database
+    assert buffer.newest_page(1, 4) is None
+
+
+def test_seed_is_dropped_if_a_message_arrived_during_the_read():
+    buffer = HotMessageBuffer(capacity=10, max_bytes=1 << 20, ttl_seconds=60)
+    token = buffer.begin_seed(1)
+    buffer.append(1, _message(2))
+    buffer.seed(1, token, [_message(1)], has_more=False)
+
+    assert buffer.newest_page(1, 10) is None
+
+
+def test_buffer_evicts_least_recently_used_over_the_memory_cap():
+    size = len(_message(1, "x" * 200).model_dump_json())
+    buffer = HotMessageBuffer(capacity=10, max_bytes=size * 2, ttl_seconds=60)
+    _seed(buffer, [_message(1, "x" * 200, 1)], service_request_id=1)
+    _seed(buffer, [_message(2, "x" * 200, 2)], service_request_id=2)
+    buffer.newest_page(1, 10)
+    _seed(buffer, [_message(3, "x" * 200, 3)], service_request_id=3)
+
+    assert buffer.newest_page(2, 10) is None
+    assert buffer.newest_page(1, 10) is not None
+    stats = buffer.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= size * 2
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+@pytest.mark.asyncio
+async def test_messages_written_on_another_worker_reach_the_buffer():
+    backplane = InProcessBackplane()
+    buffers = [HotMessageBuffer(capacity=10, max_bytes=1 << 20, ttl_seconds=60) for _ in range(2)]
+    worker_a, worker_b = (ConnectionManager(backplane=backplane, hot_buffer=buffer) for buffer in buffers)
+    _seed(buffers[1], [_message(1)])
+
+    # Worker A's WebSocket send, then its REST send, which broadcasts no frame
+    buffers[0].append(1, _message(2))
+    await worker_a.broadcast_message(
+        {"type": "new_message", "message": _message(2).model_dump(mode="json"), "service_request_id": 1},
+        1,
+    )
+    await worker_a.broadcast_message({"type": "typing", "user_id": 1, "is_typing": True}, 1)
+    await worker_a.publish_messages(1, [_message(3)])
+    await worker_a.publish_messages(1, [_message(3)])
+
+    page, _ = buffers[1].newest_page(1, 10)
+    assert [message.id for message in page] == [1, 2, 3]
+    # Worker A had nothing buffered, so it did not start buffering
+    assert buffers[0].newest_page(1, 10) is None
@@ -22,7 +22,10 @@ client = TestClient(app)
 @pytest.fixture
 def mock_db():
     """Mock database session"""
-    return Mock(spec=Session)
+    db = Mock(spec=Session)
+    # Conversation has no read watermarks yet
+    db.query.return_value.filter.return_value.all.return_value = []
+    return db
 
 @pytest.fixture
 def mock_user():
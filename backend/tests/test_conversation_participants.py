@@ -0,0 +1,166 @@
+import pytest
+
+from app.dependencies.auth import get_current_user
+from app.main import app
+from app.models import (
+    ChatMessageORM,
+    ConversationParticipantORM,
+    UserORM,
+)
+from app.services.conversation_participants import MembershipCache, membership_cache
+from app.utils.query_counter import track_queries
+from tests.conftest import TEST_PASSWORD, add_service_request
+
+
+def _user(db_session, username, is_provider=False):
+    user = UserORM(username=username, hashed_password=TEST_PASSWORD, is_provider=is_provider)
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture
+def owner(db_session):
+    return _user(db_session, "participant_owner")
+
+
+@pytest.fixture
+def provider(db_session):
+    return _user(db_session, "participant_provider", is_provider=True)
+
+
+@pytest.fixture
+def service_request(db_session, owner):
+    request = add_service_request(db_session, owner)
+    db_session.commit()
+    db_session.refresh(request)
+    return request
+
+
+@pytest.fixture
+def act_as():
+    def _act_as(user):
+        app.dependency_overrides[get_current_user] = lambda: user
+
+    yield _act_as
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def _roles(db_session, service_request):
+    rows = db_session.query(ConversationParticipantORM).filter_by(
+        service_request_id=service_request.id
+    )
+    return {row.user_id: row.role for row in rows}
+
+
+@pytest.mark.asyncio
+async def test_owner_and_assigned_provider_become_participants(
+    client, db_session, act_as, owner, provider, service_request
+):
+    assert _roles(db_session, service_request) == {owner.id: "owner"}
+
+    act_as(owner)
+    response = await client.post(
+        f"/service-requests/{service_request.id}/assign-provider",
+        params={"provider_id": provider.id},
+    )
+
+    assert response.status_code == 200
+    db_session.expire_all()
+    assert _roles(db_session, service_request) == {
+        owner.id: "owner",
+        provider.id: "provider",
+    }
+
+
+@pytest.mark.asyncio
+async def test_repeat_access_is_answered_from_the_cache(
+    client, db_session, act_as, owner, service_request
+):
+    act_as(owner)
+    await client.get(f"/chat/conversations/{service_request.id}")
+
+    with track_queries() as stats:
+        response = await client.get(f"/chat/conversations/{service_request.id}")
+
+    assert response.status_code == 200
+    statements = " ".join(stats.statements)
+    assert "conversation_participants" not in statements
+    assert "count(" not in statements.lower()
+    assert membership_cache.stats()["hits"] == 1
+
+
+def test_replaced_provider_keeps_access_only_after_posting(
+    db_session, owner, provider, service_request
+):
+    quiet = _user(db_session, "quiet_provider", is_provider=True)
+    service_request.assigned_provider_id = quiet.id
+    db_session.commit()
+    service_request.assigned_provider_id = provider.id
+    db_session.commit()
+    db_session.add(
+        ChatMessageORM(
+            service_request_id=service_request.id,
+            sender_id=provider.id,
+            message="On my way",
+            message_type="text",
+        )
+    )
+    db_session.commit()
+    service_request.assigned_provider_id = None
+    db_session.commit()
+
+    assert _roles(db_session, service_request) == {
+        owner.id: "owner",
+        provider.id: "responder",
+    }
+
+
+@pytest.mark.asyncio
+async def test_reassignment_revokes_cached_access(
+    client, db_session, act_as, owner, provider, service_request
+):
+    service_request.assigned_provider_id = provider.id
+    db_session.commit()
+    act_as(provider)
+    assert (await client.get(f"/chat/conversations/{service_request.id}")).status_code == 200
+
+    service_request.assigned_provider_id = None
+    db_session.commit()
+
+    response = await client.get(f"/chat/conversations/{service_request.id}")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_missing_conversation_is_still_404(client, act_as, owner):
+    act_as(owner)
+
+    response = await client.get("/chat/conversations/999999")
+
+    assert response.status_code == 404
+
+
+def test_deleting_a_request_removes_its_participants(db_session, owner, service_request):
+    db_session.delete(service_request)
+    db_session.commit()
+
+    assert db_session.query(ConversationParticipantORM).count() == 0
+
+
+def test_membership_cache_expires_and_evicts(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(
+        "app.services.conversation_participants.time.monotonic", lambda: clock[0]
+    )
+    cache = MembershipCache(max_size=2, ttl_seconds=10)
+    cache.add(1, 10)
+    cache.add(2, 10)
+    cache.add(3, 10)
+
+    assert not cache.contains(1, 10)
+    assert cache.contains(3, 10)
+    clock[0] += 11
+    assert not cache.contains(3, 10)
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,48 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.utils.file_upload import FileTooLargeError, stream_upload_to_path
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_writes_file_and_hash(tmp_path):
+    data = b"a" * 300_000
+    upload = UploadFile(io.BytesIO(data), filename="a.bin")
+
+    stored = await stream_upload_to_path(
+        upload, tmp_path / "a.bin", max_size=len(data), chunk_size=4096
+    )
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "a.bin").read_bytes() == data
+    assert [p.name for p in tmp_path.iterdir()] == ["a.bin"]
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_stops_reading_once_over_limit(tmp_path):
+    # No declared size, so the limit can only be enforced while streaming
+    stream = CountingStream(b"b" * 1_000_000)
+    upload = UploadFile(stream, filename="b.bin")
+
+    with pytest.raises(FileTooLargeError):
+        await stream_upload_to_path(
+            upload, tmp_path / "b.bin", max_size=10_000, chunk_size=4096
+        )
+
+    assert stream.bytes_read <= 10_000 + 4096
+    assert list(tmp_path.iterdir()) == []
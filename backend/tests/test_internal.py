@@ -0,0 +1,59 @@
+import pytest
+
+from app.routers import internal
+from app.utils.pool_metrics import WAIT_BUCKETS_MS, PoolMetrics
+
+
+def test_pool_metrics_buckets_wait_times():
+    metrics = PoolMetrics("test")
+    metrics.observe_wait(0.0005)
+    metrics.observe_wait(0.030)
+    metrics.observe_wait(60, timed_out=True)
+
+    snapshot = metrics.snapshot()
+    buckets = snapshot["wait_ms"]["buckets"]
+    assert buckets["le_1ms"] == 1
+    assert buckets["le_50ms"] == 1
+    assert buckets["le_inf"] == 1
+    assert sum(buckets.values()) == 3
+    assert len(buckets) == len(WAIT_BUCKETS_MS) + 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_ms"]["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_db_pool_endpoint_reports_both_engines(client):
+    response = await client.get("/internal/db-pool")
+
+    assert response.status_code == 200
+    data = response.json()
+    pools = {pool["name"]: pool for pool in data["pools"]}
+    assert {"sync", "async"} <= set(pools)
+    for key in ("checked_out", "idle", "overflow", "wait_ms"):
+        assert key in pools["sync"]
+    assert data["config"]["pool_size"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_db_pool_endpoint_requires_token_when_configured(client, monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", "s3cret")
+
+    denied = await client.get("/internal/db-pool")
+    allowed = await client.get(
+        "/internal/db-pool", headers={"X-Internal-Token": "s3cret"}
+    )
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_ws_send_queue_endpoint_reports_depth_and_latency(client):
+    response = await client.get("/internal/chat-ws-send-queues")
+
+    assert response.status_code == 200
+    data = response.json()
+    for key in ("connections", "queued", "depth_max", "dropped", "slow_disconnects"):
+        assert key in data
+    assert data["overflow"] in ("disconnect", "drop")
+    assert data["latency_ms"]["buckets"]["le_inf"] >= 0
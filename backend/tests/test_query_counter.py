@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.dependencies.auth import get_current_user
+from app.main import app
+from app.models import PetORM, UserORM, WeightRecordORM
+from app.utils.query_counter import (
+    N_PLUS_ONE_THRESHOLD,
+    QUERY_COUNT_HEADER,
+    QUERY_TIME_HEADER,
+    track_queries,
+)
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def owner(db_session):
+    user = UserORM(username="qc_owner", hashed_password=TEST_PASSWORD)
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def pets_with_weights(db_session, owner):
+    for i in range(3):
+        pet = PetORM(user_id=owner.id, name=f"pet{i}", breed_type="dog", breed="mix")
+        db_session.add(pet)
+        db_session.flush()
+        for day in range(1, 4):
+            db_session.add(
+                WeightRecordORM(pet_id=pet.id, weight=10, date=datetime(2026, 1, day))
+            )
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_response_reports_query_count_and_db_time(client, pets_with_weights):
+    response = await client.get("/api/weight-records/")
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) >= 2
+    assert float(response.headers[QUERY_TIME_HEADER]) >= 0
+
+
+@pytest.mark.asyncio
+async def test_pets_list_query_budget(client, pets_with_weights, assert_max_queries):
+    # One pets query plus one per selectin-loaded PetORM relationship,
+    # independent of how many pets the user has.
+    with assert_max_queries(9):
+        response = await client.get("/pets/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+def test_assert_max_queries_fails_when_budget_exceeded(db_session, assert_max_queries):
+    with pytest.raises(AssertionError, match="at most 1 queries, 2 were executed"):
+        with assert_max_queries(1):
+            db_session.execute(text("SELECT 1"))
+            db_session.execute(text("SELECT 2"))
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(db_session):
+    with track_queries() as outer:
+        with track_queries() as inner:
+            for pet_id in range(N_PLUS_ONE_THRESHOLD):
+                db_session.execute(
+                    text("SELECT * FROM pets WHERE id = :id"), {"id": pet_id}
+                )
+
+    assert inner.count == N_PLUS_ONE_THRESHOLD
+    assert outer.count == N_PLUS_ONE_THRESHOLD
+    [(statement, count)] = inner.repeated_statements()
+    assert "FROM pets" in statement
+    assert count == N_PLUS_ONE_THRESHOLD
@@ -0,0 +1,187 @@
+"""
+Query-plan regression tests.
+
+Each statement mirrors the shape of a hot router query. The test seeds a few
+rows, asks the database for its plan and fails if the hot table is read with
+a full (sequential) scan instead of an index search.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import desc, func, select, text, tuple_
+
+from app.models import (
+    ChatChangeORM,
+    ChatMessageORM,
+    FCMTokenORM,
+    LocationHistoryORM,
+    PetORM,
+    ProviderProfileORM,
+    ProviderReviewORM,
+    ServiceRequestORM,
+    TaskORM,
+    UserORM,
+    VaccinationORM,
+    WeightRecordORM,
+)
+from app.routers.chat import _cursor_position
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def seeded(db_session):
+    now = datetime(2026, 1, 1)
+    users = [
+        UserORM(username=f"plan_user_{i}", hashed_password=TEST_PASSWORD)
+        for i in range(5)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+
+    profile = ProviderProfileORM(user_id=users[1].id)
+    db_session.add(profile)
+    db_session.flush()
+
+    for user in users:
+        for i in range(3):
+            pet = PetORM(user_id=user.id, name=f"pet{i}", breed_type="dog", breed="mix")
+            db_session.add(pet)
+            db_session.flush()
+            for day in range(5):
+                when = now - timedelta(days=day)
+                db_session.add(WeightRecordORM(pet_id=pet.id, weight=10 + day, date=when))
+                db_session.add(
+                    LocationHistoryORM(pet_id=pet.id, latitude=0, longitude=0, timestamp=when)
+                )
+                db_session.add(
+                    VaccinationORM(
+                        pet_id=pet.id,
+                        vaccine_name="Rabies",
+                        date_administered=date(2025, 1, 1),
+                        next_due_date=date(2026, 1, 1) + timedelta(days=day),
+                        veterinarian="Dr",
+                        clinic="Clinic",
+                    )
+                )
+        db_session.add(
+            TaskORM(user_id=user.id, title="walk", description="walk", date_time=now)
+        )
+        db_session.add(
+            FCMTokenORM(user_id=user.id, token=f"token-{user.id}", is_active="true")
+        )
+        request = ServiceRequestORM(
+            user_id=user.id,
+            service_type="walking",
+            title="walk",
+            description="walk",
+            pet_ids=[],
+            status="open",
+        )
+        db_session.add(request)
+        db_session.flush()
+        for i in range(10):
+            db_session.add(
+                ChatMessageORM(
+                    service_request_id=request.id,
+                    sender_id=user.id,
+                    message=f"message {i}",
+                    created_at=now + timedelta(minutes=i),
+                )
+            )
+        db_session.add(
+            ProviderReviewORM(
+                provider_id=profile.id,
+                reviewer_id=user.id,
+                rating=5,
+                service_type="walking",
+            )
+        )
+    db_session.commit()
+    return {"user_id": users[0].id, "provider_id": profile.id}
+
+
+def hot_queries(ids):
+    user_id = ids["user_id"]
+    pet_ids = select(PetORM.id).where(PetORM.user_id == user_id)
+    return {
+        "chat_messages": select(ChatMessageORM)
+        .where(ChatMessageORM.service_request_id == 1)
+        .order_by(ChatMessageORM.created_at.desc())
+        .limit(50),
+        "chat_messages keyset": select(ChatMessageORM)
+        .where(
+            ChatMessageORM.service_request_id == 1,
+            tuple_(ChatMessageORM.created_at, ChatMessageORM.id)
+            < _cursor_position(1, 10),
+        )
+        .order_by(ChatMessageORM.created_at.desc(), ChatMessageORM.id.desc())
+        .limit(51),
+        "chat_changes sync": select(ChatChangeORM)
+        .where(ChatChangeORM.user_id == user_id, ChatChangeORM.seq > 3)
+        .order_by(ChatChangeORM.seq)
+        .limit(201),
+        "service_requests": select(ServiceRequestORM)
+        .where(ServiceRequestORM.status == "open", ServiceRequestORM.is_urgent.is_(True))
+        .order_by(desc(ServiceRequestORM.is_urgent), desc(ServiceRequestORM.created_at)),
+        "weight_records": select(WeightRecordORM)
+        .where(WeightRecordORM.pet_id.in_([1, 2, 3]))
+        .order_by(WeightRecordORM.date.desc()),
+        "location_history": select(LocationHistoryORM)
+        .where(LocationHistoryORM.pet_id == 1)
+        .order_by(LocationHistoryORM.timestamp.desc()),
+        "vaccinations": select(VaccinationORM)
+        .where(VaccinationORM.pet_id == 1)
+        .order_by(VaccinationORM.next_due_date),
+        "pets": select(PetORM).where(PetORM.user_id == user_id),
+        "tasks": select(TaskORM).where(TaskORM.user_id == user_id),
+        "fcm_tokens": select(FCMTokenORM).where(
+            FCMTokenORM.user_id == user_id, FCMTokenORM.is_active == "true"
+        ),
+        "provider_reviews": select(ProviderReviewORM)
+        .where(ProviderReviewORM.provider_id == ids["provider_id"])
+        .order_by(ProviderReviewORM.created_at.desc()),
+        "weight_records via pets": select(func.count(WeightRecordORM.id)).where(
+            WeightRecordORM.pet_id.in_(pet_ids)
+        ),
+    }
+
+
+def full_scans(db_session, statement, table):
+    dialect = db_session.get_bind().dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect.name == "sqlite":
+        rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        details = [row[-1] for row in rows]
+        # "SCAN t" / "SCAN t USING INDEX" read the whole table; "SEARCH t" seeks
+        return [d for d in details if d.startswith(f"SCAN {table}")]
+
+    # Tiny seeded tables would always be seq-scanned by Postgres' cost model;
+    # disabling seq scans asks "could this use an index at all?"
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = [row[0] for row in db_session.execute(text(f"EXPLAIN {sql}")).all()]
+    return [line for line in plan if f"Seq Scan on {table}" in line]
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "chat_messages",
+        "chat_messages keyset",
+        "chat_changes sync",
+        "service_requests",
+        "weight_records",
+        "location_history",
+        "vaccinations",
+        "pets",
+        "tasks",
+        "fcm_tokens",
+        "provider_reviews",
+        "weight_records via pets",
+    ],
+)
+def test_hot_query_uses_index(db_session, seeded, name):
+    statement = hot_queries(seeded)[name]
+    table = name.split(" ")[0]
+
+    assert full_scans(db_session, statement, table) == []
@@ -10,6 +10,7 @@ from app.models.task import TaskORM
 
 from app.dependencies.auth import get_current_user
 from app.dependencies.auth import get_current_user as rel_get_current_user
+from app.utils.query_counter import track_queries
 from tests.conftest import TEST_PASSWORD, TEST_WRONG_PASSWORD
 
 
@@ -151,6 +152,26 @@ async def test_update_task_success(client, db_session, test_user):
     assert body["status"] == "in_progress"
 
 
+@pytest.mark.asyncio
+async def test_task_writes_do_not_read_the_row_back(client, db_session, test_user):
+    db_session.refresh(test_user)
+    with track_queries() as created:
+        resp = await client.post("/task/", json=make_task_payload())
+    with track_queries() as updated:
+        await client.put(f"/task/{resp.json()['id']}/", json={"title": "Renamed"})
+
+    def task_reads(stats):
+        return sum(
+            count
+            for statement, count in stats.statements.items()
+            if statement.startswith("SELECT") and "FROM tasks" in statement
+        )
+
+    assert task_reads(created) == 0
+    # The ownership lookup before the update is the only read
+    assert task_reads(updated) == 1
+
+
 @pytest.mark.asyncio
 async def test_delete_task_success(client, db_session, test_user):
     task = TaskORM(
@@ -13,6 +13,7 @@ from app.main import app
 from app.models import UserORM
 from app.dependencies.auth import get_current_user
 from app.dependencies.auth import get_current_user as rel_get_current_user
+from app.utils.query_counter import track_queries
 from tests.conftest import TEST_PASSWORD, TEST_WRONG_PASSWORD
 
 
@@ -247,3 +248,31 @@ async def test_overdue_vaccinations_only_includes_past_due_dates(client, owner):
         assert "Future Shot" not in names
     finally:
         _clear_auth_override()
+
+
+@pytest.mark.asyncio
+async def test_vaccination_timestamps_come_back_from_the_insert(client, owner):
+    pet_id = await _create_pet(client, owner)
+
+    _override_auth_as(owner)
+    try:
+        with track_queries() as stats:
+            resp = await client.post(
+                f"/vaccinations/pet/{pet_id}/",
+                json={
+                    "vaccine_name": "Rabies",
+                    "date_administered": str(date.today()),
+                    "veterinarian": "Dr. Smith",
+                    "clinic": "Main St Clinic",
+                    "pet_id": pet_id,
+                },
+            )
+    finally:
+        _clear_auth_override()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["created_at"] is not None
+    # Loading the pet selects its vaccinations; the new row is never re-read
+    assert not any(
+        "WHERE vaccinations.id =" in statement for statement in stats.statements
+    )
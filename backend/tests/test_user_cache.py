@@ -0,0 +1,111 @@
+import pytest
+
+from app.auth.user_cache import (
+    UserIdentityCache,
+    get_user_by_username_cached,
+    user_cache,
+)
+from app.auth.utils import create_access_token
+from app.models import UserORM
+from app.utils.query_counter import track_queries
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def user(db_session):
+    u = UserORM(username="cache_user", hashed_password=TEST_PASSWORD, full_name="Before")
+    db_session.add(u)
+    db_session.commit()
+    db_session.refresh(u)
+    return u
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token({"sub": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_cache_hit_skips_user_query(db_session, user):
+    get_user_by_username_cached(db_session, user.username)
+    db_session.expunge_all()
+
+    with track_queries() as stats:
+        cached = get_user_by_username_cached(db_session, user.username)
+
+    assert stats.count == 0
+    assert cached.id == user.id
+    assert cached in db_session
+    assert user_cache.stats()["hits"] == 1
+    assert user_cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = UserIdentityCache(max_size=2, ttl_seconds=60)
+    for i in range(3):
+        cache.put(UserORM(id=i, username=f"u{i}", hashed_password="x"))
+
+    assert cache.get("u0") is None
+    assert cache.get("u2").id == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache = UserIdentityCache(max_size=10, ttl_seconds=5)
+    clock = [100.0]
+    monkeypatch.setattr("app.auth.user_cache.time.monotonic", lambda: clock[0])
+    cache.put(UserORM(id=1, username="u1", hashed_password="x"))
+
+    clock[0] += 6
+    assert cache.get("u1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_commit_touching_user_invalidates_entry(db_session, user):
+    get_user_by_username_cached(db_session, user.username)
+    assert user_cache.stats()["size"] == 1
+
+    user.full_name = "After"
+    db_session.commit()
+
+    assert user_cache.stats()["size"] == 0
+    assert user_cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_profile_update_is_visible_on_next_request(client, user, auth_headers):
+    first = await client.get("/auth/me", headers=auth_headers)
+    assert first.json()["full_name"] == "Before"
+
+    patched = await client.patch(
+        "/auth/me", json={"full_name": "After"}, headers=auth_headers
+    )
+    assert patched.status_code == 200
+
+    again = await client.get("/auth/me", headers=auth_headers)
+    assert again.json()["full_name"] == "After"
+
+
+@pytest.mark.asyncio
+async def test_provider_toggle_is_visible_on_next_request(client, user, auth_headers):
+    await client.get("/auth/me", headers=auth_headers)
+
+    toggled = await client.patch("/auth/me/provider", headers=auth_headers)
+    assert toggled.json()["is_provider"] is True
+
+    again = await client.get("/auth/me", headers=auth_headers)
+    assert again.json()["is_provider"] is True
+
+
+@pytest.mark.asyncio
+async def test_internal_endpoint_reports_cache_stats(client, user, auth_headers):
+    await client.get("/auth/me", headers=auth_headers)
+    await client.get("/auth/me", headers=auth_headers)
+
+    response = await client.get("/internal/auth-cache")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["hits"] == 1
+    assert body["misses"] == 1
+    assert body["size"] == 1
@@ -54,6 +54,10 @@ def mock_message():
     message.delivery_status = "sent"
     return message
 
+async def _send_never_completes(text):
+    """send_text of a client whose connection has stalled"""
+    await asyncio.Event().wait()
+
 class TestConnectionManager:
     """Test WebSocket connection manager"""
     
@@ -142,9 +146,9 @@ class TestConnectionManager:
         message_data = {"type": "new_message", "content": "Test"}
         await manager.broadcast_message(message_data, service_request_id=1, exclude_user_id=1)
         
-        # Only websocket2 should receive the message
+        # Only websocket2 should receive the message, with the room's first seq
         mock_websocket1.send_text.assert_not_called()
-        mock_websocket2.send_text.assert_called_once_with(json.dumps(message_data))
+        mock_websocket2.send_text.assert_called_once_with(json.dumps({**message_data, "seq": 1}))
     
     @pytest.mark.asyncio
     async def test_typing_indicator(self):
@@ -165,6 +169,98 @@ class TestConnectionManager:
         assert message_data["user_id"] == 1
         assert message_data["is_typing"] is True
 
+    @pytest.mark.asyncio
+    async def test_presence_counts_each_user_once_per_room(self):
+        """Test a user with several sockets in a room is online until the last closes"""
+        manager = ConnectionManager()
+        sockets = [Mock(accept=AsyncMock()) for _ in range(3)]
+        
+        await manager.connect(sockets[0], user_id=1, service_request_id=1)
+        await manager.connect(sockets[1], user_id=1, service_request_id=1)
+        await manager.connect(sockets[2], user_id=2, service_request_id=1)
+        await manager.disconnect(sockets[0], user_id=1, service_request_id=1)
+        
+        assert manager.online_user_ids(1) == {1, 2}
+        await manager.disconnect(sockets[1], user_id=1, service_request_id=1)
+        assert manager.online_user_ids(1) == {2}
+    
+    @pytest.mark.asyncio
+    async def test_failed_personal_send_leaves_the_room(self):
+        """Test a dead socket found by a personal send is dropped from its room too"""
+        manager = ConnectionManager()
+        mock_websocket = Mock(accept=AsyncMock())
+        mock_websocket.send_text = AsyncMock(side_effect=RuntimeError("closed"))
+        
+        await manager.connect(mock_websocket, user_id=1, service_request_id=1)
+        await manager.send_personal_message("ping", user_id=1)
+        
+        assert manager.service_request_connections == {}
+        assert manager.connection_owners == {}
+        assert manager.online_user_ids(1) == set()
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_hold_up_the_room(self):
+        """Test a client that never finishes a send does not delay the others"""
+        manager = ConnectionManager()
+        slow_websocket = Mock(accept=AsyncMock())
+        slow_websocket.send_text = AsyncMock(side_effect=_send_never_completes)
+        fast_websocket = Mock(accept=AsyncMock())
+        fast_websocket.send_text = AsyncMock()
+        
+        await manager.connect(slow_websocket, user_id=1, service_request_id=1)
+        await manager.connect(fast_websocket, user_id=2, service_request_id=1)
+        for n in range(3):
+            await asyncio.wait_for(
+                manager.broadcast_message({"n": n}, service_request_id=1), timeout=1
+            )
+        
+        assert fast_websocket.send_text.call_count == 3
+        assert manager.outboxes[slow_websocket].depth == 2
+        stats = manager.send_queue_stats()
+        assert stats["sent"] == 3
+        assert stats["queued"] == 2
+        await manager.disconnect(slow_websocket)
+        await asyncio.sleep(0)
+    
+    @pytest.mark.asyncio
+    async def test_full_send_queue_disconnects_the_slow_consumer(self):
+        """Test overflowing a socket's queue closes it and removes it from the room"""
+        manager = ConnectionManager(send_queue_size=2)
+        slow_websocket = Mock(accept=AsyncMock(), close=AsyncMock())
+        slow_websocket.send_text = AsyncMock(side_effect=_send_never_completes)
+        
+        await manager.connect(slow_websocket, user_id=1, service_request_id=1)
+        # One frame is in flight, two wait in the queue, the fourth overflows
+        for n in range(4):
+            await manager.broadcast_message({"n": n}, service_request_id=1)
+        await asyncio.sleep(0)
+        
+        assert manager.online_user_ids(1) == set()
+        assert slow_websocket not in manager.outboxes
+        slow_websocket.close.assert_called_once()
+        assert slow_websocket.close.call_args.kwargs["code"] == 1013
+        assert manager.send_queue_stats()["slow_disconnects"] == 1
+        await asyncio.sleep(0)
+    
+    @pytest.mark.asyncio
+    async def test_full_send_queue_drops_frames_under_drop_policy(self):
+        """Test the drop policy keeps the socket and counts the lost frame"""
+        manager = ConnectionManager(send_queue_size=1, overflow="drop")
+        slow_websocket = Mock(accept=AsyncMock(), close=AsyncMock())
+        slow_websocket.send_text = AsyncMock(side_effect=_send_never_completes)
+        
+        await manager.connect(slow_websocket, user_id=1, service_request_id=1)
+        for n in range(3):
+            await manager.send_personal_message(f"frame {n}", user_id=1)
+        
+        assert manager.online_user_ids(1) == {1}
+        slow_websocket.close.assert_not_called()
+        stats = manager.send_queue_stats()
+        assert stats["dropped"] == 1
+        assert stats["depth_max"] == 1
+        await manager.disconnect(slow_websocket)
+        await asyncio.sleep(0)
+
 class TestWebSocketMessageHandlers:
     """Test WebSocket message handlers"""
     
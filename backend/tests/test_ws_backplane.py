@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import pytest
+
+from app.websocket.backplane import InProcessBackplane, PostgresBackplane
+from app.websocket.connection_manager import ConnectionManager
+from tests.conftest import fake_socket
+
+
+class FakePostgres:
+    """LISTEN/NOTIFY between the connections it hands out, like one server"""
+
+    def __init__(self):
+        self.connections = []
+
+    async def connect(self, dsn):
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def notify(self, channel, payload):
+        assert len(payload.encode()) < 8000
+        loop = asyncio.get_running_loop()
+        for connection in self.connections:
+            for callback in connection.listeners.get(channel, ()):
+                # asyncpg runs listener callbacks from the event loop too
+                loop.call_soon(callback, connection, 1, channel, payload)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.listeners = {}
+        self.termination_listeners = []
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.listeners.setdefault(channel, []).append(callback)
+
+    async def remove_listener(self, channel, callback):
+        self.listeners[channel].remove(callback)
+
+    async def execute(self, query, channel, payload):
+        assert query == "SELECT pg_notify($1, $2)"
+        self.server.notify(channel, payload)
+
+    async def close(self):
+        self.server.connections.remove(self)
+
+    def terminate(self):
+        self.server.connections.remove(self)
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+def _received(websocket):
+    return [json.loads(call.args[0]) for call in websocket.send_text.call_args_list]
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def postgres_workers():
+    server = FakePostgres()
+    workers = [
+        ConnectionManager(
+            backplane=PostgresBackplane("postgresql://chat@db/app", connect=server.connect)
+        )
+        for _ in range(2)
+    ]
+    for worker in workers:
+        await worker.start()
+    yield server, workers
+    for worker in workers:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_in_process_backplane_reaches_every_subscribed_manager():
+    backplane = InProcessBackplane()
+    worker_a, worker_b = ConnectionManager(backplane=backplane), ConnectionManager(backplane=backplane)
+    sender, recipient, other_room = fake_socket(), fake_socket(), fake_socket()
+    await worker_a.connect(sender, user_id=1, service_request_id=7)
+    await worker_b.connect(recipient, user_id=2, service_request_id=7)
+    await worker_b.connect(other_room, user_id=3, service_request_id=8)
+
+    await worker_a.broadcast_message({"type": "new_message", "id": 1}, 7, exclude_user_id=1)
+    await worker_a.send_personal_message("hello", user_id=3)
+
+    assert _received(recipient) == [{"type": "new_message", "id": 1, "seq": 1}]
+    sender.send_text.assert_not_called()
+    other_room.send_text.assert_called_once_with("hello")
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_delivers_once_on_every_worker(postgres_workers):
+    _, (worker_a, worker_b) = postgres_workers
+    local, remote = fake_socket(), fake_socket()
+    await worker_a.connect(local, user_id=1, service_request_id=7)
+    await worker_b.connect(remote, user_id=2, service_request_id=7)
+
+    await worker_a.send_typing_indicator(7, user_id=3, is_typing=True)
+    await _settle()
+
+    assert [frame["type"] for frame in _received(local)] == ["typing"]
+    assert [frame["type"] for frame in _received(remote)] == ["typing"]
+    assert worker_b.backplane.stats()["received"] == 1
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_splits_events_over_the_notify_limit(postgres_workers):
+    _, (worker_a, worker_b) = postgres_workers
+    remote = fake_socket()
+    await worker_b.connect(remote, user_id=2, service_request_id=7)
+    messages = [{"id": n, "message": "é" * 2000} for n in range(10)]
+
+    await worker_a.broadcast_message({"type": "new_messages", "messages": messages}, 7)
+    await _settle()
+
+    assert _received(remote) == [{"type": "new_messages", "messages": messages, "seq": 1}]
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_listens_again_after_losing_its_connection(postgres_workers):
+    server, (worker_a, worker_b) = postgres_workers
+    remote = fake_socket()
+    await worker_b.connect(remote, user_id=2, service_request_id=7)
+
+    worker_b.backplane._connection.terminate()
+    await _settle()
+    await worker_a.send_to_service_request("after reconnect", 7)
+    await _settle()
+
+    remote.send_text.assert_called_once_with("after reconnect")
+    assert worker_b.backplane.stats()["reconnects"] == 1
@@ -0,0 +1,34 @@
+import json
+from contextlib import ExitStack
+
+from app.models import ChatMessageORM
+from app.websocket.connection_manager import manager
+from tests.conftest import TestingSessionLocal, engine
+
+IDLE_SOCKETS = 1000
+
+
+def test_idle_sockets_hold_no_database_connections(socket_client, committed_conversation):
+    conversation = committed_conversation("soak_owner")
+    url = f"/ws/chat/{conversation.service_request_id}?token={conversation.token}"
+
+    with ExitStack() as stack:
+        sockets = [
+            stack.enter_context(socket_client.websocket_connect(url))
+            for _ in range(IDLE_SOCKETS)
+        ]
+        for websocket in sockets:
+            assert websocket.receive_json()["type"] == "connection_established"
+
+        assert len(manager.connection_owners) == IDLE_SOCKETS
+        assert engine.pool.checkedout() == 0
+
+        # A message borrows a connection only while its batch is written
+        sockets[0].send_text(json.dumps({"type": "message", "message": "On my way"}))
+        assert sockets[0].receive_json()["type"] == "message_accepted"
+        assert sockets[0].receive_json()["type"] == "message_sent"
+        assert engine.pool.checkedout() == 0
+
+    assert manager.connection_owners == {}
+    with TestingSessionLocal() as db:
+        assert db.query(ChatMessageORM).filter_by(message="On my way").count() == 1
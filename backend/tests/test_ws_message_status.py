@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from app.models import ChatMessageORM, UserORM
+from app.services.message_routes import message_routes
+from app.websocket.backplane import InProcessBackplane
+from app.websocket.connection_manager import ConnectionManager
+from tests.conftest import TEST_PASSWORD, TestingSessionLocal, add_service_request, fake_socket
+
+
+def _received(websocket):
+    return [json.loads(call.args[0]) for call in websocket.send_text.call_args_list]
+
+
+def _add_message(db, text):
+    user = UserORM(username=f"status_{text}", hashed_password=TEST_PASSWORD)
+    db.add(user)
+    db.flush()
+    request = add_service_request(db, user)
+    message = ChatMessageORM(service_request_id=request.id, sender_id=user.id, message=text)
+    db.add(message)
+    db.flush()
+    return message.id, request.id
+
+
+def test_message_routes_are_learned_on_commit_only():
+    with TestingSessionLocal() as db:
+        committed_id, service_request_id = _add_message(db, "kept")
+        db.commit()
+    with TestingSessionLocal() as db:
+        rolled_back_id, _ = _add_message(db, "discarded")
+        db.rollback()
+
+    assert message_routes.get(committed_id) == service_request_id
+    assert message_routes.get(rolled_back_id) is None
+
+
+@pytest.mark.asyncio
+async def test_status_without_conversation_is_routed_from_the_cache():
+    manager = ConnectionManager(backplane=InProcessBackplane(), status_batch_ms=0)
+    watcher = fake_socket()
+    await manager.connect(watcher, user_id=1, service_request_id=7)
+    message_routes.put(123, 7)
+
+    await manager.send_message_status(123, "read", user_id=2)
+
+    [frame] = _received(watcher)
+    assert frame["type"] == "message_status"
+    assert (frame["message_id"], frame["service_request_id"], frame["status"]) == (123, 7, "read")
+
+
+@pytest.mark.asyncio
+async def test_statuses_in_one_tick_share_a_frame_per_conversation():
+    manager = ConnectionManager(backplane=InProcessBackplane(), status_batch_ms=5)
+    room_7, room_8 = fake_socket(), fake_socket()
+    await manager.connect(room_7, user_id=1, service_request_id=7)
+    await manager.connect(room_8, user_id=1, service_request_id=8)
+
+    for message_id in (10, 11, 12):
+        await manager.send_message_status(message_id, "delivered", 2, service_request_id=7)
+        await manager.send_message_status(message_id, "read", 2, service_request_id=7)
+    await manager.send_message_status(20, "read", 3, service_request_id=8)
+    await asyncio.sleep(0.05)
+
+    [batch] = _received(room_7)
+    assert batch["type"] == "message_status_batch"
+    assert [(s["message_id"], s["status"]) for s in batch["statuses"]] == [
+        (12, "delivered"),
+        (12, "read"),
+    ]
+    [single] = _received(room_8)
+    assert (single["type"], single["message_id"]) == ("message_status", 20)
+    assert manager.status_batcher.stats()["events"] == 7
+    assert manager.status_batcher.stats()["frames"] == 2
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from app.models import ChatMessageORM
+from app.websocket.connection_manager import manager
+from app.websocket.message_writer import ChatMessageWriter, PendingMessage
+from tests.conftest import TestingSessionLocal, fake_socket
+
+
+@pytest.fixture
+def conversation(committed_conversation):
+    # The writer's sessions run in a worker thread
+    return committed_conversation("writer_owner", "writer_provider")
+
+
+@pytest.fixture
+async def sockets(conversation):
+    owner_socket, provider_socket = fake_socket(), fake_socket()
+    await manager.connect(owner_socket, conversation.owner_id, conversation.service_request_id)
+    await manager.connect(provider_socket, conversation.provider_id, conversation.service_request_id)
+    yield owner_socket, provider_socket
+    await manager.disconnect(owner_socket)
+    await manager.disconnect(provider_socket)
+
+
+def _frames(websocket, frame_type):
+    frames = [json.loads(call.args[0]) for call in websocket.send_text.call_args_list]
+    return [frame for frame in frames if frame["type"] == frame_type]
+
+
+def _pending(conversation, text, **kwargs):
+    return PendingMessage(
+        service_request_id=conversation.service_request_id,
+        sender_id=conversation.owner_id,
+        message=text,
+        message_type="text",
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_queued_messages_are_written_in_one_transaction_in_order(conversation, sockets):
+    owner_socket, provider_socket = sockets
+    writer = ChatMessageWriter(TestingSessionLocal, window_ms=50)
+
+    for text in ("one", "two", "three"):
+        await writer.submit(_pending(conversation, text))
+    await writer.flush()
+    await writer.stop()
+    await asyncio.sleep(0)
+
+    broadcast = [frame["message"] for frame in _frames(provider_socket, "new_message")]
+    assert [message["message"] for message in broadcast] == ["one", "two", "three"]
+    assert [message["id"] for message in broadcast] == sorted(message["id"] for message in broadcast)
+    sent = _frames(owner_socket, "message_sent")
+    assert [frame["message_id"] for frame in sent] == [message["id"] for message in broadcast]
+    stats = writer.stats()
+    assert (stats["batches"], stats["written"]) == (1, 3)
+
+
+@pytest.mark.asyncio
+async def test_resent_client_message_id_is_confirmed_not_stored_again(conversation, sockets):
+    owner_socket, provider_socket = sockets
+    writer = ChatMessageWriter(TestingSessionLocal, window_ms=0)
+
+    await writer.submit(_pending(conversation, "hello", client_message_id="queued-1"))
+    await writer.flush()
+    await writer.submit(_pending(conversation, "hello", client_message_id="queued-1"))
+    await writer.stop()
+    await asyncio.sleep(0)
+
+    first, second = _frames(owner_socket, "message_sent")
+    assert second["message_id"] == first["message_id"]
+    assert (first["duplicate"], second["duplicate"]) == (False, True)
+    assert len(_frames(provider_socket, "new_message")) == 1
+    with TestingSessionLocal() as db:
+        assert db.query(ChatMessageORM).filter_by(client_message_id="queued-1").count() == 1
+
+
+@pytest.mark.asyncio
+async def test_a_bad_row_fails_alone(conversation, sockets):
+    owner_socket, provider_socket = sockets
+    writer = ChatMessageWriter(TestingSessionLocal, window_ms=50)
+
+    await writer.submit(_pending(conversation, "before"))
+    await writer.submit(_pending(conversation, None, client_message_id="broken"))
+    await writer.submit(_pending(conversation, "after"))
+    await writer.stop()
+    await asyncio.sleep(0)
+
+    assert [frame["message"]["message"] for frame in _frames(provider_socket, "new_message")] == ["before", "after"]
+    errors = _frames(owner_socket, "error")
+    assert [frame["client_message_id"] for frame in errors] == ["broken"]
+    assert writer.stats()["failed"] == 1
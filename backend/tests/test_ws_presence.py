@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+from app.models import UserORM
+from app.websocket.backplane import InProcessBackplane
+from app.websocket.connection_manager import ConnectionManager, manager
+from app.websocket.presence import PresenceRegistry
+from tests.conftest import TEST_PASSWORD, add_service_request, fake_socket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _presence(websocket):
+    frames = [json.loads(call.args[0]) for call in websocket.send_text.call_args_list]
+    return [(f["user_id"], f["status"]) for f in frames if f["type"] == "presence"]
+
+
+@pytest.mark.asyncio
+async def test_silent_socket_expires_and_is_announced_offline():
+    clock = FakeClock()
+    room = ConnectionManager(
+        backplane=InProcessBackplane(), presence=PresenceRegistry(ttl_seconds=30, clock=clock)
+    )
+    watcher, silent = fake_socket(), fake_socket()
+    await room.connect(watcher, user_id=1, service_request_id=7)
+    await room.connect(silent, user_id=2, service_request_id=7)
+    await room.publish_presence()
+
+    clock.now = 20
+    room.heartbeat(watcher)
+    clock.now = 35
+    assert await room.expire_stale_connections() == 1
+    await asyncio.sleep(0)
+
+    assert _presence(watcher) == [(2, "online"), (2, "offline")]
+    silent.close.assert_awaited_once_with(code=1001, reason="Heartbeat timeout")
+    assert room.online_user_ids(7) == {1}
+    assert room.presence.stats()["expired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_online_users_are_answered_from_the_registry(client, db_session, assert_max_queries):
+    owner = UserORM(username="presence_owner", hashed_password=TEST_PASSWORD)
+    provider = UserORM(username="presence_provider", hashed_password=TEST_PASSWORD, is_provider=True)
+    db_session.add_all([owner, provider])
+    db_session.flush()
+    request = add_service_request(db_session, owner)
+    db_session.commit()
+
+    sockets = [fake_socket(), fake_socket()]
+    await manager.connect(sockets[0], owner.id, request.id)
+    manager.presence.remember(owner)
+    await manager.connect(sockets[1], provider.id, request.id)
+    try:
+        # The provider's profile is loaded once, then kept with their socket
+        for budget in (2, 1):
+            with assert_max_queries(budget):
+                response = await client.get(f"/ws/chat/{request.id}/online-users")
+            users = response.json()["online_users"]
+            assert [(u["username"], u["is_provider"]) for u in users] == [
+                ("presence_owner", False),
+                ("presence_provider", True),
+            ]
+            assert all(u["last_seen"] for u in users)
+    finally:
+        for websocket in sockets:
+            await manager.disconnect(websocket)
+        await manager.publish_presence()
+
+
+@pytest.mark.asyncio
+async def test_online_users_of_a_missing_request_is_404(client):
+    response = await client.get("/ws/chat/999/online-users")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Service request not found"
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from app.models import ChatMessageORM
+from app.schemas import ChatMessageRead
+from app.websocket.connection_manager import manager
+from app.websocket.replay_log import ReplayLog, frame_message_ids
+from tests.conftest import TestingSessionLocal
+
+
+def _stamp(log, exclude_user_id=None, **frame):
+    """Stamp a frame the way the connection manager does"""
+    return log.stamp(7, json.dumps(frame), exclude_user_id, frame["type"], frame_message_ids(frame))
+
+
+def test_replay_log_plans_from_frames_then_message_ids_then_resync():
+    log = ReplayLog(frames_per_room=2, messages_per_room=2)
+    epoch, seq = log.position(7)
+    assert seq == 0
+    _stamp(log, type="new_message", message={"id": 40})
+    _stamp(log, exclude_user_id=2, type="message_status", user_id=2)
+    _stamp(log, exclude_user_id=1, type="new_messages", messages=[{"id": 41}, {"id": 42}])
+    assert _stamp(log, exclude_user_id=2, type="typing", user_id=2) == json.dumps({"type": "typing", "user_id": 2})
+    stamped = _stamp(log, type="new_message", message={"id": 43})
+    assert json.loads(stamped) == {"type": "new_message", "message": {"id": 43}, "seq": 4}
+
+    assert log.plan(7, epoch, 2, user_id=1).source == "log"
+    assert [json.loads(text)["seq"] for text in log.frames_since(7, 2, user_id=1)] == [4]
+    # Frames 1-2 are gone; messages after seq 1 are not, except the user's own
+    plan = log.plan(7, epoch, 1, user_id=1)
+    assert (plan.source, plan.after_seq, plan.message_ids) == ("database", 4, [43])
+    assert log.plan(7, epoch, 0, user_id=1).source == "resync"
+    assert log.plan(7, "another-worker", 3, user_id=1).source == "resync"
+    assert log.plan(7, epoch, 5, user_id=1).source == "resync"
+
+
+@pytest.fixture
+def socket_client(socket_client, monkeypatch):
+    monkeypatch.setattr(manager, "replay_log", ReplayLog(frames_per_room=3))
+    return socket_client
+
+
+def _send_message(client, service_request_id, sender_id, text):
+    with TestingSessionLocal() as db:
+        message = ChatMessageORM(service_request_id=service_request_id, sender_id=sender_id, message=text)
+        db.add(message)
+        db.commit()
+        frame = {"type": "new_message", "message": ChatMessageRead.model_validate(message).model_dump(mode="json")}
+    client.portal.call(manager.broadcast_message, frame, service_request_id)
+
+
+def _typing(client, service_request_id, user_id):
+    client.portal.call(manager.send_typing_indicator, service_request_id, user_id, True)
+
+
+def _status(client, service_request_id, user_id):
+    frame = {"type": "message_status", "service_request_id": service_request_id, "user_id": user_id, "status": "read"}
+    client.portal.call(manager.broadcast_message, frame, service_request_id)
+
+
+def test_reconnect_resumes_from_the_log_or_the_database(socket_client, committed_conversation):
+    conversation = committed_conversation("replay_owner", "replay_provider")
+    token, service_request_id, provider_id = (
+        conversation.token,
+        conversation.service_request_id,
+        conversation.provider_id,
+    )
+    url = f"/ws/chat/{service_request_id}?token={token}"
+
+    with socket_client.websocket_connect(url) as websocket:
+        established = websocket.receive_json()
+        _send_message(socket_client, service_request_id, provider_id, "first")
+        seen = websocket.receive_json()
+    epoch = established["replay_epoch"]
+    # The owner's own presence frame took a seq, but was not sent to them
+    assert seen["seq"] == established["seq"] + 2
+
+    # Missed while away: still in the frame log, apart from the typing frame
+    _send_message(socket_client, service_request_id, provider_id, "second")
+    _typing(socket_client, service_request_id, provider_id)
+    _status(socket_client, service_request_id, provider_id)
+    with socket_client.websocket_connect(f"{url}&replay_epoch={epoch}&resume_from={seen['seq']}") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        missed = [websocket.receive_json() for _ in range(3)]
+    assert [frame["type"] for frame in missed] == ["new_message", "message_status", "resumed"]
+    assert missed[0]["message"]["message"] == "second"
+    assert missed[2]["source"] == "log"
+
+    # Missed more than the log holds: messages come back from the database
+    last_seq = missed[2]["seq"]
+    _send_message(socket_client, service_request_id, provider_id, "third")
+    for _ in range(4):
+        _status(socket_client, service_request_id, provider_id)
+    with socket_client.websocket_connect(f"{url}&replay_epoch={epoch}&resume_from={last_seq}") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        replayed, resumed = websocket.receive_json(), websocket.receive_json()
+    assert (replayed["type"], replayed["replayed"]) == ("new_messages", True)
+    assert [message["message"] for message in replayed["messages"]] == ["third"]
+    # Five frames sent while away, after the owner's offline and online presence
+    assert (resumed["type"], resumed["source"], resumed["seq"]) == ("resumed", "database", last_seq + 7)
+
+    with socket_client.websocket_connect(f"{url}&replay_epoch=stale&resume_from=1") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        assert websocket.receive_json()["type"] == "resync_required"
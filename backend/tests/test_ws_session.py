@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.auth.utils import create_access_token
+from app.models import UserORM
+from app.websocket.connection_manager import manager
+from tests.conftest import TEST_PASSWORD, TestingSessionLocal, add_service_request
+
+
+@pytest.fixture
+def conversations():
+    """A token for a user owning two requests, and a request they are not part of"""
+    with TestingSessionLocal() as db:
+        owner = UserORM(username="session_owner", hashed_password=TEST_PASSWORD)
+        stranger = UserORM(username="session_stranger", hashed_password=TEST_PASSWORD)
+        db.add_all([owner, stranger])
+        db.flush()
+        ids = tuple(add_service_request(db, user).id for user in (owner, owner, stranger))
+        token = create_access_token({"sub": owner.username})
+        db.commit()
+    return token, ids
+
+
+def _broadcast(client, service_request_id, marker):
+    client.portal.call(manager.broadcast_message, {"type": "note", "marker": marker}, service_request_id)
+
+
+def test_one_session_socket_follows_its_subscriptions(socket_client, conversations):
+    token, (first, second, foreign) = conversations
+
+    with socket_client.websocket_connect(f"/ws/session?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        for service_request_id in (first, second, foreign):
+            websocket.send_text(json.dumps({"type": "subscribe", "service_request_id": service_request_id}))
+        replies = [websocket.receive_json() for _ in range(3)]
+        assert [(reply["type"], reply["service_request_id"]) for reply in replies] == [
+            ("subscribed", first),
+            ("subscribed", second),
+            ("error", foreign),
+        ]
+        assert replies[2]["message"] == "Access denied"
+
+        _broadcast(socket_client, first, "first")
+        _broadcast(socket_client, foreign, "foreign")
+        _broadcast(socket_client, second, "second")
+        assert websocket.receive_json()["marker"] == "first"
+        assert websocket.receive_json()["marker"] == "second"
+
+        websocket.send_text(json.dumps({"type": "unsubscribe", "service_request_id": first}))
+        assert websocket.receive_json() == {"type": "unsubscribed", "service_request_id": first}
+        _broadcast(socket_client, first, "first")
+        _broadcast(socket_client, second, "second")
+        assert websocket.receive_json()["marker"] == "second"
+
+        websocket.send_text(json.dumps({"type": "message", "service_request_id": first, "message": "Hi"}))
+        error = websocket.receive_json()
+        assert (error["type"], error["message"]) == ("error", "Not subscribed to this conversation")
+
+        websocket.send_text(json.dumps({"type": "message", "service_request_id": second, "message": "Hi"}))
+        accepted, sent = websocket.receive_json(), websocket.receive_json()
+        assert (accepted["type"], accepted["service_request_id"]) == ("message_accepted", second)
+        assert (sent["type"], sent["service_request_id"]) == ("message_sent", second)
+
+    assert manager.connection_rooms == {}
+    assert manager.room_members == {}
+
+
+def test_session_socket_requires_a_token(socket_client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with socket_client.websocket_connect("/ws/session"):
+            pass
+    assert (closed.value.code, closed.value.reason) == (1008, "Authentication required")
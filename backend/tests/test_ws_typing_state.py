@@ -0,0 +1,70 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.websocket.typing_state import TypingTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def tracker():
+    return TypingTracker(
+        AsyncMock(),
+        timeout_seconds=6,
+        stop_delay_seconds=1.5,
+        sweep_seconds=None,
+        clock=FakeClock(),
+    )
+
+
+def _emitted(tracker):
+    return [call.args for call in tracker._emit.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_keystrokes_emit_one_start_and_a_held_stop(tracker):
+    for _ in range(20):
+        await tracker.update(7, 1, True)
+        tracker.clock.now += 0.2
+    await tracker.update(7, 1, False)
+    tracker.clock.now += 1
+    await tracker.sweep()
+    assert _emitted(tracker) == [(7, 1, True)]
+
+    tracker.clock.now += 0.5
+    await tracker.sweep()
+    assert _emitted(tracker) == [(7, 1, True), (7, 1, False)]
+    assert tracker.stats() == {"typing": 0, "frames": 21, "emitted": 2}
+
+
+@pytest.mark.asyncio
+async def test_typing_again_within_the_stop_delay_keeps_the_indicator(tracker):
+    await tracker.update(7, 1, True)
+    await tracker.update(7, 1, False)
+    tracker.clock.now += 1
+    await tracker.update(7, 1, True)
+    tracker.clock.now += 1
+    await tracker.sweep()
+
+    assert _emitted(tracker) == [(7, 1, True)]
+
+
+@pytest.mark.asyncio
+async def test_silent_typer_expires_and_message_stops_at_once(tracker):
+    await tracker.update(7, 1, True)
+    await tracker.update(7, 2, True)
+    tracker.clock.now += 5
+    await tracker.update(7, 2, True)
+    tracker.clock.now += 1
+    await tracker.sweep()
+    await tracker.stop(7, 2)
+    await tracker.stop(7, 2)
+
+    assert _emitted(tracker) == [(7, 1, True), (7, 2, True), (7, 1, False), (7, 2, False)]
@@ -60,6 +60,10 @@ import { useAuth } from "../../../contexts/AuthContext";
 import { getToken } from '../../../services/api';
 import { useMessageStatusTracker } from "../../../hooks/useMessageStatusTracker";
 
+// Longer than the server's typing timeout (CHAT_TYPING_TIMEOUT_SECONDS), after
+// which it sends the stop itself
+const TYPING_INDICATOR_FALLBACK_MS = 10000;
+
 export const ChatPage = () => {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
@@ -76,6 +80,7 @@ export const ChatPage = () => {
   const [loadingMore, setLoadingMore] = useState(false);
   const [offlineStatus, setOfflineStatus] = useState<OfflineStatus>(offlineMessageService.getOfflineStatus());
   const wsInitialized = useRef(false);
+  const typingHideTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
 
   // Initialize message status tracker
   const messageStatusTracker = useMessageStatusTracker(
@@ -120,12 +125,21 @@ export const ChatPage = () => {
           
           webSocketService.onMessage('typing', (data: WebSocketMessage) => {
             if (data.user_id !== user?.id) {
-              setOtherUserTyping(data.is_typing || false);
-              
-              // Auto-hide typing indicator after 3 seconds
-              setTimeout(() => {
-                setOtherUserTyping(false);
-              }, 3000);
+              // The server sends is_typing: false once the other user stops,
+              // sends their message, goes quiet or disconnects, and sends
+              // nothing in between; the timer only covers a lost stop frame
+              if (typingHideTimer.current) {
+                clearTimeout(typingHideTimer.current);
+                typingHideTimer.current = null;
+              }
+              const isTyping = data.is_typing || false;
+              setOtherUserTyping(isTyping);
+              if (isTyping) {
+                typingHideTimer.current = setTimeout(() => {
+                  typingHideTimer.current = null;
+                  setOtherUserTyping(false);
+                }, TYPING_INDICATOR_FALLBACK_MS);
+              }
             }
           });
           
@@ -163,6 +177,10 @@ export const ChatPage = () => {
     return () => {
       webSocketService.disconnect();
       wsInitialized.current = false;
+      if (typingHideTimer.current) {
+        clearTimeout(typingHideTimer.current);
+        typingHideTimer.current = null;
+      }
     };
   }, [id]);
 